@@ -0,0 +1,211 @@
+"""
+    Fast acoustic filler detection.
+
+    Hesitations like "um" and "uh" sound different from ordinary speech: a
+    single voiced sound held for a quarter of a second or more, with an
+    almost flat pitch and a spectrum that hardly changes. Ordinary syllables
+    change pitch and spectrum every few tens of milliseconds.
+
+    This detector looks for exactly that, without any speech recognition.
+    Every 10 ms frame of the 16 kHz audio gets:
+        - its loudness
+        - how strongly voiced it is (normalized autocorrelation peak) and its pitch
+        - the energy in a set of frequency bands
+    All of this is computed with NumPy FFTs over blocks of frames. Runs of
+    loud enough, voiced frames whose pitch and band energies stay steady are
+    reported as filler candidates. This runs hundreds of times faster than
+    real time.
+
+    The candidates are only candidates: held vowels at the end of a phrase
+    look the same. The engine can either cut them directly ("acoustic") or
+    have Whisper listen only to the audio around them and cut the filler
+    words it hears there ("confirm").
+"""
+
+import numpy as np
+
+import progress
+
+
+# Word used for acoustic filler hits in the Whisper-style result, it matches any filler word
+# (the space keeps it from ever equalling a transcribed word)
+FILLER_LABEL = "filler sound"
+
+# Analysis frame length and hop (s)
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+
+# Pitch range searched for voicing (Hz)
+MIN_PITCH = 70.0
+MAX_PITCH = 400.0
+
+# Band energies compared between frames cover this range (Hz), split into this many bands
+BAND_RANGE = (100.0, 4000.0)
+BAND_COUNT = 16
+
+# Frames analysed per FFT block (bounds the temporary memory)
+FEATURE_BLOCK_FRAMES = 2000
+
+# A frame is voiced when its normalized autocorrelation peak is at least this high
+MIN_VOICING = 0.6
+
+# Frames quieter than the median voiced frame by more than this are ignored (dB)
+LOUDNESS_RANGE_DB = 15.0
+
+# Largest mean change of the band energies between two frames of a steady sound (dB)
+MAX_BAND_FLUX_DB = 2.5
+
+# Largest pitch change between two frames of a steady sound (octaves)
+MAX_PITCH_JUMP = 0.06
+
+# Steady runs separated by at most this many frames are joined
+MAX_GAP_FRAMES = 3
+
+# Length of a filler candidate (s), shorter runs are ordinary vowels and longer ones are not speech
+MIN_FILLER_SECONDS = 0.25
+MAX_FILLER_SECONDS = 1.5
+
+# Audio around each candidate that Whisper hears when confirming it (s)
+CONFIRM_CONTEXT = 1.0
+
+
+class AcousticFillerDetector():
+    """ Finds filler candidates in audio that arrives in blocks of 16-bit samples.
+
+    Only a few numbers per 10 ms frame are kept, so a multi-hour recording can
+    be fed block by block while it is being decoded.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.frame_len = int(round(FRAME_SECONDS * sample_rate))
+        self.hop = int(round(HOP_SECONDS * sample_rate))
+        self.n_fft = 1 << int(np.ceil(np.log2(2 * self.frame_len))) # Room for the autocorrelation without wrap-around
+        self.min_lag = int(sample_rate / MAX_PITCH)
+        self.max_lag = min(int(sample_rate / MIN_PITCH), self.frame_len - 1)
+
+        self.window = np.hanning(self.frame_len).astype(np.float32)
+        # Autocorrelation of the window itself, dividing by it undoes the window's taper (Boersma 1993)
+        window_autocorrelation = np.fft.irfft(np.abs(np.fft.rfft(self.window, self.n_fft)) ** 2, self.n_fft)
+        self.window_autocorrelation = window_autocorrelation[:self.max_lag + 1] / window_autocorrelation[0]
+
+        # FFT bin -> band matrix, summing the power of the bins inside each band
+        frequencies = np.fft.rfftfreq(self.n_fft, 1 / sample_rate)
+        edges = np.linspace(BAND_RANGE[0], min(BAND_RANGE[1], sample_rate / 2), BAND_COUNT + 1)
+        band_of_bin = np.searchsorted(edges, frequencies, side="right") - 1
+        self.bands = np.zeros((len(frequencies), BAND_COUNT), dtype=np.float32)
+        inside = (band_of_bin >= 0) & (band_of_bin < BAND_COUNT)
+        self.bands[np.flatnonzero(inside), band_of_bin[inside]] = 1.0
+
+        self._tail = np.zeros(0, dtype=np.float32) # Samples of the frames not complete yet
+        self._features = [] # (loudness, voicing, pitch, band energies) of every block of frames
+        self.frame_count = 0
+
+    def feed(self, samples):
+        """ Add the next block of int16 samples """
+        signal = np.concatenate((self._tail, np.asarray(samples, dtype=np.float32) / 32768.0))
+        if len(signal) < self.frame_len:
+            self._tail = signal
+            return
+
+        frame_count = 1 + (len(signal) - self.frame_len) // self.hop
+        frames = np.lib.stride_tricks.sliding_window_view(signal, self.frame_len)[::self.hop][:frame_count]
+        for start in range(0, frame_count, FEATURE_BLOCK_FRAMES):
+            self._features.append(self._frame_features(frames[start:start + FEATURE_BLOCK_FRAMES]))
+        self._tail = signal[frame_count * self.hop:]
+        self.frame_count += frame_count
+
+    def _frame_features(self, frames):
+        """ Loudness (dBFS), voicing strength, pitch (Hz) and log band energies (dB) of a block of frames """
+        with np.errstate(divide="ignore"):
+            loudness = 10 * np.log10(np.maximum(np.mean(frames ** 2, axis=1), 1e-12))
+
+        power = np.abs(np.fft.rfft(frames * self.window, self.n_fft, axis=1)) ** 2
+        autocorrelation = np.fft.irfft(power, self.n_fft, axis=1)[:, :self.max_lag + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            normalized = (autocorrelation / np.maximum(autocorrelation[:, :1], 1e-12)) \
+                / self.window_autocorrelation
+        lags = np.argmax(normalized[:, self.min_lag:], axis=1) + self.min_lag
+        voicing = np.nan_to_num(normalized[np.arange(len(frames)), lags])
+
+        band_energy = 10 * np.log10(power.astype(np.float32) @ self.bands + 1e-10)
+        return loudness.astype(np.float32), voicing.astype(np.float32), \
+            (self.sample_rate / lags).astype(np.float32), band_energy
+
+    def finish(self):
+        """ (start, end) in seconds of every filler candidate """
+        if not self._features:
+            return []
+        loudness, voicing, pitch, band_energy = (np.concatenate(parts) for parts in zip(*self._features))
+
+        voiced = voicing >= MIN_VOICING
+        if not voiced.any():
+            return []
+        speech_level = np.median(loudness[voiced])
+
+        # How much the spectrum and the pitch moved since the previous frame
+        band_flux = np.concatenate(([0.0], np.mean(np.abs(np.diff(band_energy, axis=0)), axis=1)))
+        pitch_jump = np.concatenate(([0.0], np.abs(np.diff(np.log2(pitch)))))
+
+        steady = voiced & (loudness >= speech_level - LOUDNESS_RANGE_DB) \
+            & (band_flux <= MAX_BAND_FLUX_DB) & (pitch_jump <= MAX_PITCH_JUMP)
+        return self._runs_to_candidates(steady)
+
+    def _runs_to_candidates(self, steady):
+        """ Join the steady runs separated by short gaps and keep those as long as a filler """
+        edges = np.diff(np.concatenate(([0], steady.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) # Exclusive
+        if len(starts) == 0:
+            return []
+
+        # Merge runs whose gap is short (a frame or two of creak inside an "uh")
+        new_group = np.concatenate(([True], starts[1:] - ends[:-1] > MAX_GAP_FRAMES))
+        group = np.cumsum(new_group) - 1
+        run_starts = starts[new_group]
+        run_ends = np.zeros(len(run_starts), dtype=np.int64)
+        np.maximum.at(run_ends, group, ends)
+
+        # Frame i is centred on i * hop + frame_len / 2
+        offset = (self.frame_len - self.hop) / 2
+        start_times = (run_starts * self.hop + offset) / self.sample_rate
+        end_times = (run_ends * self.hop + offset) / self.sample_rate
+        length = end_times - start_times
+        keep = (length >= MIN_FILLER_SECONDS) & (length <= MAX_FILLER_SECONDS)
+        return [(float(start), float(end)) for start, end in zip(start_times[keep], end_times[keep])]
+
+
+def find_candidates(samples, sample_rate, progress_callback=None, block_seconds=60.0):
+    """ Filler candidates in a whole int16 recording held in memory """
+    detector = AcousticFillerDetector(sample_rate)
+    block = int(block_seconds * sample_rate)
+    stage = progress.Stage(progress_callback, "Finding filler candidates", 60, 70,
+                           total=len(samples) / sample_rate, unit="s", rate_unit="x realtime")
+    for start in range(0, len(samples), block):
+        detector.feed(samples[start:start + block])
+        stage.update(min(len(samples), start + block) / sample_rate)
+    return detector.finish()
+
+
+def candidates_transcript(candidates):
+    """ Whisper-style result with one FILLER_LABEL word per candidate """
+    segments = [{
+        "id": index,
+        "start": start,
+        "end": end,
+        "text": FILLER_LABEL,
+        "words": [{"word": FILLER_LABEL, "start": start, "end": end}],
+    } for index, (start, end) in enumerate(candidates)]
+    return {"text": "", "segments": segments, "language": None}
+
+
+def confirm_regions(candidates, duration, context=CONFIRM_CONTEXT):
+    """ Merged regions around the candidates that Whisper listens to when confirming them """
+    regions = []
+    for start, end in candidates:
+        start, end = max(0.0, start - context), min(duration, end + context)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+        else:
+            regions.append((start, end))
+    return regions
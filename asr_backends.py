@@ -0,0 +1,111 @@
+"""
+    Speech recognition backends.
+
+    A backend loads a model for a model name and device, and every
+    transcription in the engine and its workers goes through the backend's
+    transcribe(model, audio, **options). It takes the float32 16 kHz audio
+    and returns a Whisper-style {"text", "segments", "language"} result,
+    where every segment can hold "words" with "word", "start" and "end"
+    keys. By default it calls the model's own Whisper-style transcribe().
+    The rest of the pipeline works on that result: voiced windows, chunked
+    transcription, two-pass alignment, the transcript cache and
+    checkpoints, and the engine reads the filler words from it.
+
+    Two backends are built in:
+        whisper       openai-whisper as it is (float32, or float16 on CUDA)
+        whisper-int8  the same Whisper model with its linear layers
+                      dynamically quantized to int8, for CPU-only hosts.
+                      It is usually a good deal faster on a CPU, at a small
+                      cost in accuracy (see asr_benchmark.py)
+
+    Other engines can be added with register_backend(), with a load() and a
+    transcribe() that wraps their output in the Whisper-style result.
+"""
+
+from abc import ABC, abstractmethod
+
+
+# Backend used when none is chosen
+DEFAULT_BACKEND = "whisper"
+
+
+class ASRBackend(ABC):
+    """ Base class of the speech recognition backends """
+
+    name = None
+
+    def resolve_device(self, device=None):
+        """ Device the model is loaded on, the one whisper would pick when none is given ("cuda" if available, else "cpu") """
+        if device:
+            return device
+        import torch # Installed together with whisper
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    @abstractmethod
+    def load(self, model_name, device):
+        """ Load the model of model_name on device """
+
+    def transcribe(self, model, audio, **options):
+        """ Whisper-style result of the float32 16 kHz audio, options are those of whisper's transcribe() """
+        return model.transcribe(audio, **options)
+
+
+class WhisperBackend(ASRBackend):
+    """ openai-whisper as it is """
+
+    name = "whisper"
+
+    def load(self, model_name, device):
+        import whisper # AI API to detect silence and filler words like um
+        return whisper.load_model(model_name, device=device)
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """ Whisper with int8 dynamically quantized linear layers, CPU only """
+
+    name = "whisper-int8"
+
+    def resolve_device(self, device=None):
+        return "cpu" # Quantized kernels only exist for the CPU, a given device is ignored
+
+    def load(self, model_name, device):
+        return quantize_model(super().load(model_name, device="cpu"))
+
+
+def quantize_model(model):
+    """ Quantize the linear layers of a float32 torch model to int8 in place (weights stored as int8,
+    activations quantized on the fly), which is where a transformer spends most of its CPU time """
+    import torch # Installed together with whisper
+
+    # Whisper uses its own Linear subclass, which quantize_dynamic() does not recognise. It
+    # computes the same as a plain Linear in float32, so the layers are swapped for plain ones
+    for module in list(model.modules()):
+        for child_name, child in list(module.named_children()):
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                plain.weight = child.weight
+                plain.bias = child.bias
+                setattr(module, child_name, plain)
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+# Backends by name
+BACKENDS = {}
+
+
+def register_backend(backend):
+    """ Make a backend available under its name """
+    BACKENDS[backend.name] = backend
+
+
+def get_backend(name=None):
+    """ The backend registered under name (the default backend when name is None) """
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}', choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]
+
+
+register_backend(WhisperBackend())
+register_backend(QuantizedWhisperBackend())
@@ -0,0 +1,201 @@
+"""
+    Speech recognition backend benchmark.
+
+    Transcribes local recordings with each ASR backend (see asr_backends.py)
+    the way the engine does (voiced regions only, no transcript cache) and
+    compares how fast each one is and how many of the filler words it finds.
+
+    Any audio or video file in the fixtures folder is a fixture. The filler
+    words that are really in it can be listed next to it in
+    <name>.fillers.json, a list of [start, end] times in seconds. Without
+    that file, the fillers the first backend finds count as the truth, so
+    the recall of the other backends is relative to it.
+
+    For every fixture and backend it records:
+        - the time to load the model
+        - the real-time factor of the transcription (seconds of compute per
+          second of audio, lower is faster)
+        - the filler recall: the share of the true fillers that a filler hit overlaps
+
+    Usage:
+        python asr_benchmark.py path/to/fixtures
+        python asr_benchmark.py path/to/fixtures --model small --torch-threads 4 -o asr_results.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+import asr_backends
+import audio
+import batch
+import live_preview
+import model_cache
+import silence
+from benchmark import machine_info
+from engine import EngineSettings, FillerRemovalEngine
+
+
+# Files in the fixtures folder that are benchmarked
+FIXTURE_EXTENSIONS = batch.INPUT_EXTENSIONS
+
+# Suffix of the file listing the real fillers of a fixture
+TRUTH_SUFFIX = ".fillers.json"
+
+
+def collect_fixtures(fixtures_dir):
+    """ Sorted paths of the audio and video files in fixtures_dir """
+    return sorted(
+        os.path.join(fixtures_dir, name) for name in os.listdir(fixtures_dir)
+        if name.lower().endswith(FIXTURE_EXTENSIONS)
+    )
+
+
+def load_truth(media_file):
+    """ (start, end) of the real fillers of a fixture, or None when it has no truth file """
+    truth_file = os.path.splitext(media_file)[0] + TRUTH_SUFFIX
+    if not os.path.exists(truth_file):
+        return None
+    with open(truth_file, "r", encoding="utf-8") as truth:
+        return [(float(start), float(end)) for start, end in json.load(truth)]
+
+
+def recall(truth, hits):
+    """ Share of the true fillers overlapped by a filler hit (1.0 when there are none) """
+    if not truth:
+        return 1.0
+    found = sum(1 for start, end in truth if any(hit_start < end and hit_end > start for _, hit_start, hit_end in hits))
+    return found / len(truth)
+
+
+def benchmark_backend(engine, decoded_audio, envelope, average_dbfs, silent_intervals, repeat=1):
+    """ Model load time, fastest transcription time and filler hits of one backend on one fixture """
+    settings = engine.settings
+    model_cache.registry.clear() # Every backend pays its own load time
+    start = time.perf_counter()
+    model_cache.get_model(settings.model_name, settings.device, settings.asr_backend)
+    load_time = time.perf_counter() - start
+
+    transcribe_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transcription = engine.transcribe(decoded_audio, silent_intervals)
+        transcribe_time = min(transcribe_time, time.perf_counter() - start)
+
+    analysis = live_preview.Analysis(None, decoded_audio.duration, envelope, average_dbfs, transcription)
+    return load_time, transcribe_time, analysis.filler_hits(settings.filler_words)
+
+
+def benchmark_fixture(media_file, backends, model_name, device, filler_words, repeat=1, verbose=False):
+    """ Results of every backend on one fixture, the first backend is the reference """
+    decoded_audio = audio.decode_audio(media_file)
+    envelope = silence.loudness_envelope(decoded_audio.samples, decoded_audio.sample_rate, decoded_audio.sample_width)
+    average_dbfs = silence.dbfs(decoded_audio.samples, decoded_audio.sample_width)
+    truth = load_truth(media_file)
+    truth_source = "file" if truth is not None else backends[0]
+
+    results = {}
+    for backend in backends:
+        settings = EngineSettings(model_name=model_name, device=device, asr_backend=backend,
+                                  filler_words=tuple(filler_words), transcript_cache_mb=0)
+        engine = FillerRemovalEngine(settings)
+        silent_intervals = engine.detect_silences(envelope, average_dbfs)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if verbose else output):
+            load_time, transcribe_time, hits = benchmark_backend(
+                engine, decoded_audio, envelope, average_dbfs, silent_intervals, repeat)
+        if truth is None:
+            truth = [(start, end) for _, start, end in hits] # The reference backend's fillers
+        results[backend] = {
+            "load_time": load_time,
+            "transcribe_time": transcribe_time,
+            "realtime_factor": transcribe_time / decoded_audio.duration if decoded_audio.duration else None,
+            "filler_hits": len(hits),
+            "filler_recall": recall(truth, hits),
+        }
+
+    return {
+        "duration": decoded_audio.duration,
+        "truth": truth_source,
+        "true_fillers": len(truth),
+        "backends": results,
+    }
+
+
+def summarize(results, backends):
+    """ Duration-weighted real-time factor and filler recall of every backend over all fixtures,
+    with the speed-up and recall difference relative to the first backend """
+    summary = {}
+    total_duration = sum(result["duration"] for result in results.values())
+    for backend in backends:
+        transcribe_time = sum(result["backends"][backend]["transcribe_time"] for result in results.values())
+        true_fillers = sum(result["true_fillers"] for result in results.values())
+        found = sum(result["backends"][backend]["filler_recall"] * result["true_fillers"] for result in results.values())
+        summary[backend] = {
+            "realtime_factor": transcribe_time / total_duration if total_duration else None,
+            "filler_recall": found / true_fillers if true_fillers else 1.0,
+        }
+
+    reference = summary[backends[0]]
+    for backend in backends:
+        factor = summary[backend]["realtime_factor"]
+        summary[backend]["speedup"] = reference["realtime_factor"] / factor if factor else None
+        summary[backend]["recall_difference"] = summary[backend]["filler_recall"] - reference["filler_recall"]
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the speed and filler recall of the speech recognition backends")
+    parser.add_argument("fixtures_dir", help="Folder of recordings, each optionally with a <name>%s listing its fillers" % TRUTH_SUFFIX)
+    parser.add_argument("--backends", nargs="+", choices=list(asr_backends.BACKENDS), default=list(asr_backends.BACKENDS),
+                        help="Backends to compare, the first one is the reference (default: %(default)s)")
+    parser.add_argument("--model", default="base", help="Whisper model (default: %(default)s)")
+    parser.add_argument("--device", default="cpu", help="Device of the backends that can choose (default: %(default)s)")
+    parser.add_argument("--filler-words", nargs="+", default=["um", "uh"], help="Filler words counted (default: %(default)s)")
+    parser.add_argument("--torch-threads", type=int, default=None, help="Torch threads (default: torch's own default)")
+    parser.add_argument("--repeat", type=int, default=1, help="Transcriptions per fixture and backend, the fastest counts (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=os.path.join("benchmark_data", "asr_results.json"),
+                        help="Results file (default: %(default)s)")
+    parser.add_argument("--verbose", action="store_true", help="Show the engine's own output")
+    args = parser.parse_args(argv)
+
+    if args.torch_threads:
+        import torch # Installed together with whisper
+        torch.set_num_threads(args.torch_threads)
+
+    fixtures = collect_fixtures(args.fixtures_dir)
+    if not fixtures:
+        print(f"No recordings found in {args.fixtures_dir}")
+        return 1
+
+    results = {}
+    for media_file in fixtures:
+        name = os.path.basename(media_file)
+        print(f"Benchmarking {name}...")
+        result = benchmark_fixture(media_file, args.backends, args.model, args.device, args.filler_words,
+                                   args.repeat, args.verbose)
+        results[name] = result
+        for backend, backend_result in result["backends"].items():
+            print(f"    {backend}: load {backend_result['load_time']:.2f}s, RTF {backend_result['realtime_factor']:.3f}, "
+                  f"{backend_result['filler_hits']} filler hit(s), recall {backend_result['filler_recall']:.0%}")
+
+    summary = summarize(results, args.backends)
+    print(f"Over {len(results)} recording(s), against {args.backends[0]}:")
+    for backend, backend_summary in summary.items():
+        print(f"    {backend}: RTF {backend_summary['realtime_factor']:.3f} ({backend_summary['speedup']:.2f}x), "
+              f"filler recall {backend_summary['filler_recall']:.0%} ({backend_summary['recall_difference']:+.0%})")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump({"machine": machine_info(), "model": args.model, "device": args.device,
+                   "results": results, "summary": summary}, output, indent=2)
+    print(f"Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
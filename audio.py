@@ -0,0 +1,94 @@
+"""
+    In-memory audio extraction.
+
+    One ffmpeg decode streams the soundtrack as 16 kHz mono 16-bit PCM through
+    a pipe straight into a NumPy buffer. Silence detection and Whisper both
+    read that same buffer, so nothing is written to disk and concurrent jobs
+    never fight over a temporary file.
+"""
+
+import numpy as np
+
+import ffmpeg_tools
+import progress
+
+
+# Whisper works on 16 kHz mono audio, so everything is decoded at that rate
+SAMPLE_RATE = 16000
+
+# Bytes per sample of the decoded PCM (signed 16-bit)
+SAMPLE_WIDTH = 2
+
+
+class DecodedAudio():
+    """ A decoded mono soundtrack held in memory """
+
+    def __init__(self, samples, sample_rate=SAMPLE_RATE):
+        self.samples = samples # int16 NumPy array
+        self.sample_rate = sample_rate
+        self.sample_width = SAMPLE_WIDTH
+
+    @property
+    def duration(self):
+        """ Length of the audio in seconds """
+        return len(self.samples) / self.sample_rate
+
+    def as_float32(self):
+        """ Samples scaled to [-1, 1) as float32, the format whisper's transcribe() accepts """
+        return self.samples.astype(np.float32) / 32768.0
+
+
+# Bytes read from the decoder pipe at a time (about 2 seconds of audio)
+READ_BLOCK_BYTES = 1 << 16
+
+
+def _decode_args(media_file, sample_rate):
+    """ ffmpeg arguments that write the first audio stream to stdout as mono 16-bit PCM """
+    return [
+        "-i", media_file,
+        "-vn", # Skip the video stream entirely
+        "-map", "0:a:0",
+        "-ac", "1",
+        "-ar", sample_rate,
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "pipe:1",
+    ]
+
+
+def iter_pcm_blocks(media_file, sample_rate=SAMPLE_RATE, block_seconds=10.0):
+    """ Decode like decode_audio(), but yield the samples as int16 blocks of block_seconds.
+
+    Only one block is held at a time, so memory does not grow with the length of the media.
+    """
+    block_bytes = int(block_seconds * sample_rate) * SAMPLE_WIDTH
+    with ffmpeg_tools.open_ffmpeg(_decode_args(media_file, sample_rate)) as decoder:
+        while True:
+            data = decoder.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) - len(data) % SAMPLE_WIDTH], dtype="<i2")
+
+
+def decode_audio(media_file, sample_rate=SAMPLE_RATE, progress_callback=None, duration=None):
+    """ Decode the first audio stream of media_file into memory as mono 16-bit PCM.
+
+    With a progress_callback the decode is reported as it streams in (as a
+    fraction of duration when the length of the media is known).
+    """
+    args = _decode_args(media_file, sample_rate)
+    if progress_callback is None:
+        pcm = ffmpeg_tools.run_ffmpeg(args, capture_output=True)
+        return DecodedAudio(np.frombuffer(pcm, dtype="<i2"), sample_rate)
+
+    stage = progress.Stage(progress_callback, "Extracting audio", 20, 40, total=duration,
+                           unit="s", rate_unit="x realtime")
+    pcm = bytearray()
+    with ffmpeg_tools.open_ffmpeg(args) as decoder:
+        while True:
+            block = decoder.stdout.read(READ_BLOCK_BYTES)
+            if not block:
+                break
+            pcm += block
+            stage.update(len(pcm) / (SAMPLE_WIDTH * sample_rate))
+    return DecodedAudio(np.frombuffer(bytes(pcm), dtype="<i2"), sample_rate)
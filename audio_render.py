@@ -0,0 +1,253 @@
+"""
+    Audio-only renderer for podcasts and voice memos.
+
+    An audio file has no picture, so loading it as a video clip and encoding
+    an x264 stream is pure overhead. For WAV, MP3, M4A and FLAC input the cut
+    list is applied to the audio stream alone:
+        - ffmpeg decodes it once, at its own sample rate and channel count,
+          as 32-bit float WAV through a pipe
+        - the kept ranges are cut at exact sample positions and joined with a
+          short equal-power crossfade at every seam, so a waveform cut mid-cycle
+          does not click. The crossfade borrows a few milliseconds from the cut
+          side of each seam, so the output is exactly as long as the kept ranges
+        - the result streams into one audio encoder picked by the output extension
+    Only a few blocks of audio are held at a time. The splice itself runs at
+    over a thousand times real time, so for MP3 and M4A output the audio
+    encoder sets the pace and WAV or FLAC output is written in seconds.
+"""
+
+import os
+import struct
+import tempfile
+import subprocess
+
+import numpy as np
+
+import ffmpeg_tools
+import progress
+
+
+# Input files handled by this renderer instead of a video clip
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac")
+
+# Length of the crossfade at every seam (s)
+CROSSFADE_SECONDS = 0.010
+
+# Audio frames read from the decoder pipe at a time
+READ_BLOCK_FRAMES = 1 << 16
+
+# Bitrate of lossy outputs when no encoder profile sets one
+DEFAULT_BITRATE = "192k"
+
+# Encoder of every output extension, None for a lossless one (no bitrate)
+OUTPUT_CODECS = {
+    ".wav": ("pcm_s16le", None),
+    ".flac": ("flac", None),
+    ".mp3": ("libmp3lame", True),
+    ".m4a": ("aac", True),
+    ".mp4": ("aac", True),
+}
+
+
+def is_audio_file(media_file):
+    """ Whether media_file is an audio-only format this renderer handles """
+    return media_file.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) < size:
+        raise RuntimeError("The audio decoder stopped before the WAV header was complete")
+    return data
+
+
+def read_wav_header(stream):
+    """ (sample rate, channels) of a streamed WAV file, reading up to the start of its samples """
+    riff = _read_exactly(stream, 12)
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise RuntimeError("The audio decoder did not write a WAV stream")
+
+    sample_rate = channels = None
+    while True:
+        chunk_id, chunk_size = struct.unpack("<4sI", _read_exactly(stream, 8))
+        if chunk_id == b"data":
+            break # Its size is not known on a pipe, the samples run to the end of the stream
+        body = _read_exactly(stream, chunk_size + chunk_size % 2) # Chunks are padded to an even size
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate = struct.unpack("<HHI", body[:8])
+    if sample_rate is None:
+        raise RuntimeError("The decoded WAV stream has no format chunk")
+    return sample_rate, channels
+
+
+def splice_pieces(keep_ranges, sample_rate, crossfade=CROSSFADE_SECONDS):
+    """ Source frame ranges to join: [(first, end, fade_in, fade_out)].
+
+    Every kept range is widened by half a crossfade at each seam, fade_in and
+    fade_out are the frames it overlaps with the piece before and after it.
+    The crossfade is shortened where a kept range or the cut between two of
+    them is too short for it, so the widened ranges never overlap.
+    """
+    ranges = [(int(round(start * sample_rate)), int(round(end * sample_rate))) for start, end in keep_ranges]
+    ranges = [(first, end) for first, end in ranges if end > first]
+    half = int(round(crossfade * sample_rate / 2))
+
+    # Half the overlap at each seam between two neighbouring ranges
+    seams = [max(0, min(half, (end - first) // 2, (next_end - next_first) // 2, (next_first - end) // 2))
+             for (first, end), (next_first, next_end) in zip(ranges, ranges[1:])]
+    before = [0] + seams
+    after = seams + [0]
+    return [(first - left, end + right, 2 * left, 2 * right)
+            for (first, end), left, right in zip(ranges, before, after)]
+
+
+def _fade_curves(length):
+    """ Equal-power fade-in and fade-out curves of length frames, as columns """
+    angle = (np.arange(length, dtype=np.float32) + 0.5) / max(length, 1) * (np.pi / 2)
+    return np.sin(angle)[:, None], np.cos(angle)[:, None]
+
+
+class AudioSplicer():
+    """ Joins the pieces (see splice_pieces()) of a sample stream that arrives in blocks.
+
+    Everything but the short crossfades is passed straight to write(), so a
+    piece can be any length without being held in memory.
+    """
+
+    def __init__(self, pieces, channels, write):
+        self.pieces = pieces
+        self.channels = channels
+        self.write = write # Called with every float32 (frames, channels) array of output, in order
+        self.index = 0 # Piece being filled
+        self.position = 0 # Stream index of the next frame fed
+        self.tail = None # Faded-out end of the previous piece, mixed into the start of the current one
+        self.next_tail = None # Faded-out end of the current piece, filled as it arrives
+
+    def feed(self, block):
+        """ Add the next block of float32 (frames, channels) samples """
+        block_end = self.position + len(block)
+        while self.index < len(self.pieces):
+            first, end, _, _ = self.pieces[self.index]
+            if first >= block_end:
+                break
+            low, high = max(first, self.position), min(end, block_end)
+            if high > low:
+                self._add(low - first, block[low - self.position:high - self.position])
+            if end > block_end:
+                break # The piece continues in the next block
+            self._next_piece()
+        self.position = block_end
+
+    def finish(self):
+        """ End of the stream: the pieces it ended inside of are padded with silence """
+        while self.index < len(self.pieces):
+            first, end, _, _ = self.pieces[self.index]
+            low = max(first, self.position)
+            if end > low:
+                self._add(low - first, np.zeros((end - low, self.channels), dtype=np.float32))
+            self._next_piece()
+
+    def _next_piece(self):
+        self.tail = self.next_tail
+        self.next_tail = None
+        self.index += 1
+
+    def _add(self, offset, frames):
+        """ Output frames of the current piece, starting offset frames into it """
+        first, end, fade_in, fade_out = self.pieces[self.index]
+        body_end = end - first - fade_out
+        if self.next_tail is None:
+            self.next_tail = np.zeros((fade_out, self.channels), dtype=np.float32)
+
+        # Crossfade from the previous piece
+        head = frames[:max(0, fade_in - offset)]
+        if len(head):
+            curve_in, _ = _fade_curves(fade_in)
+            self.write(head * curve_in[offset:offset + len(head)] + self.tail[offset:offset + len(head)])
+
+        # Frames between the crossfades go straight through
+        body_start = max(offset, fade_in)
+        body = frames[body_start - offset:max(0, body_end - offset)]
+        if len(body):
+            self.write(body)
+
+        # Fade out the end, the next piece mixes it into its start
+        tail_start = max(offset, body_end)
+        tail = frames[tail_start - offset:]
+        if len(tail):
+            _, curve_out = _fade_curves(fade_out)
+            self.next_tail[tail_start - body_end:tail_start - body_end + len(tail)] = \
+                tail * curve_out[tail_start - body_end:tail_start - body_end + len(tail)]
+
+
+def encoder_args(output_file, profile=None):
+    """ ffmpeg output options for the output's extension (bitrate from the encoder profile when given) """
+    codec, lossy = OUTPUT_CODECS.get(os.path.splitext(output_file)[1].lower(), (None, None))
+    args = ["-c:a", codec] if codec else [] # Unknown extensions get ffmpeg's default encoder
+    if lossy:
+        args += ["-b:a", profile.audio_bitrate if profile is not None else DEFAULT_BITRATE]
+    return args
+
+
+def render_audio(media_file, output_file, keep_ranges, progress_callback=None, crossfade=CROSSFADE_SECONDS,
+                 profile=None):
+    """ Write the kept ranges of the audio in media_file to output_file, crossfaded at every seam """
+    ffmpeg = ffmpeg_tools.ffmpeg_binary()
+    decoder = subprocess.Popen(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", media_file, "-vn", "-map", "0:a:0",
+         "-c:a", "pcm_f32le", "-f", "wav", "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    encoder = None
+    written = 0
+    try:
+        sample_rate, channels = read_wav_header(decoder.stdout)
+        pieces = splice_pieces(keep_ranges, sample_rate, crossfade)
+        total = sum(end - first for first, end, _, _ in pieces) - sum(fade_out for _, _, _, fade_out in pieces)
+
+        with tempfile.TemporaryFile() as encoder_log:
+            # The source is opened again only for its tags (title, artist, chapters...), nothing is decoded from it
+            encoder = subprocess.Popen(
+                [ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                 "-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0",
+                 "-i", media_file, "-map", "0:a", "-map_metadata", "1"] + encoder_args(output_file, profile) + [output_file],
+                stdin=subprocess.PIPE, stderr=encoder_log,
+            )
+            stage = progress.Stage(progress_callback, "Splicing audio", 90, 99, total=total / sample_rate,
+                                   unit="s", rate_unit="x realtime")
+
+            def write(frames):
+                nonlocal written
+                encoder.stdin.write(np.ascontiguousarray(frames, dtype="<f4").tobytes())
+                written += len(frames)
+
+            splicer = AudioSplicer(pieces, channels, write)
+            frame_bytes = 4 * channels
+            try:
+                while splicer.index < len(pieces):
+                    data = decoder.stdout.read(READ_BLOCK_FRAMES * frame_bytes)
+                    if not data:
+                        break
+                    splicer.feed(np.frombuffer(data[:len(data) - len(data) % frame_bytes], dtype="<f4").reshape(-1, channels))
+                    stage.update(written / sample_rate)
+                splicer.finish()
+            except BrokenPipeError:
+                pass # The encoder failed, its error is reported below
+            finally:
+                try:
+                    encoder.stdin.close()
+                except BrokenPipeError:
+                    pass
+                encoder.wait()
+
+            if encoder.returncode != 0:
+                encoder_log.seek(0)
+                raise RuntimeError(f"ffmpeg audio encoder failed: {encoder_log.read().decode(errors='replace').strip()}")
+    finally:
+        # The rest of the audio is not needed once the last kept range is written
+        decoder.stdout.close()
+        decoder.kill()
+        decoder.wait()
+
+    return {"sample_rate": sample_rate, "channels": channels, "pieces": len(pieces),
+            "crossfade": crossfade, "output_frames": written}
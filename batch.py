@@ -0,0 +1,179 @@
+"""
+    Batch processing for many videos at once.
+
+    Takes a folder of videos (or a manifest file listing them), runs the
+    FillerRemovalEngine on each one in a pool of worker processes and writes a
+    JSON summary with the result of every file.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine import EngineSettings, FillerRemovalEngine
+import audio_render
+import model_cache
+
+
+# File extensions picked up when a folder is given as the batch input
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".avi", ".m4v", ".webm")
+INPUT_EXTENSIONS = VIDEO_EXTENSIONS + audio_render.AUDIO_EXTENSIONS
+
+# Name of the summary file written to the output folder
+SUMMARY_FILE_NAME = "batch_summary.json"
+
+
+def collect_inputs(source):
+    """ Return the list of video files described by a folder or a manifest file.
+
+    A manifest is either a .json file holding a list of paths, or a text file
+    with one path per line (blank lines and lines starting with # are skipped).
+    Relative paths in a manifest are resolved against the manifest's folder.
+    """
+    # A folder: take every video (and audio) file directly inside it
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(INPUT_EXTENSIONS)
+        )
+
+    if not os.path.isfile(source):
+        raise FileNotFoundError(f"Batch input not found: {source}")
+
+    # A manifest file: read the listed paths
+    manifest_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as manifest:
+        if source.lower().endswith(".json"):
+            paths = json.load(manifest)
+        else:
+            paths = [line.strip() for line in manifest]
+            paths = [line for line in paths if line and not line.startswith("#")]
+
+    return [path if os.path.isabs(path) else os.path.join(manifest_dir, path) for path in paths]
+
+
+def output_path_for(video_file, output_folder, suffix="_trimmed"):
+    """ Build the output file path for a given input video (audio files keep their own format) """
+    name, extension = os.path.splitext(os.path.basename(video_file))
+    extension = extension.lower() if audio_render.is_audio_file(video_file) else ".mp4"
+    return os.path.join(output_folder, f"{name}{suffix}{extension}")
+
+
+def output_paths_for(video_files, output_folder, suffix="_trimmed"):
+    """ Output file path of every input, made unique where inputs share a name.
+
+    Inputs whose outputs would collide (a.mp4 and a.mov, or the same name in two
+    folders of a manifest) get their source extension added to the name, and a
+    number when that is not enough, so no result overwrites another.
+    """
+    paths = [output_path_for(video_file, output_folder, suffix) for video_file in video_files]
+    counts = {}
+    for path in paths:
+        counts[os.path.normcase(path)] = counts.get(os.path.normcase(path), 0) + 1
+
+    taken = set()
+    for index, (video_file, path) in enumerate(zip(video_files, paths)):
+        stem, source_extension = os.path.splitext(os.path.basename(video_file))
+        extension = os.path.splitext(path)[1]
+        if counts[os.path.normcase(path)] > 1:
+            stem = f"{stem}_{source_extension.lstrip('.').lower()}"
+            path = os.path.join(output_folder, f"{stem}{suffix}{extension}")
+
+        # Still taken: the same name and extension in two folders, or an input listed twice
+        number = 2
+        while os.path.normcase(path) in taken:
+            path = os.path.join(output_folder, f"{stem}_{number}{suffix}{extension}")
+            number += 1
+        taken.add(os.path.normcase(path))
+        paths[index] = path
+    return paths
+
+
+def _init_worker(model_name, device, memory_budget_mb, backend=None, filler_detection="whisper", filler_words=("um",)):
+    """ Pool initializer, loads the Whisper model once per worker before any job starts (unless no job transcribes) """
+    model_cache.registry.memory_budget = int(memory_budget_mb * 1024 * 1024)
+    if EngineSettings(filler_detection=filler_detection, filler_words=tuple(filler_words)).transcribes():
+        model_cache.warm_up(model_name, device, background=False, backend=backend)
+
+
+def worker_init_args(settings, memory_budget_mb):
+    """ Arguments of _init_worker() for a pool running jobs with these settings """
+    return (settings.model_name, settings.device, memory_budget_mb, settings.asr_backend,
+            settings.filler_detection, tuple(settings.filler_words))
+
+
+def _process_one(video_file, output_file, settings_dict):
+    """ Worker entry point, runs a single video through the engine in a pool process """
+    name = os.path.basename(video_file)
+
+    # Prefix the progress messages so interleaved output from many workers stays readable
+    def progress_callback(status, percent):
+        print(f"[{name}] [{percent:>3}%] {status}", flush=True)
+
+    engine = FillerRemovalEngine(EngineSettings.from_dict(settings_dict))
+    return engine.process(video_file, output_file, progress_callback)
+
+
+def run_batch(source, output_folder, settings=None, workers=None, summary_file=None,
+              model_cache_mb=model_cache.DEFAULT_MEMORY_BUDGET_MB):
+    """ Process every video in source across a pool of worker processes.
+
+    Returns the summary dictionary that is also written to summary_file
+    (batch_summary.json in the output folder by default).
+    """
+    settings = settings if settings is not None else EngineSettings()
+    workers = workers or os.cpu_count() or 1
+    summary_file = summary_file or os.path.join(output_folder, SUMMARY_FILE_NAME)
+
+    video_files = collect_inputs(source)
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"Processing {len(video_files)} video(s) with {workers} worker(s)...")
+
+    start_time = time.time()
+    results = []
+
+    # Workers live for the whole batch, so each one loads the model once and reuses it for every job
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=worker_init_args(settings, model_cache_mb)) as pool:
+        # Submit every video, the pool hands them out to free workers
+        futures = {
+            pool.submit(_process_one, video_file, output_file, settings.to_dict()): video_file
+            for video_file, output_file in zip(video_files, output_paths_for(video_files, output_folder))
+        }
+
+        for future in as_completed(futures):
+            video_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # A worker that crashed outright (e.g. killed) still gets a summary entry
+                result = {"input": video_file, "output": None, "success": False, "error": str(e)}
+
+            status = "OK" if result["success"] else f"FAILED ({result.get('error', 'unknown error')})"
+            print(f"{os.path.basename(video_file)}: {status}")
+            results.append(result)
+
+    # Keep the summary in the same order as the inputs
+    order = {video_file: index for index, video_file in enumerate(video_files)}
+    results.sort(key=lambda result: order.get(result["input"], len(order)))
+
+    summary = {
+        "source": source,
+        "output_folder": output_folder,
+        "workers": workers,
+        "settings": settings.to_dict(),
+        "total": len(results),
+        "succeeded": sum(1 for result in results if result["success"]),
+        "failed": sum(1 for result in results if not result["success"]),
+        "elapsed": time.time() - start_time,
+        "results": results,
+    }
+
+    with open(summary_file, "w", encoding="utf-8") as summary_output:
+        json.dump(summary, summary_output, indent=2)
+
+    print(f"Batch finished: {summary['succeeded']} succeeded, {summary['failed']} failed "
+          f"in {summary['elapsed']:.2f} seconds. Summary written to {summary_file}")
+    return summary
@@ -0,0 +1,235 @@
+"""
+    Benchmark suite.
+
+    Generates synthetic test videos with ffmpeg (SMPTE colour bars with a
+    warbling tone that stops for a planted silence at a fixed interval), runs
+    the engine on each of them and records how long every stage took
+    (taken from the engine's run report). Results are written as JSON and
+    can be compared against a stored baseline to flag regressions.
+
+    Everything runs offline on the CPU: Whisper is only benchmarked with
+    --transcribe, which needs the model to be downloaded already.
+
+    Usage:
+        python benchmark.py                              # Quick set of fixtures
+        python benchmark.py --full -o results.json       # Longer videos too
+        python benchmark.py --save-baseline baseline.json
+        python benchmark.py --baseline baseline.json     # Exit code 1 on regressions
+
+    Baselines are only comparable on the same machine.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+
+import ffmpeg_tools
+from engine import EngineSettings, FillerRemovalEngine, RENDER_MODES
+
+
+# Size and frame rate of the generated videos
+FIXTURE_SIZE = (640, 360)
+FIXTURE_FPS = 25
+
+# Fixture lengths (s)
+QUICK_DURATIONS = (30, 120)
+FULL_DURATIONS = (30, 120, 600)
+
+# Cut densities: (seconds between planted silences, length of each silence)
+DENSITIES = {
+    "sparse": (10.0, 1.0),
+    "dense": (2.5, 0.8),
+}
+
+# A stage only counts as regressed when it got this much slower relative to the baseline...
+DEFAULT_TOLERANCE = 0.25
+
+# ... and by at least this many seconds (timings below this are mostly noise)
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def fixture_name(duration, density):
+    return f"bars_{duration}s_{density}"
+
+
+def make_fixture(video_file, duration, period, silence_seconds):
+    """ Colour bars with a tone that is silent for the last silence_seconds of every period """
+    # A 220 Hz tone with a 3 Hz "syllable" modulation, gated off at the end of every period
+    tone = f"0.5*sin(2*PI*220*t)*(0.6+0.4*sin(2*PI*3*t))*lt(mod(t\\,{period})\\,{period - silence_seconds})"
+    width, height = FIXTURE_SIZE
+    ffmpeg_tools.run_ffmpeg([
+        "-f", "lavfi", "-i", f"smptebars=size={width}x{height}:rate={FIXTURE_FPS}:duration={duration}",
+        "-f", "lavfi", "-i", f"aevalsrc={tone}:sample_rate=44100:duration={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(2 * FIXTURE_FPS), "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", video_file,
+    ])
+
+
+def planted_silences(duration, period, silence_seconds, min_silence_len):
+    """ The silences in a fixture long enough to be cut """
+    silences = []
+    start = period - silence_seconds
+    while start < duration:
+        end = min(duration, start + silence_seconds)
+        if (end - start) * 1000 >= min_silence_len:
+            silences.append((start, end))
+        start += period
+    return silences
+
+
+def ensure_fixtures(fixtures_dir, durations):
+    """ Generate any missing fixture and return [(name, path, duration, period, silence_seconds)] """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    fixtures = []
+    for duration in durations:
+        for density, (period, silence_seconds) in DENSITIES.items():
+            name = fixture_name(duration, density)
+            path = os.path.join(fixtures_dir, f"{name}.mp4")
+            if not os.path.exists(path):
+                print(f"Generating {name}...")
+                make_fixture(path, duration, period, silence_seconds)
+            fixtures.append((name, path, duration, period, silence_seconds))
+    return fixtures
+
+
+def _quiet_progress(status, percent):
+    pass
+
+
+def benchmark_fixture(video_file, duration, period, silence_seconds, render_modes, repeat, work_dir,
+                      transcribe=False, model_name="base", verbose=False):
+    """ Run the engine on one fixture and return the fastest time of every stage """
+    stage_times = {}
+    checks = {}
+    for render_mode in render_modes:
+        settings = EngineSettings(
+            render_mode=render_mode,
+            model_name=model_name,
+            filler_words=("um",) if transcribe else (), # No filler words skips Whisper
+            transcript_cache_mb=0, # Always measure the real transcription
+        )
+        for _ in range(repeat):
+            output_file = os.path.join(work_dir, f"benchmark_{render_mode}.mp4")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                result = FillerRemovalEngine(settings).process(video_file, output_file, _quiet_progress)
+            if not result["success"]:
+                raise RuntimeError(f"{render_mode} run failed: {result.get('error')}\n{output.getvalue()}")
+
+            # The mode that really rendered: smart render falls back to moviepy for inputs it cannot stream copy,
+            # those timings are kept apart so they are never taken for smart render numbers
+            rendered_mode = result["render"]["mode"]
+            render_name = f"render_{render_mode}" if rendered_mode == render_mode else f"render_{render_mode}_fallback_{rendered_mode}"
+            for stage in result["report"]["stages"]:
+                # Stages shared by every render mode are timed on every run, the render itself per mode
+                name = render_name if stage["stage"] == "render" else stage["stage"]
+                stage_times[name] = min(stage_times.get(name, float("inf")), stage["wall_time"])
+            checks = {"cut_count": result["cut_count"], "output_duration": result["output_duration"]}
+
+    planted = planted_silences(duration, period, silence_seconds, EngineSettings().min_silence_len)
+    return {
+        "duration": duration,
+        "period": period,
+        "silence_seconds": silence_seconds,
+        "planted_silences": len(planted),
+        "cut_count": checks.get("cut_count"),
+        "output_duration": checks.get("output_duration"),
+        "stages": stage_times,
+        "realtime_factor": {name: seconds / duration for name, seconds in stage_times.items()},
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, min_seconds=MIN_REGRESSION_SECONDS):
+    """ Stages that got slower than the baseline, as a list of dictionaries """
+    regressions = []
+    for name, result in results["results"].items():
+        base_stages = baseline.get("results", {}).get(name, {}).get("stages", {})
+        for stage, seconds in result["stages"].items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            if seconds > base * (1 + tolerance) and seconds - base >= min_seconds:
+                regressions.append({"fixture": name, "stage": stage, "baseline": base, "current": seconds,
+                                    "ratio": seconds / base if base > 0 else None})
+    return regressions
+
+
+def machine_info():
+    """ Description of the machine and tools, stored with the results """
+    try:
+        ffmpeg_version = ffmpeg_tools.run_ffmpeg(["-version"], capture_output=True).decode().splitlines()[0]
+    except (RuntimeError, OSError):
+        ffmpeg_version = None
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg_version,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the filler remover on generated test videos")
+    parser.add_argument("--full", action="store_true", help="Include the long fixtures (%s s)" % ", ".join(map(str, FULL_DURATIONS)))
+    parser.add_argument("--durations", type=int, nargs="+", default=None, help="Fixture lengths in seconds (overrides --full)")
+    parser.add_argument("--render-modes", nargs="+", choices=RENDER_MODES, default=list(RENDER_MODES),
+                        help="Render modes to time (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per fixture and mode, the fastest counts (default: %(default)s)")
+    parser.add_argument("--transcribe", action="store_true", help="Time Whisper too (the model must already be downloaded)")
+    parser.add_argument("--model", default="base", help="Whisper model used with --transcribe (default: %(default)s)")
+    parser.add_argument("--fixtures-dir", default=os.path.join("benchmark_data", "fixtures"),
+                        help="Where the generated videos are kept between runs (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=os.path.join("benchmark_data", "results.json"),
+                        help="Results file (default: %(default)s)")
+    parser.add_argument("--baseline", default=None, help="Compare against this results file and exit with 1 on regressions")
+    parser.add_argument("--save-baseline", default=None, help="Also save the results as a baseline to this file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown relative to the baseline (default: %(default)s)")
+    parser.add_argument("--verbose", action="store_true", help="Show the engine's own output")
+    args = parser.parse_args(argv)
+
+    durations = args.durations or (FULL_DURATIONS if args.full else QUICK_DURATIONS)
+    fixtures = ensure_fixtures(args.fixtures_dir, durations)
+    work_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {"machine": machine_info(), "results": {}}
+    for name, path, duration, period, silence_seconds in fixtures:
+        print(f"Benchmarking {name}...")
+        result = benchmark_fixture(path, duration, period, silence_seconds, args.render_modes, args.repeat,
+                                   work_dir, args.transcribe, args.model, args.verbose)
+        results["results"][name] = result
+        timings = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result["stages"].items())
+        print(f"    {timings}")
+        if result["cut_count"] != result["planted_silences"]:
+            print(f"    Warning: {result['cut_count']} cuts found for {result['planted_silences']} planted silences")
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['fixture']} {regression['stage']}: "
+                  f"{regression['baseline']:.2f}s -> {regression['current']:.2f}s")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
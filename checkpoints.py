@@ -0,0 +1,93 @@
+"""
+    Checkpointed pipeline stages.
+
+    Every stage of the analysis saves what it produced (the decoded audio
+    and its loudness envelope, the silent intervals, the transcript and the
+    cut plan) to a per-job work directory, together with a fingerprint of
+    everything the stage depends on: the input file and the settings that
+    affect it, and the fingerprints of the stages before it. When a job is
+    run again, after a failed render or with changed settings, a stage whose
+    fingerprint still matches is loaded instead of run, so only the stages
+    whose inputs changed are repeated.
+
+    An artifact is a JSON file (the fingerprint and small values) plus
+    optional .npy files for arrays. The JSON file is written last, and every
+    file is written to a temporary name and then renamed, so a crash never
+    leaves an artifact that looks complete but is not.
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+
+# Bump when the layout of the artifacts changes, old work directories are then ignored
+ARTIFACT_VERSION = 1
+
+
+def fingerprint(*parts):
+    """ Short hash of JSON-serializable values """
+    text = json.dumps([ARTIFACT_VERSION, parts], sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def source_key(media_file):
+    """ Identity of an input file: path, size and modification time """
+    stat = os.stat(media_file)
+    return [os.path.abspath(media_file), stat.st_size, stat.st_mtime_ns]
+
+
+def work_dir_for(checkpoint_dir, media_file):
+    """ Work directory of one input inside checkpoint_dir, named after the file and a hash of its path """
+    name = os.path.splitext(os.path.basename(media_file))[0]
+    path_hash = hashlib.blake2b(os.path.abspath(media_file).encode(), digest_size=4).hexdigest()
+    return os.path.join(checkpoint_dir, f"{name}_{path_hash}")
+
+
+class CheckpointStore():
+    """ The stage artifacts of one job """
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        os.makedirs(work_dir, exist_ok=True)
+
+    def _path(self, name, suffix):
+        return os.path.join(self.work_dir, f"{name}{suffix}")
+
+    def load(self, name, key):
+        """ The artifact saved under name as a dictionary (arrays included), or None when
+        there is none or it was made from different inputs """
+        try:
+            with open(self._path(name, ".json"), "r", encoding="utf-8") as artifact_file:
+                artifact = json.load(artifact_file)
+        except (OSError, ValueError):
+            return None
+        if artifact.get("fingerprint") != key:
+            return None
+
+        data = artifact["data"]
+        try:
+            for array_name in artifact.get("arrays", []):
+                # Memory-mapped, large arrays (the decoded audio) are only read where they are used
+                data[array_name] = np.load(self._path(f"{name}_{array_name}", ".npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return data
+
+    def save(self, name, key, data, arrays=None):
+        """ Save an artifact: data must be JSON-serializable, arrays is a dictionary of NumPy arrays """
+        arrays = arrays or {}
+        path = self._path(name, ".json")
+        if os.path.exists(path):
+            os.remove(path) # The old artifact stops counting before its arrays get overwritten
+        for array_name, array in arrays.items():
+            array_path = self._path(f"{name}_{array_name}", ".npy")
+            with open(array_path + ".tmp", "wb") as array_file:
+                np.save(array_file, np.asarray(array))
+            os.replace(array_path + ".tmp", array_path)
+
+        with open(path + ".tmp", "w", encoding="utf-8") as artifact_file:
+            json.dump({"fingerprint": key, "data": data, "arrays": list(arrays)}, artifact_file, default=float)
+        os.replace(path + ".tmp", path)
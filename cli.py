@@ -0,0 +1,247 @@
+"""
+    Command line interface for the Video Filler Remover.
+
+    Usage:
+        python cli.py batch <folder or manifest> [options]
+        python VideoFillerRemover.py batch <folder or manifest> [options]
+
+    Running VideoFillerRemover.py without arguments still opens the GUI.
+"""
+
+import sys
+import argparse
+
+import asr_backends
+import model_cache
+from encoder_profiles import PROFILES, AUTO_PROFILE, CALIBRATION_SECONDS, DEFAULT_TARGET_RTF
+from engine import EngineSettings, RENDER_MODES, FILLER_DETECTION_MODES
+from run_report import STAGES, PROFILE_MODES
+
+
+def add_settings_arguments(parser):
+    """ Add the cut tuning options (the GUI sliders) to a parser """
+    defaults = EngineSettings()
+    parser.add_argument("--threshold", type=float, default=defaults.quiet_threshold,
+                        help="Sound quietness threshold in dBFs (default: %(default)s)")
+    parser.add_argument("--padding", type=float, default=defaults.cut_padding,
+                        help="Cut padding time in seconds (default: %(default)s)")
+    parser.add_argument("--min-silence", type=float, default=defaults.min_silence_len,
+                        help="Minimum silence length in ms (default: %(default)s)")
+    parser.add_argument("--min-keep", type=float, default=defaults.min_keep_len,
+                        help="Kept pieces shorter than this many seconds are cut too (default: %(default)s)")
+    parser.add_argument("--model", default=defaults.model_name,
+                        help="Whisper model name (default: %(default)s)")
+    parser.add_argument("--device", default=defaults.device,
+                        help="Device to run Whisper on, e.g. cpu or cuda (default: automatic)")
+    parser.add_argument("--asr-backend", choices=list(asr_backends.BACKENDS), default=defaults.asr_backend,
+                        help="Speech recognition backend: whisper runs the model as it is, whisper-int8 runs it with int8 "
+                             "quantized linear layers on the CPU, faster on hosts without a GPU (default: %(default)s)")
+    parser.add_argument("--filler-detection", choices=FILLER_DETECTION_MODES, default=defaults.filler_detection,
+                        help="whisper transcribes the voiced audio, acoustic cuts held voiced sounds with a flat pitch "
+                             "(um, uh) found without Whisper, many times faster, confirm only has Whisper listen to the "
+                             "audio around those candidates (default: %(default)s)")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default=defaults.render_mode,
+                        help="How the output is written: moviepy re-encodes every frame, smart stream copies "
+                             "between keyframes and only re-encodes around the cuts, sequential decodes the source "
+                             "once and streams the kept frames into one encoder, parallel encodes groups of kept "
+                             "frames in worker processes and joins them without re-encoding (default: %(default)s)")
+    parser.add_argument("--encoder-profile", choices=list(PROFILES) + [AUTO_PROFILE], default=defaults.encoder_profile,
+                        help="Encoder preset, CRF, threads and audio settings of the output: %s, or auto for the profile "
+                             "picked by the calibrate command (default: the render mode's own settings)"
+                             % ", ".join(f"{name} ({profile.preset}, CRF {profile.crf})" for name, profile in PROFILES.items()))
+    parser.add_argument("--render-workers", type=int, default=defaults.render_workers,
+                        help="Encoder processes for --render-mode parallel (default: one per CPU core)")
+    parser.add_argument("--analyze-only", action="store_true",
+                        help="Skip rendering and export the cut list instead (JSON with transcript and filler words, "
+                             "CMX3600 EDL, ffmpeg filter script and concat list, named after the output)")
+    parser.add_argument("--full-transcription", action="store_true",
+                        help="Send the whole audio to Whisper instead of only the voiced regions")
+    parser.add_argument("--streaming", dest="streaming", action="store_const", const=True, default=defaults.streaming,
+                        help="Analyse the audio in fixed-size blocks to keep memory flat on multi-hour recordings "
+                             "(decodes the audio twice). Default: only for recordings of an hour or more")
+    parser.add_argument("--no-streaming", dest="streaming", action="store_const", const=False,
+                        help="Always decode the whole audio into memory")
+    parser.add_argument("--two-pass", action="store_true",
+                        help="Transcribe the text first and only align the words of the segments that hold a filler word")
+    parser.add_argument("--transcribe-workers", type=int, default=defaults.transcribe_workers,
+                        help="Transcribe long recordings in chunks across this many worker processes (default: %(default)s)")
+    parser.add_argument("--torch-threads", type=int, default=defaults.torch_threads,
+                        help="Torch threads per transcription worker (default: torch's own default)")
+    parser.add_argument("--cache-dir", default=defaults.cache_dir,
+                        help="Folder for cached transcripts (default: per-user cache folder)")
+    parser.add_argument("--transcript-cache-mb", type=float, default=defaults.transcript_cache_mb,
+                        help="Size cap of the transcript cache in MB, 0 disables it (default: %(default)s)")
+    parser.add_argument("--filler-words", nargs="*", default=list(defaults.filler_words),
+                        help="Words to cut out, none at all only cuts silences and skips Whisper (default: %(default)s)")
+    parser.add_argument("--checkpoint-dir", default=defaults.checkpoint_dir,
+                        help="Save the result of every stage (audio, silences, transcript, cut plan) to a work folder per "
+                             "video here, running a video again only repeats the stages whose settings changed")
+    parser.add_argument("--report-dir", default=defaults.report_dir,
+                        help="Save a JSON report with the time and memory of every stage of each run to this folder")
+    parser.add_argument("--profile-stage", choices=STAGES, default=defaults.profile_stage,
+                        help="Profile one stage, the profile is saved next to the report")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default=defaults.profile_mode,
+                        help="cprofile (CPU time per function) or tracemalloc (allocations) (default: %(default)s)")
+
+
+def settings_from_args(args):
+    """ Build EngineSettings from parsed command line arguments """
+    return EngineSettings(
+        quiet_threshold=args.threshold,
+        cut_padding=args.padding,
+        min_silence_len=args.min_silence,
+        min_keep_len=args.min_keep,
+        model_name=args.model,
+        device=args.device,
+        asr_backend=args.asr_backend,
+        filler_words=tuple(word.lower() for word in args.filler_words),
+        filler_detection=args.filler_detection,
+        render_mode=args.render_mode,
+        render_workers=args.render_workers,
+        encoder_profile=args.encoder_profile,
+        analyze_only=args.analyze_only,
+        voiced_only=not args.full_transcription,
+        two_pass=args.two_pass,
+        streaming=args.streaming,
+        transcribe_workers=args.transcribe_workers,
+        torch_threads=args.torch_threads,
+        cache_dir=args.cache_dir,
+        transcript_cache_mb=args.transcript_cache_mb,
+        report_dir=args.report_dir,
+        profile_stage=args.profile_stage,
+        profile_mode=args.profile_mode,
+        checkpoint_dir=args.checkpoint_dir,
+    )
+
+
+def run_batch_command(args):
+    """ Handle 'batch': process a folder or manifest of videos """
+    from batch import run_batch
+    summary = run_batch(
+        args.source,
+        args.output,
+        settings=settings_from_args(args),
+        workers=args.workers,
+        summary_file=args.summary,
+        model_cache_mb=args.model_cache_mb,
+    )
+    # Non-zero exit status when any file failed so scripts can notice
+    return 0 if summary["failed"] == 0 else 1
+
+
+def run_watch_command(args):
+    """ Handle 'watch': process the videos that appear in a folder until interrupted """
+    from watch import run_daemon
+    counts = run_daemon(
+        args.folder,
+        args.output,
+        settings=settings_from_args(args),
+        workers=args.workers,
+        db_file=args.db,
+        poll_seconds=args.poll,
+        settle_seconds=args.settle,
+        model_cache_mb=args.model_cache_mb,
+        once=args.once,
+    )
+    return 0 if counts["failed"] == 0 else 1
+
+
+def run_jobs_command(args):
+    """ Handle 'jobs': list the jobs recorded in a job database """
+    from job_queue import JobQueue
+    queue = JobQueue(args.db)
+    try:
+        for job in queue.jobs(args.status):
+            elapsed = f"{job['elapsed']:.1f}s" if job["elapsed"] is not None else "-"
+            error = f"  {job['error']}" if job["error"] else ""
+            print(f"{job['id']:>5}  {job['status']:<8} {elapsed:>9}  {job['input']}{error}")
+        print(", ".join(f"{count} {status}" for status, count in queue.counts().items()))
+    finally:
+        queue.close()
+    return 0
+
+
+def run_calibrate_command(args):
+    """ Handle 'calibrate': time every encoder profile on a sample and pick the one for 'auto' """
+    from encoder_profiles import calibrate
+    calibration = calibrate(args.sample, args.target_rtf, args.seconds, save_to=args.output)
+    for measurement in calibration["measurements"]:
+        print(f"{measurement['profile']:<10} {measurement['fps']:>8.1f} fps  RTF {measurement['realtime_factor']:.3f}  "
+              f"{measurement['megabits_per_second']:.2f} Mbit/s")
+    if calibration["meets_target"]:
+        print(f"Picked the {calibration['profile']} profile, the best quality one within RTF {args.target_rtf:g}.")
+    else:
+        print(f"No profile encodes within RTF {args.target_rtf:g} here, picked the fastest one ({calibration['profile']}).")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="videofillerremover",
+        description="Remove silences and filler words from videos without the GUI.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # batch: many videos across a process pool
+    batch_parser = subparsers.add_parser("batch", help="Process a folder or manifest of videos")
+    batch_parser.add_argument("source", help="Folder of videos, or a manifest (.txt with one path per line, or .json list)")
+    batch_parser.add_argument("-o", "--output", default="output",
+                              help="Folder to write the trimmed videos to (default: %(default)s)")
+    batch_parser.add_argument("-j", "--workers", type=int, default=None,
+                              help="Number of worker processes (default: number of CPUs)")
+    batch_parser.add_argument("--summary", default=None,
+                              help="Where to write the JSON result summary (default: <output>/batch_summary.json)")
+    batch_parser.add_argument("--model-cache-mb", type=float, default=model_cache.DEFAULT_MEMORY_BUDGET_MB,
+                              help="Memory budget for cached Whisper models per worker in MB (default: %(default)s)")
+    add_settings_arguments(batch_parser)
+    batch_parser.set_defaults(handler=run_batch_command)
+
+    # watch: a daemon processing every video that appears in a folder
+    from job_queue import STATUSES
+    from watch import POLL_SECONDS, SETTLE_SECONDS
+    watch_parser = subparsers.add_parser("watch", help="Keep processing the videos that appear in a folder")
+    watch_parser.add_argument("folder", help="Folder to watch for new videos")
+    watch_parser.add_argument("-o", "--output", default="output",
+                              help="Folder to write the trimmed videos to (default: %(default)s)")
+    watch_parser.add_argument("-j", "--workers", type=int, default=None,
+                              help="Number of videos processed at once (default: number of CPUs)")
+    watch_parser.add_argument("--db", default=None,
+                              help="Job database, reopening it resumes its unfinished jobs (default: <output>/jobs.sqlite3)")
+    watch_parser.add_argument("--poll", type=float, default=POLL_SECONDS,
+                              help="Seconds between scans of the folder (default: %(default)s)")
+    watch_parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                              help="Only queue files left unmodified for this many seconds (default: %(default)s)")
+    watch_parser.add_argument("--once", action="store_true",
+                              help="Process what is in the folder (and any unfinished jobs), then exit")
+    watch_parser.add_argument("--model-cache-mb", type=float, default=model_cache.DEFAULT_MEMORY_BUDGET_MB,
+                              help="Memory budget for cached Whisper models per worker in MB (default: %(default)s)")
+    add_settings_arguments(watch_parser)
+    watch_parser.set_defaults(handler=run_watch_command)
+
+    # calibrate: pick the encoder profile for this machine
+    calibrate_parser = subparsers.add_parser("calibrate", help="Time the encoder profiles on a sample video and pick one")
+    calibrate_parser.add_argument("sample", help="Video like the ones you process (same resolution and frame rate)")
+    calibrate_parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                                  help="Largest encoding time per second of video (default: %(default)s, as fast as it plays)")
+    calibrate_parser.add_argument("--seconds", type=float, default=CALIBRATION_SECONDS,
+                                  help="Seconds of the sample encoded with each profile (default: %(default)s)")
+    calibrate_parser.add_argument("-o", "--output", default=None,
+                                  help="Where to save the calibration (default: the per-user cache folder, used by --encoder-profile auto)")
+    calibrate_parser.set_defaults(handler=run_calibrate_command)
+
+    # jobs: what the watch daemon did
+    jobs_parser = subparsers.add_parser("jobs", help="List the jobs of a watch folder's job database")
+    jobs_parser.add_argument("db", help="Job database (e.g. output/jobs.sqlite3)")
+    jobs_parser.add_argument("--status", choices=STATUSES, default=None, help="Only list jobs in this state")
+    jobs_parser.set_defaults(handler=run_jobs_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
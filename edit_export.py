@@ -0,0 +1,116 @@
+"""
+    Cut list exports for editing software.
+
+    Instead of rendering, the planned cuts can be written out for an editor
+    to apply in their NLE:
+        <name>.json         Kept and cut ranges, filler word hits and the transcript
+        <name>.edl          CMX3600 edit decision list of the kept ranges
+        <name>_filter.txt   ffmpeg filter script (use with -filter_complex_script)
+        <name>_concat.txt   ffmpeg concat demuxer list with in and out points
+"""
+
+import os
+import json
+
+
+# Timecode base of the EDL of an audio-only input
+AUDIO_ONLY_FPS = 30
+
+
+def frame_timecode(frames, fps):
+    """ Non-drop-frame HH:MM:SS:FF timecode of a frame count (fractional rates like 29.97 use a 30 frame base) """
+    base = int(round(fps))
+    hours, frames = divmod(frames, 3600 * base)
+    minutes, frames = divmod(frames, 60 * base)
+    secs, frames = divmod(frames, base)
+    return f"{hours:02}:{minutes:02}:{secs:02}:{frames:02}"
+
+
+def edl_text(keep_ranges, fps, title, clip_name, reel="AX", tracks="AA/V"):
+    """ CMX3600 EDL placing the kept ranges one after the other on the record timeline.
+
+    Every range is rounded to whole frames once and the record timeline adds up
+    those frame counts, so each event is exactly as long on the source and record
+    side and the events never drift apart. Ranges shorter than half a frame are left out.
+    """
+    lines = [f"TITLE: {title}", "FCM: NON-DROP FRAME", ""]
+    record = 0 # Frames
+    number = 0
+    for start, end in keep_ranges:
+        first, last = int(round(start * fps)), int(round(end * fps))
+        if last <= first:
+            continue
+        number += 1
+        record_end = record + (last - first)
+        lines.append(f"{number:03}  {reel:<8} {tracks:<5} C        "
+                     f"{frame_timecode(first, fps)} {frame_timecode(last, fps)} "
+                     f"{frame_timecode(record, fps)} {frame_timecode(record_end, fps)}")
+        lines.append(f"* FROM CLIP NAME: {clip_name}")
+        lines.append("")
+        record = record_end
+    return "\n".join(lines)
+
+
+def filter_script(keep_ranges, has_audio=True, has_video=True):
+    """ ffmpeg filtergraph that trims the kept ranges out of input 0 and joins them into [v] and [a] """
+    parts = []
+    labels = []
+    for index, (start, end) in enumerate(keep_ranges):
+        if has_video:
+            parts.append(f"[0:v]trim=start={start:.6f}:end={end:.6f},setpts=PTS-STARTPTS[v{index}]")
+            labels.append(f"[v{index}]")
+        if has_audio:
+            parts.append(f"[0:a]atrim=start={start:.6f}:end={end:.6f},asetpts=PTS-STARTPTS[a{index}]")
+            labels.append(f"[a{index}]")
+    outputs = ("[v]" if has_video else "") + ("[a]" if has_audio else "")
+    parts.append(f"{''.join(labels)}concat=n={len(keep_ranges)}:v={1 if has_video else 0}:a={1 if has_audio else 0}{outputs}")
+    return ";\n".join(parts) + "\n"
+
+
+def concat_list(keep_ranges, video_file):
+    """ ffconcat list playing the kept ranges of video_file in order """
+    lines = ["ffconcat version 1.0",
+             "# ffmpeg -f concat -safe 0 -i this_file.txt -c:v libx264 -c:a aac output.mp4"]
+    path = os.path.abspath(video_file).replace("'", "'\\''")
+    for start, end in keep_ranges:
+        lines += [f"file '{path}'", f"inpoint {start:.6f}", f"outpoint {end:.6f}"]
+    return "\n".join(lines) + "\n"
+
+
+def export_cut_list(output_base, video_file, cut_plan, analysis, fps, filler_words, has_audio=True, has_video=True):
+    """ Write every export next to output_base (a path without extension) and return the files written """
+    name = os.path.basename(output_base)
+    keep_ranges = cut_plan.keep_ranges()
+    folder = os.path.dirname(os.path.abspath(output_base))
+    os.makedirs(folder, exist_ok=True)
+
+    files = {
+        "json": f"{output_base}.json",
+        "edl": f"{output_base}.edl",
+        "filter_script": f"{output_base}_filter.txt",
+        "concat_list": f"{output_base}_concat.txt",
+    }
+
+    summary = {
+        "input": video_file,
+        "duration": cut_plan.input_duration,
+        "output_duration": cut_plan.output_duration,
+        "fps": fps,
+        "keep_ranges": keep_ranges,
+        "cut_ranges": [(float(start), float(end)) for start, end in cut_plan.cuts],
+        "filler_hits": [{"word": word, "start": start, "end": end}
+                        for word, start, end in analysis.filler_hits(filler_words)],
+        "transcript": analysis.transcription,
+        "ffmpeg_command": f'ffmpeg -i "{video_file}" -filter_complex_script "{files["filter_script"]}" '
+                          + " ".join(['-map "[v]"'] * has_video + ['-map "[a]"'] * has_audio)
+                          + f' "{output_base}{".mp4" if has_video else os.path.splitext(video_file)[1]}"',
+    }
+    with open(files["json"], "w", encoding="utf-8") as output:
+        json.dump(summary, output, indent=2, default=float)
+    with open(files["edl"], "w", encoding="utf-8") as output:
+        output.write(edl_text(keep_ranges, fps, name, os.path.basename(video_file), tracks="AA/V" if has_video else "AA"))
+    with open(files["filter_script"], "w", encoding="utf-8") as output:
+        output.write(filter_script(keep_ranges, has_audio, has_video))
+    with open(files["concat_list"], "w", encoding="utf-8") as output:
+        output.write(concat_list(keep_ranges, video_file))
+    return files
@@ -0,0 +1,171 @@
+"""
+    Named encoder profiles and their calibration.
+
+    A profile fixes every encoder setting that trades speed for size or
+    quality: the x264 preset, the CRF, the encoder thread count and the
+    audio codec and bitrate. The moviepy, sequential and parallel render
+    modes encode with the chosen profile. Without one they keep their own
+    defaults. Smart render is not affected: its re-encoded pieces have to
+    match the stream copied around them.
+
+    Which profile is fast enough depends on the machine, so calibrate()
+    encodes a short piece of a local sample with every profile, measures
+    the frames per second, the real-time factor (seconds of encoding per
+    second of video) and the output size, and picks the best quality
+    profile whose real-time factor meets the target. The choice is saved
+    and used by the "auto" profile.
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from dataclasses import dataclass, asdict
+
+import ffmpeg_tools
+from transcript_cache import default_cache_dir
+
+
+@dataclass
+class EncoderProfile:
+    """ Encoder settings used when rendering the output """
+    name: str
+    preset: str # x264 preset, slower presets give smaller files at the same quality
+    crf: int # Constant rate factor, lower is better quality and larger files
+    threads: int = 0 # Encoder threads of the whole render (shared by the processes of the parallel mode),
+                     # 0 lets the encoder (or the render mode) decide
+    audio_codec: str = "aac"
+    audio_bitrate: str = "160k"
+    video_codec: str = "libx264"
+
+    def video_args(self):
+        """ ffmpeg output options of the video stream (the thread count is left to the caller) """
+        return ["-c:v", self.video_codec, "-preset", self.preset, "-crf", str(self.crf)]
+
+    def audio_args(self):
+        """ ffmpeg output options of the audio stream """
+        return ["-c:a", self.audio_codec, "-b:a", self.audio_bitrate]
+
+    def moviepy_options(self):
+        """ Keyword arguments of moviepy's write_videofile() """
+        return {
+            "codec": self.video_codec,
+            "preset": self.preset,
+            "threads": self.threads or None,
+            "audio_codec": self.audio_codec,
+            "audio_bitrate": self.audio_bitrate,
+            "ffmpeg_params": ["-crf", str(self.crf)],
+        }
+
+
+def cpu_threads(per_core):
+    """ Encoder threads for per_core threads on every CPU core of this machine (at least 1) """
+    return max(1, int(round((os.cpu_count() or 1) * per_core)))
+
+
+# Built-in profiles, from the best quality to the fastest. x264 starts 1.5 threads per core on its own;
+# every extra frame thread costs a little compression, so the quality profile stays at one per core
+PROFILES = {profile.name: profile for profile in (
+    EncoderProfile("quality", preset="slow", crf=18, threads=cpu_threads(1.0), audio_bitrate="192k"),
+    EncoderProfile("balanced", preset="medium", crf=23, threads=cpu_threads(1.5)),
+    EncoderProfile("fast", preset="veryfast", crf=23, threads=cpu_threads(1.5), audio_bitrate="128k"),
+    EncoderProfile("draft", preset="ultrafast", crf=28, threads=cpu_threads(1.5), audio_bitrate="96k"),
+)}
+
+# Profile name that stands for the result of the last calibration
+AUTO_PROFILE = "auto"
+
+# Seconds of the sample encoded with every profile
+CALIBRATION_SECONDS = 20.0
+
+# Largest real-time factor a profile may have by default (1.0 encodes as fast as the video plays)
+DEFAULT_TARGET_RTF = 1.0
+
+
+def calibration_file():
+    """ Where the last calibration is saved """
+    return os.path.join(default_cache_dir(), "encoder_calibration.json")
+
+
+def get_profile(name):
+    """ The profile with this name, the calibrated one for "auto", or None for no name (render mode defaults) """
+    if name is None:
+        return None
+    if name == AUTO_PROFILE:
+        try:
+            with open(calibration_file(), "r", encoding="utf-8") as calibration:
+                name = json.load(calibration)["profile"]
+        except (OSError, ValueError, KeyError):
+            print("No encoder calibration found (run 'calibrate' first), using the balanced profile.")
+            name = "balanced"
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encoder profile '{name}', choose from: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def measure_profile(profile, sample_file, output_file, seconds=CALIBRATION_SECONDS):
+    """ Encode the first seconds of sample_file with profile and measure it """
+    threads = ["-threads", str(profile.threads)] if profile.threads else []
+
+    start = time.perf_counter()
+    report = ffmpeg_tools.run_ffmpeg(
+        ["-i", sample_file, "-t", ffmpeg_tools.format_time(seconds), "-map", "0:v:0", "-map", "0:a:0?"]
+        + profile.video_args() + threads + ["-pix_fmt", "yuv420p"] + profile.audio_args()
+        + ["-progress", "pipe:1", "-nostats", output_file],
+        capture_output=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    # The last progress report of ffmpeg holds the frames and the length of the output
+    progress = dict(line.split("=", 1) for line in report.decode(errors="replace").splitlines() if "=" in line)
+    frames = int(progress.get("frame", 0))
+    duration = int(progress.get("out_time_us", progress.get("out_time_ms", 0))) / 1e6
+    return {
+        "profile": profile.name,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else None,
+        "realtime_factor": elapsed / duration if duration > 0 else None,
+        "size": os.path.getsize(output_file),
+        "megabits_per_second": os.path.getsize(output_file) * 8 / duration / 1e6 if duration > 0 else None,
+    }
+
+
+def calibrate(sample_file, target_rtf=DEFAULT_TARGET_RTF, seconds=CALIBRATION_SECONDS, profiles=None,
+              save_to=None):
+    """ Measure every profile on sample_file and pick the best quality one that encodes within target_rtf.
+
+    When none is fast enough the fastest one is picked. The result is saved to
+    save_to (calibration_file() by default) for the "auto" profile, and returned.
+    """
+    profiles = profiles or list(PROFILES.values())
+    work_dir = tempfile.mkdtemp(prefix="encoder_calibration_")
+    try:
+        measurements = []
+        for profile in profiles:
+            print(f"Encoding {seconds:g}s of the sample with the {profile.name} profile...")
+            measurements.append(measure_profile(profile, sample_file, os.path.join(work_dir, f"{profile.name}.mp4"), seconds))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # The profiles go from the best quality to the fastest, so the first fast enough one is the best choice
+    measured = [measurement for measurement in measurements if measurement["realtime_factor"] is not None]
+    if not measured:
+        raise RuntimeError(f"Nothing was encoded from {sample_file}, is it a video?")
+    meeting = [measurement for measurement in measured if measurement["realtime_factor"] <= target_rtf]
+    chosen = meeting[0] if meeting else min(measured, key=lambda measurement: measurement["realtime_factor"])
+
+    calibration = {
+        "sample": os.path.abspath(sample_file),
+        "target_rtf": target_rtf,
+        "cpu_count": os.cpu_count(),
+        "profile": chosen["profile"],
+        "meets_target": bool(meeting),
+        "profiles": {profile.name: asdict(profile) for profile in profiles},
+        "measurements": measurements,
+    }
+    save_to = save_to or calibration_file()
+    os.makedirs(os.path.dirname(os.path.abspath(save_to)), exist_ok=True)
+    with open(save_to, "w", encoding="utf-8") as output:
+        json.dump(calibration, output, indent=2)
+    return calibration
@@ -0,0 +1,631 @@
+"""
+    Headless filler removal engine.
+
+    Everything needed to strip silences and filler words out of a video lives
+    here so it can run without a display (batch jobs on servers, the command
+    line) as well as behind the Tkinter GUI in VideoFillerRemover.py.
+"""
+
+import os
+import sys
+import time
+import contextlib
+import traceback # Used to send the full error output to the log
+from dataclasses import dataclass, asdict
+from moviepy.editor import VideoFileClip # Tools for cutting and editing video files
+from moviepy.editor import concatenate_videoclips # Tools for cutting and editing video files
+import moviepy.config as mpc
+import asr_backends # Speech recognition backends
+import acoustic_fillers # Whisper-free filler candidates
+import audio # Decodes the soundtrack into memory
+import audio_render # Audio-only output for podcasts and voice memos
+import checkpoints # Stage artifacts reused when a job runs again
+import ffmpeg_tools # Probing the length of the input
+import intervals # Interval arrays of checkpointed cut plans
+import live_preview # Cut plans recomputed from a cached analysis
+import progress # Fractional stage progress
+import run_report # Per-stage timing and memory report
+import silence # Vectorized silence detection
+import streaming # Bounded-memory analysis of long recordings
+import smart_render # Keyframe-aware stream copy output
+import sequential_render # Single pass decode -> encode output
+import parallel_render # Groups of kept frames encoded in parallel
+import edit_export # Cut lists for editing software
+import encoder_profiles # Named encoder settings and their calibration
+import filler_lexicon # Filler words and phrases matched with a trie
+import thumbnails # Background preview frames of the cuts
+import transcribe # Voiced-region transcription
+import two_pass # Word alignment only where the text holds a filler
+from model_cache import get_model # Keeps loaded Whisper models around between jobs
+from transcript_cache import TranscriptCache, DEFAULT_CACHE_MB, audio_hash # Skips Whisper for audio it has seen before
+
+
+# Point to where you have extracted ffmpeg - make sure this is relative to the script's location
+if getattr(sys, 'frozen', False):
+    # If running from a packaged executable
+    script_dir = sys._MEIPASS
+else:
+    # If running from the script directly
+    script_dir = os.path.dirname(os.path.realpath(__file__))
+ffmpeg_path = os.path.join(script_dir, "ffmpeg-master-latest-win64-gpl", "bin", "ffmpeg.exe")
+
+# Only override ffmpeg when the bundled Windows binary is actually there, otherwise
+# moviepy keeps using the ffmpeg it finds on the PATH (e.g. on Linux servers)
+if os.path.exists(ffmpeg_path):
+    os.environ["FFMPEG_BINARY"] = ffmpeg_path
+
+    # Set FFMPEG path for moviepy
+    mpc.FFMPEG_BINARY = ffmpeg_path
+
+
+# Ways the final video can be written (see FillerRemovalEngine.render)
+RENDER_MODES = ("moviepy", "smart", "sequential", "parallel")
+
+# Ways filler words can be found (see FillerRemovalEngine.detect_fillers)
+FILLER_DETECTION_MODES = ("whisper", "acoustic", "confirm")
+
+# Recordings at least this long (s) are analysed in streaming mode unless EngineSettings.streaming says otherwise
+STREAMING_MIN_SECONDS = 3600
+
+
+@dataclass
+class EngineSettings:
+    """ All the knobs that control how a video gets cut """
+
+    quiet_threshold: float = -21.0 # Sound quietness threshold relative to the average loudness (dBFs)
+    cut_padding: float = -0.2 # Cut padding time (s), negative values keep a little more audio around each cut
+    min_silence_len: float = 650 # Minimum silence length (ms) before a silence is cut
+    min_keep_len: float = 0.0 # Kept pieces shorter than this (s) are cut as well, 0 keeps everything
+    model_name: str = "base" # Whisper model used to find filler words
+    asr_backend: str = asr_backends.DEFAULT_BACKEND # Speech recognition backend running the model (see asr_backends.py)
+    device: str = None # Device to run Whisper on, None picks "cuda" when available, else "cpu"
+    filler_words: tuple = ("um",) # Words that are cut out of the video
+    filler_detection: str = "whisper" # "whisper" transcribes the voiced audio, "acoustic" cuts held voiced sounds
+                                      # found without Whisper, "confirm" has Whisper check only the audio around those
+    render_mode: str = "moviepy" # "moviepy" re-encodes everything, "smart" stream copies between keyframes,
+                                 # "sequential" decodes once and streams the kept frames into one encoder,
+                                 # "parallel" encodes groups of kept frames in worker processes and joins them
+    render_workers: int = None # Worker processes of the "parallel" render mode, None uses one per CPU core
+    encoder_profile: str = None # Encoder settings (encoder_profiles.PROFILES, or "auto" for the calibrated one),
+                                # None keeps the render mode's own defaults
+    analyze_only: bool = False # Export the cut list (JSON, EDL, ffmpeg scripts) next to the output instead of rendering
+    voiced_only: bool = True # Only send the audio outside the detected silences to Whisper
+    two_pass: bool = False # Transcribe at segment level first and only align the words of the segments
+                           # whose text holds a filler word (not combined with transcribe_workers > 1)
+    streaming: bool = None # Analyse the audio in fixed-size blocks (bounded memory, decodes twice),
+                           # None streams recordings of STREAMING_MIN_SECONDS or longer
+    transcribe_workers: int = 1 # Worker processes for chunked parallel transcription, 1 transcribes in this process
+    torch_threads: int = None # Torch threads per transcription worker, None leaves torch's default
+    cache_dir: str = None # Where cached transcripts are kept, None uses the per-user cache folder
+    transcript_cache_mb: float = DEFAULT_CACHE_MB # Size cap of the transcript cache, 0 turns it off
+    report_dir: str = None # Folder the JSON run report is saved to, None only returns it in the result
+    profile_stage: str = None # Stage to profile ("load", "extract", "silence", "acoustic", "model_load", "transcription",
+                              # "cut_planning", "render" or "export"), the profile is saved next to the report
+    profile_mode: str = "cprofile" # "cprofile" for CPU time per function, "tracemalloc" for allocations
+    checkpoint_dir: str = None # Folder of per-input work directories where every stage saves its result, a job run
+                               # again (after a failed render or with other settings) only repeats the stages
+                               # whose inputs changed. None turns checkpoints off
+
+    def transcribes(self):
+        """ Whether a run can need the speech recognition model ("acoustic" detection or no filler words never do) """
+        return bool(self.filler_words) and self.filler_detection != "acoustic"
+
+    def to_dict(self):
+        """ Plain dictionary version of the settings (for logs and summaries) """
+        settings = asdict(self)
+        settings["filler_words"] = list(self.filler_words)
+        return settings
+
+    @classmethod
+    def from_dict(cls, values):
+        """ Build settings from a dictionary, ignoring keys we do not know about """
+        known = {key: value for key, value in values.items() if key in cls.__dataclass_fields__}
+        if "filler_words" in known:
+            known["filler_words"] = tuple(known["filler_words"])
+        return cls(**known)
+
+
+def _print_progress(status, percent):
+    """ Default progress callback used when running without a GUI """
+    print(f"[{percent:>3}%] {status}")
+
+
+class FillerRemovalEngine():
+    """ Removes silences and filler words from a video without any GUI """
+
+    def __init__(self, settings=None):
+        # Use the default slider values when no settings are given
+        self.settings = settings if settings is not None else EngineSettings()
+
+        # Report of the run in progress (see process()), stages are only measured while there is one
+        self.report = None
+
+    def _stage(self, name):
+        """ Context manager measuring a stage of the run for the report """
+        return self.report.stage(name) if self.report is not None else contextlib.nullcontext()
+
+    # Detect silence in the decoded audio
+    def detect_silences(self, envelope, average_dbfs):
+        return silence.detect_silences_from_envelope(
+            envelope,
+            average_dbfs,
+            min_silence_len=self.settings.min_silence_len,  # Require this many ms of silence
+            quiet_threshold=self.settings.quiet_threshold,  # Relative to the average loudness
+        )
+
+    def transcription_silences(self, envelope, average_dbfs, silent_intervals):
+        """ Silences left out of the transcription: the slider silences that the fixed transcription
+        pass (transcribe.TRANSCRIBE_QUIET_THRESHOLD) finds silent as well. Small slider moves then
+        transcribe the same regions, so the cached transcript is reused """
+        fixed = silence.detect_silences_from_envelope(envelope, average_dbfs, transcribe.TRANSCRIBE_MIN_SILENCE,
+                                                      transcribe.TRANSCRIBE_QUIET_THRESHOLD)
+        return intervals.to_list(intervals.intersection(fixed, silent_intervals))
+
+    def transcription_options(self):
+        """ Options passed to whisper's transcribe(), they are part of the transcript cache key """
+        return {"word_timestamps": True} # Filler words are cut using their word timings
+
+    def _cached_transcript(self, content_hash, options, regions, chunked=False):
+        """ (cache, key, transcript) for the audio with this content hash, the transcript is None on a miss
+        and the key is None when the cache is turned off """
+        cache = TranscriptCache(self.settings.cache_dir, self.settings.transcript_cache_mb)
+        if self.settings.transcript_cache_mb <= 0:
+            return cache, None, None
+
+        # The transcribed regions change the result, so they are part of the key
+        key_options = dict(options, regions=[[round(start, 3), round(end, 3)] for start, end in regions]) \
+            if regions is not None else dict(options)
+        if chunked:
+            key_options["chunk_seconds"] = transcribe.CHUNK_SECONDS # Chunked results differ slightly at the seams
+        elif self.settings.two_pass:
+            key_options["two_pass"] = sorted(self.settings.filler_words) # Only the segments with these have words
+        if self.settings.asr_backend != asr_backends.DEFAULT_BACKEND:
+            key_options["asr_backend"] = self.settings.asr_backend # A quantized model hears slightly differently
+        cache_key = cache.key(content_hash, self.settings.model_name, key_options)
+        transcription = cache.get(cache_key)
+        if transcription is not None:
+            print("Using cached transcript, skipping Whisper.")
+        return cache, cache_key, transcription
+
+    def transcribe(self, decoded_audio, silent_intervals=None, progress_callback=None, regions=None):
+        """ Whisper transcript of the decoded audio, taken from the transcript cache when possible.
+
+        With voiced_only set, only the audio outside silent_intervals is transcribed,
+        given regions are transcribed instead when there are any.
+        Without any filler words to look for Whisper is skipped altogether.
+        """
+        if not self.settings.filler_words:
+            return {"text": "", "segments": [], "language": None}
+
+        options = self.transcription_options()
+        if regions is None and self.settings.voiced_only and silent_intervals is not None:
+            regions = transcribe.voiced_regions(silent_intervals, decoded_audio.duration)
+
+        cache, cache_key, transcription = self._cached_transcript(
+            audio_hash(decoded_audio.samples), options, regions, chunked=self.settings.transcribe_workers > 1)
+        if transcription is not None:
+            return transcription
+
+        if self.settings.two_pass and self.settings.transcribe_workers > 1:
+            print("Two-pass transcription is not combined with transcribe_workers, transcribing in one pass.")
+        if self.settings.transcribe_workers > 1:
+            # Split the audio at silences and transcribe the chunks in a pool of worker processes
+            transcription = transcribe.transcribe_parallel(
+                decoded_audio.as_float32(), decoded_audio.sample_rate, silent_intervals or [],
+                self.settings.model_name, self.settings.device, options, regions,
+                workers=self.settings.transcribe_workers, torch_threads=self.settings.torch_threads,
+                progress_callback=progress_callback, backend=self.settings.asr_backend,
+            )
+        elif self.settings.two_pass:
+            # Text first, then word timings only for the segments that hold a filler word
+            with self._stage("model_load"):
+                model = get_model(self.settings.model_name, self.settings.device, self.settings.asr_backend)  # Load (or reuse) the Whisper speech recognition model
+            samples = decoded_audio.as_float32()
+            transcription = two_pass.transcribe_two_pass(
+                model, regions if regions is not None else [(0.0, decoded_audio.duration)],
+                lambda windows: (transcribe.window_audio(samples, decoded_audio.sample_rate, pieces) for pieces in windows),
+                filler_lexicon.FillerLexicon(self.settings.filler_words), options, progress_callback,
+                backend=self.settings.asr_backend,
+            )
+        elif regions is not None:
+            # Transcribe only the voiced regions, packed into 30 second windows
+            with self._stage("model_load"):
+                model = get_model(self.settings.model_name, self.settings.device, self.settings.asr_backend)  # Load (or reuse) the Whisper speech recognition model
+            transcription = transcribe.transcribe_voiced(model, decoded_audio.as_float32(), decoded_audio.sample_rate,
+                                                         regions, options, progress_callback, self.settings.asr_backend)
+        else:
+            with self._stage("model_load"):
+                model = get_model(self.settings.model_name, self.settings.device, self.settings.asr_backend)  # Load (or reuse) the Whisper speech recognition model
+            transcription = asr_backends.get_backend(self.settings.asr_backend).transcribe(
+                model, decoded_audio.as_float32(), **options)  # Transcribe the in-memory audio with the backend's model
+
+        if cache_key is not None:
+            cache.put(cache_key, transcription)
+        return transcription
+
+    def transcribe_streaming(self, video_file, scan, silent_intervals, progress_callback=None, regions=None):
+        """ Whisper transcript of video_file fed window by window from a second decoding pass.
+
+        scan is the streaming.AudioScan of the first pass. Without voiced_only (or
+        given regions) the whole recording is cut into plain 30 second windows.
+        """
+        if not self.settings.filler_words:
+            return {"text": "", "segments": [], "language": None}
+
+        options = self.transcription_options()
+        if regions is None:
+            if self.settings.voiced_only:
+                regions = transcribe.voiced_regions(silent_intervals, scan.duration)
+            else:
+                regions = [(0.0, scan.duration)]
+        if self.settings.transcribe_workers > 1:
+            print("Streaming analysis transcribes in this process, transcribe_workers is ignored.")
+
+        cache, cache_key, transcription = self._cached_transcript(scan.content_hash, options, regions)
+        if transcription is not None:
+            return transcription
+
+        with self._stage("model_load"):
+            model = get_model(self.settings.model_name, self.settings.device, self.settings.asr_backend)  # Load (or reuse) the Whisper speech recognition model
+        if self.settings.two_pass:
+            # Every pass decodes the audio again and only keeps the windows it needs
+            transcription = two_pass.transcribe_two_pass(
+                model, regions, lambda windows: streaming.stream_windows(video_file, windows, scan.sample_rate),
+                filler_lexicon.FillerLexicon(self.settings.filler_words), options, progress_callback,
+                backend=self.settings.asr_backend,
+            )
+        else:
+            windows = transcribe.pack_windows(regions)
+            window_audios = streaming.stream_windows(video_file, windows, scan.sample_rate)
+            transcription = transcribe.transcribe_windows(model, windows, window_audios, options, progress_callback,
+                                                          self.settings.asr_backend)
+
+        if cache_key is not None:
+            cache.put(cache_key, transcription)
+        return transcription
+
+    def detect_fillers(self, video_file, decoded_audio, scan, silent_intervals, streaming_mode, progress_callback=None):
+        """ Whisper-style result holding the filler words, found the way filler_detection says """
+        if self.settings.filler_detection == "whisper" or not self.settings.filler_words:
+            if streaming_mode:
+                # Decoding the audio again and transcribing every window as soon as it is read
+                return self.transcribe_streaming(video_file, scan, silent_intervals, progress_callback)
+            return self.transcribe(decoded_audio, silent_intervals, progress_callback)  # Transcribe the voiced audio (or reuse a cached transcript)
+
+        # Held voiced sounds with a flat pitch, found from the audio alone
+        with self._stage("acoustic"):
+            if decoded_audio is not None:
+                candidates = acoustic_fillers.find_candidates(decoded_audio.samples, decoded_audio.sample_rate, progress_callback)
+            else:
+                detector = acoustic_fillers.AcousticFillerDetector(scan.sample_rate)
+                stage = progress.Stage(progress_callback, "Finding filler candidates", 60, 70, total=scan.duration,
+                                       unit="s", rate_unit="x realtime")
+                for block in audio.iter_pcm_blocks(video_file, scan.sample_rate, streaming.BLOCK_SECONDS):
+                    detector.feed(block)
+                    stage.update(detector.frame_count * acoustic_fillers.HOP_SECONDS)
+                candidates = detector.finish()
+        print(f"Found {len(candidates)} filler candidate(s) acoustically.")
+        if self.settings.filler_detection == "acoustic" or not candidates:
+            return acoustic_fillers.candidates_transcript(candidates)
+
+        # Whisper only hears the audio around the candidates and decides which ones are filler words
+        regions = acoustic_fillers.confirm_regions(candidates, scan.duration)
+        if streaming_mode:
+            return self.transcribe_streaming(video_file, scan, silent_intervals, progress_callback, regions=regions)
+        return self.transcribe(decoded_audio, silent_intervals, progress_callback, regions=regions)
+
+    def use_streaming(self, video_file, duration=None):
+        """ Whether video_file is analysed in streaming mode """
+        if self.settings.streaming is not None:
+            return self.settings.streaming
+        if duration is None:
+            try:
+                duration = float(ffmpeg_tools.probe(video_file)["format"]["duration"])
+            except (RuntimeError, OSError, KeyError, ValueError):
+                return False
+        return duration >= STREAMING_MIN_SECONDS
+
+    def render(self, video_clip, video_file, output_file, keep_ranges, progress_callback):
+        """ Write the kept ranges to output_file using the configured render mode """
+        profile = encoder_profiles.get_profile(self.settings.encoder_profile)
+        render_info = self._render(video_clip, video_file, output_file, keep_ranges, progress_callback, profile)
+        if profile is not None and render_info["mode"] != "smart":
+            render_info["encoder_profile"] = profile.name
+        return render_info
+
+    def _render(self, video_clip, video_file, output_file, keep_ranges, progress_callback, profile):
+        """ render() with the encoder profile (None for the render mode's defaults) """
+        if self.settings.render_mode == "smart":
+            try:
+                # Copy whole GOPs and only re-encode around the cuts
+                render_info = smart_render.render_smart(video_file, output_file, keep_ranges, progress_callback)
+                render_info["mode"] = "smart"
+                return render_info
+            except smart_render.SmartRenderUnsupported as e:
+                print(f"Smart render not possible ({e}), re-encoding the whole video instead.")
+
+        if self.settings.render_mode == "sequential":
+            # Decode the source once in order and only pass the kept frames to the encoder
+            render_info = sequential_render.render_sequential(
+                video_file, output_file, keep_ranges, video_clip.fps, video_clip.size,
+                has_audio=video_clip.audio is not None, progress_callback=progress_callback, profile=profile,
+            )
+            render_info["mode"] = "sequential"
+            return render_info
+
+        if self.settings.render_mode == "parallel":
+            # Encode groups of kept frames in worker processes and join them without re-encoding
+            render_info = parallel_render.render_parallel(
+                video_file, output_file, keep_ranges, video_clip.fps, video_clip.size,
+                has_audio=video_clip.audio is not None, workers=self.settings.render_workers,
+                progress_callback=progress_callback, profile=profile,
+            )
+            render_info["mode"] = "parallel"
+            return render_info
+
+        # Concatenate the kept subclips and re-encode everything with moviepy
+        subclips = [video_clip.subclip(start, end) for start, end in keep_ranges]
+        final_clip = concatenate_videoclips(subclips)  # Concatenate subclips to form the final video
+        stage = progress.Stage(progress_callback, "Encoding frames", 90, 99, unit="frames", rate_unit="fps")
+        encoder_options = profile.moviepy_options() if profile is not None else {"codec": "libx264"}
+        final_clip.write_videofile(output_file, logger=progress.StageBarLogger(stage), **encoder_options)  # Save the final video to the specified output file
+        return {"mode": "moviepy"}
+
+    def checkpoint_store(self, video_file):
+        """ Stage artifacts of video_file in its work directory, or None when checkpoints are off """
+        if self.settings.checkpoint_dir is None:
+            return None
+        return checkpoints.CheckpointStore(checkpoints.work_dir_for(self.settings.checkpoint_dir, video_file))
+
+    def _load_checkpoint(self, store, name, key):
+        """ A stage artifact from the store when its fingerprint matches, else None """
+        artifact = store.load(name, key) if store is not None else None
+        if artifact is not None:
+            print(f"Reusing the {name} checkpoint from {store.work_dir}")
+        return artifact
+
+    def transcription_method(self, streaming_mode):
+        """ How the audio is sent to Whisper, the methods give slightly different transcripts """
+        if streaming_mode:
+            return "streaming+two_pass" if self.settings.two_pass else "streaming"
+        if self.settings.transcribe_workers > 1:
+            return "chunked"
+        method = "voiced" if self.settings.voiced_only else "full"
+        return f"{method}+two_pass" if self.settings.two_pass else method
+
+    def analyze(self, video_file, progress_callback=None, duration=None):
+        """ Decode, measure and transcribe video_file once.
+
+        The returned Analysis is all the cut list depends on, so new slider
+        values can be previewed with live_preview.plan() without analysing again.
+        With a checkpoint_dir, every stage is loaded from its checkpoint when
+        its inputs did not change since the last run.
+        """
+        progress_callback = progress_callback or _print_progress
+        streaming_mode = self.use_streaming(video_file, duration)
+        store = self.checkpoint_store(video_file)
+        audio_key = checkpoints.fingerprint("audio", checkpoints.source_key(video_file)) if store is not None else None
+
+        # Extracting the audio from the video (streaming mode only measures it on the way)
+        decoded_audio = None
+        scan = None
+        saved_audio = self._load_checkpoint(store, "audio", audio_key)
+        if saved_audio is not None:
+            scan = streaming.AudioScan(saved_audio["envelope"], saved_audio["average_dbfs"], saved_audio["content_hash"],
+                                       saved_audio["sample_count"], saved_audio["sample_rate"])
+            if "samples" in saved_audio:
+                decoded_audio = audio.DecodedAudio(saved_audio["samples"], saved_audio["sample_rate"])
+        elif streaming_mode:
+            progress_callback("Scanning audio...", 20)
+            with self._stage("extract"):
+                scan = streaming.scan_audio(video_file, progress_callback=progress_callback, duration=duration)
+        else:
+            progress_callback("Extracting audio from video...", 20)
+            with self._stage("extract"):
+                decoded_audio = audio.decode_audio(video_file, progress_callback=progress_callback, duration=duration)  # Decode the soundtrack straight into memory
+
+        # Measuring the loudness of every millisecond and detecting silent intervals
+        progress_callback("Detecting silences...", 40)
+        with self._stage("silence"):
+            if scan is None:
+                scan = streaming.AudioScan(
+                    silence.loudness_envelope(decoded_audio.samples, decoded_audio.sample_rate, decoded_audio.sample_width),
+                    silence.dbfs(decoded_audio.samples, decoded_audio.sample_width),
+                    audio_hash(decoded_audio.samples), len(decoded_audio.samples), decoded_audio.sample_rate,
+                )
+            if store is not None and saved_audio is None:
+                arrays = {"envelope": scan.envelope}
+                if decoded_audio is not None:
+                    arrays["samples"] = decoded_audio.samples # Only needed again when Whisper has to run again
+                store.save("audio", audio_key, {"average_dbfs": scan.average_dbfs, "content_hash": scan.content_hash,
+                                                "sample_count": scan.sample_count, "sample_rate": scan.sample_rate}, arrays)
+
+            silence_key = checkpoints.fingerprint("silences", audio_key, self.settings.quiet_threshold,
+                                                  self.settings.min_silence_len) if store is not None else None
+            saved_silences = self._load_checkpoint(store, "silences", silence_key)
+            if saved_silences is not None:
+                silent_intervals = [tuple(interval) for interval in saved_silences["intervals"]]
+            else:
+                silent_intervals = self.detect_silences(scan.envelope, scan.average_dbfs)
+                if store is not None:
+                    store.save("silences", silence_key, {"intervals": silent_intervals})
+
+        # Using the Whisper model to find the word timings in the audio
+        progress_callback("Detecting filler words...", 60)
+        with self._stage("transcription"):
+            transcription_silences = self.transcription_silences(scan.envelope, scan.average_dbfs, silent_intervals)
+            transcript_key = checkpoints.fingerprint(
+                "transcript", scan.content_hash, self.settings.model_name, self.settings.asr_backend, self.transcription_options(),
+                bool(self.settings.filler_words), self.settings.filler_detection, self.transcription_method(streaming_mode),
+                transcription_silences if self.settings.voiced_only else None,
+                sorted(self.settings.filler_words) if self.settings.two_pass else None, # Only their segments have words
+            ) if store is not None else None
+            saved_transcript = self._load_checkpoint(store, "transcript", transcript_key)
+            if saved_transcript is not None:
+                transcription = saved_transcript["transcription"]
+            else:
+                if not streaming_mode and decoded_audio is None and self.settings.filler_words:
+                    decoded_audio = audio.decode_audio(video_file) # The audio checkpoint came from a streaming run
+                transcription = self.detect_fillers(video_file, decoded_audio, scan, transcription_silences, streaming_mode,
+                                                    progress_callback)
+                if store is not None:
+                    store.save("transcript", transcript_key, {"transcription": transcription})
+
+        duration = duration if duration is not None else scan.duration
+        analysis = live_preview.Analysis(video_file, duration, scan.envelope, scan.average_dbfs, transcription)
+        if store is not None:
+            analysis.checkpoint_key = checkpoints.fingerprint("analysis", audio_key, transcript_key)
+        return analysis
+
+    def plan(self, analysis, store=None):
+        """ Cut plan of an analysis for the current settings, loaded from the store's checkpoint when possible """
+        if store is None or analysis.checkpoint_key is None:
+            return live_preview.plan(analysis, self.settings)
+
+        plan_key = checkpoints.fingerprint(
+            "cut_plan", analysis.checkpoint_key, self.settings.quiet_threshold, self.settings.min_silence_len,
+            self.settings.cut_padding, self.settings.min_keep_len, sorted(self.settings.filler_words))
+        saved_plan = self._load_checkpoint(store, "cut_plan", plan_key)
+        if saved_plan is not None:
+            return live_preview.CutPlan(intervals.as_array(saved_plan["cuts"]), intervals.as_array(saved_plan["keeps"]),
+                                        saved_plan["silence_count"], saved_plan["filler_count"], saved_plan["duration"])
+
+        cut_plan = live_preview.plan(analysis, self.settings)
+        store.save("cut_plan", plan_key, {
+            "cuts": intervals.to_list(cut_plan.cuts),
+            "keeps": intervals.to_list(cut_plan.keeps),
+            "silence_count": cut_plan.silence_count,
+            "filler_count": cut_plan.filler_count,
+            "duration": cut_plan.input_duration,
+        })
+        return cut_plan
+
+    # Process the video
+    def process(self, video_file, output_file, progress_callback=None, preview_callback=None, analysis=None):
+        """ Cut silences and filler words out of video_file and save the result to output_file.
+
+        Pass the analysis from analyze() to skip straight to cutting and rendering.
+        Returns a dictionary describing the run, with 'success' telling whether it worked.
+        """
+        progress_callback = progress_callback or _print_progress
+
+        # Record the start time of the video processing
+        start_time = time.time()
+        result = {
+            "input": video_file,
+            "output": output_file,
+            "success": False,
+            "settings": self.settings.to_dict(),
+        }
+
+        video_clip = None
+        previewer = None
+        audio_only = audio_render.is_audio_file(video_file) # No picture: no video clip, thumbnails or video encode
+        self.report = run_report.RunReport(self.settings.profile_stage, self.settings.profile_mode)
+        self.report.info.update(input=video_file, output=output_file, settings=result["settings"])
+
+        try:
+            # Step 1: Loading the video file
+            if not audio_only:
+                progress_callback("Loading video...", 10)
+                with self._stage("load"):
+                    video_clip = VideoFileClip(video_file)  # Load the video file using MoviePy
+
+            # Steps 2-4: Extracting the audio, detecting silences and transcribing (unless already done)
+            if analysis is None or analysis.video_file != video_file:
+                analysis = self.analyze(video_file, progress_callback,
+                                        duration=video_clip.duration if video_clip is not None else None)
+
+            # Step 5: Merging silent intervals and filler word intervals for cutting
+            progress_callback("Cutting intervals...", 80)
+            with self._stage("cut_planning"):
+                cut_plan = self.plan(analysis, self.checkpoint_store(video_file))
+                keep_ranges = cut_plan.keep_ranges()  # Ranges of video that will be kept
+
+            if self.settings.analyze_only:
+                # Step 6 (analyze-only): hand the cut list to the editor instead of rendering
+                progress_callback("Exporting cut list...", 90)
+                with self._stage("export"):
+                    if audio_only:
+                        exports = edit_export.export_cut_list(
+                            os.path.splitext(output_file)[0], video_file, cut_plan, analysis, edit_export.AUDIO_ONLY_FPS,
+                            self.settings.filler_words, has_video=False,
+                        )
+                    else:
+                        exports = edit_export.export_cut_list(
+                            os.path.splitext(output_file)[0], video_file, cut_plan, analysis, video_clip.fps,
+                            self.settings.filler_words, has_audio=video_clip.audio is not None,
+                        )
+                print(f"Cut list exported to {exports['edl']} (and .json, filter and concat scripts).")
+                result["exports"] = exports
+            else:
+                # Show a preview frame (approximation) of each cut in the GUI, decoded in the background while rendering
+                if preview_callback is not None and not audio_only:
+                    previewer = thumbnails.ThumbnailPreview(
+                        video_file, thumbnails.preview_times(cut_plan.cuts), video_clip.fps, preview_callback).start()
+
+                # Step 6: Writing the kept ranges to the final video
+                progress_callback("Saving video...", 90)
+                with self._stage("render"):
+                    if audio_only:
+                        # Splice the audio stream alone, whatever the render mode
+                        result["render"] = audio_render.render_audio(
+                            video_file, output_file, keep_ranges, progress_callback,
+                            profile=encoder_profiles.get_profile(self.settings.encoder_profile))
+                        result["render"]["mode"] = "audio"
+                    else:
+                        result["render"] = self.render(video_clip, video_file, output_file, keep_ranges, progress_callback)
+
+            # Step 7: Final status and completion message
+            progress_callback("Completed!", 100)
+            elapsed_time = time.time() - start_time  # Calculate total elapsed time
+            print(f"Process completed in {elapsed_time:.2f} seconds.")  # Print the time taken for processing
+
+            result.update({
+                "success": True,
+                "input_duration": video_clip.duration if video_clip is not None else analysis.duration,
+                "output_duration": cut_plan.output_duration,
+                "cut_count": cut_plan.cut_count,
+                "filler_count": cut_plan.filler_count,
+            })
+
+        # Handle any exceptions that occur during video processing
+        except Exception as e:
+            # Update progress bar and status message to indicate error
+            progress_callback(f"Error: {str(e)}", 0)
+            elapsed_time = time.time() - start_time  # Calculate elapsed time before error
+            print(f"Error after {elapsed_time:.2f} seconds: {e}")  # Print error and time taken before failure
+            traceback.print_exc()  # Print the full traceback of the exception for debugging
+            result["error"] = str(e)
+
+        finally:
+            # Stop the preview thumbnails and release the video reader
+            if previewer is not None:
+                previewer.stop()
+            if video_clip is not None:
+                video_clip.close()
+
+        result["elapsed"] = time.time() - start_time
+        result["report"] = self.save_report(output_file, result)
+        self.report = None
+        return result
+
+    def save_report(self, output_file, result):
+        """ Write the run report as <output name>_report.json into report_dir (the output's folder when
+        only profiling was asked for) and return it as a dictionary """
+        self.report.info.update(success=result["success"], error=result.get("error"))
+        report = self.report.to_dict()
+
+        report_dir = self.settings.report_dir
+        if report_dir is None and self.settings.profile_stage:
+            report_dir = os.path.dirname(os.path.abspath(output_file))
+        if report_dir is not None:
+            name = os.path.splitext(os.path.basename(output_file))[0]
+            report_file = os.path.join(report_dir, f"{name}_report.json")
+            try:
+                written = self.report.save(report_file)
+                print(f"Run report saved to {written[0]}" + (f", profile to {written[1]}" if len(written) > 1 else ""))
+                report["report_file"] = report_file
+            except OSError as e:
+                print(f"Could not save the run report: {e}")
+        return report
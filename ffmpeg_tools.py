@@ -0,0 +1,130 @@
+"""
+    Small helpers for calling ffmpeg and ffprobe directly.
+
+    The binaries are the same ones moviepy uses (the bundled Windows build
+    when it is present, otherwise whatever moviepy found), so every part of
+    the program talks to the same ffmpeg.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import contextlib
+import subprocess
+
+import moviepy.config as mpc
+
+
+def ffmpeg_binary():
+    """ Path of the ffmpeg executable moviepy is configured to use """
+    return mpc.get_setting("FFMPEG_BINARY")
+
+
+def ffprobe_binary():
+    """ Path of ffprobe, looked up next to ffmpeg first and then on the PATH """
+    ffmpeg = ffmpeg_binary()
+    folder, name = os.path.split(ffmpeg)
+    sibling = os.path.join(folder, name.replace("ffmpeg", "ffprobe"))
+    if folder and os.path.isfile(sibling):
+        return sibling
+    return shutil.which("ffprobe") or "ffprobe"
+
+
+def run_ffmpeg(args, capture_output=False):
+    """ Run ffmpeg with the given arguments, raising RuntimeError with its error output on failure """
+    command = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin", "-y"] + [str(arg) for arg in args]
+    completed = subprocess.run(command, stdout=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+                               stderr=subprocess.PIPE)
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {completed.stderr.decode(errors='replace').strip()}")
+    return completed.stdout
+
+
+@contextlib.contextmanager
+def open_ffmpeg(args):
+    """ Start ffmpeg with its output piped to the caller, raising RuntimeError if it fails.
+
+    Use as "with open_ffmpeg(args) as process:" and read process.stdout inside the block.
+    """
+    command = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin", "-y"] + [str(arg) for arg in args]
+    with tempfile.TemporaryFile() as error_log:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=error_log)
+        try:
+            yield process
+        finally:
+            process.stdout.close()
+            process.wait()
+        if process.returncode != 0:
+            error_log.seek(0)
+            raise RuntimeError(f"ffmpeg failed: {error_log.read().decode(errors='replace').strip()}")
+
+
+def run_ffprobe(args):
+    """ Run ffprobe and return its standard output as text """
+    command = [ffprobe_binary(), "-v", "error"] + [str(arg) for arg in args]
+    completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {completed.stderr.decode(errors='replace').strip()}")
+    return completed.stdout.decode()
+
+
+def probe(media_file):
+    """ Stream and container information of a media file as a dictionary """
+    return json.loads(run_ffprobe(["-show_streams", "-show_format", "-of", "json", media_file]))
+
+
+def first_stream(info, codec_type):
+    """ The first stream of the given type ("video" or "audio") in probe() output, or None """
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == codec_type:
+            return stream
+    return None
+
+
+def start_time(info):
+    """ Timestamp (s) at which the file in probe() output starts, which ffmpeg's -ss counts from.
+
+    MPEG-TS captures and trimmed files often start well past zero.
+    """
+    value = info.get("format", {}).get("start_time")
+    if value in (None, "N/A"):
+        stream = first_stream(info, "video") or {}
+        value = stream.get("start_time")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def probe_video_packets(video_file, offset=None):
+    """ Presentation times (s) of every frame in the first video stream, and of its keyframes.
+
+    Times are counted from the start of the file (see start_time()), like -ss and the
+    cut list. offset is that start time when the caller has already probed the file.
+    Only packet headers are read, nothing is decoded, so this is fast even for long files.
+    Returns (frame_times, keyframe_times), both sorted.
+    """
+    if offset is None:
+        offset = start_time(probe(video_file))
+    output = run_ffprobe([
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=print_section=0",
+        video_file,
+    ])
+    frame_times, keyframes = [], []
+    for line in output.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 2 or fields[0] in ("", "N/A"):
+            continue
+        time = float(fields[0]) - offset
+        frame_times.append(time)
+        if "K" in fields[1]:
+            keyframes.append(time)
+    return sorted(frame_times), sorted(keyframes)
+
+
+def format_time(seconds):
+    """ Seconds formatted for ffmpeg's -ss/-t options """
+    return f"{max(0.0, seconds):.6f}"
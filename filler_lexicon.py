@@ -0,0 +1,66 @@
+"""
+    Filler word lexicon.
+
+    The filler words to cut can be single words ("um") or phrases ("you
+    know"). They are stored in a trie keyed by normalized word, so matching
+    a transcript costs one dictionary lookup per word (plus one per extra
+    word of a phrase that starts there) however long the list is.
+"""
+
+import transcribe # Word normalisation
+
+
+# Key marking the end of a phrase in a trie node, an object so no word can be equal to it
+_END = object()
+
+
+class FillerLexicon():
+    """ Filler words and phrases matched against sequences of normalized words """
+
+    def __init__(self, phrases):
+        self.trie = {}
+        self.phrases = []
+        for phrase in phrases:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = " ".join(tokens)
+            self.phrases.append(node[_END])
+
+    def __bool__(self):
+        return bool(self.trie)
+
+    def matches(self, tokens):
+        """ (phrase, first index, last index) of every filler in a list of normalized words,
+        the longest phrase wins where several start at the same word. Empty words (Whisper
+        words made of punctuation only) are skipped, the indexes are those of the full list """
+        positions = [position for position, token in enumerate(tokens) if token]
+        words = [tokens[position] for position in positions]
+        index = 0
+        while index < len(words):
+            node = self.trie
+            match = None
+            position = index
+            while position < len(words) and words[position] in node:
+                node = node[words[position]]
+                if _END in node:
+                    match = (node[_END], index, position)
+                position += 1
+            if match is not None:
+                phrase, first, last = match
+                yield phrase, positions[first], positions[last]
+                index = last + 1
+            else:
+                index += 1
+
+    def contains(self, text):
+        """ Whether a piece of transcript text holds any filler """
+        return next(self.matches(tokenize(text)), None) is not None
+
+
+def tokenize(text):
+    """ Normalized words of a piece of text ("Um, you know." -> ["um", "you", "know"]) """
+    return [token for token in (transcribe.normalize_text(word) for word in text.split()) if token]
@@ -0,0 +1,125 @@
+"""
+    Interval algebra for building cut lists.
+
+    Intervals are stored as (n, 2) NumPy arrays of [start, end] times in
+    seconds. Every operation is a handful of array operations, at worst a sort,
+    so building the cut list stays O(n log n) even for very long recordings
+    with many thousands of cuts.
+
+    Run "python intervals.py" for a quick benchmark on 100k random intervals.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+
+def as_array(intervals):
+    """ Intervals as a float (n, 2) array """
+    array = np.asarray(intervals, dtype=np.float64)
+    return array.reshape(-1, 2)
+
+
+def to_list(intervals):
+    """ Intervals as a list of (start, end) tuples of plain floats """
+    return [(float(start), float(end)) for start, end in as_array(intervals)]
+
+
+def drop_empty(intervals):
+    """ Remove intervals whose end is not after their start """
+    intervals = as_array(intervals)
+    return intervals[intervals[:, 1] > intervals[:, 0]]
+
+
+def union(intervals):
+    """ Sort and merge overlapping or touching intervals """
+    intervals = drop_empty(intervals)
+    if len(intervals) == 0:
+        return intervals
+
+    intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+    starts, ends = intervals[:, 0], intervals[:, 1]
+
+    # A new group starts wherever an interval begins after every earlier interval has ended
+    reach = np.maximum.accumulate(ends)
+    group_starts = np.concatenate(([True], starts[1:] > reach[:-1]))
+    first = np.flatnonzero(group_starts)
+    last = np.concatenate((first[1:], [len(intervals)])) - 1
+
+    return np.column_stack((starts[first], reach[last]))
+
+
+def pad(intervals, before, after=None):
+    """ Move every start back by before and every end forward by after (negative values shrink) """
+    after = before if after is None else after
+    intervals = as_array(intervals).copy()
+    intervals[:, 0] -= before
+    intervals[:, 1] += after
+    return intervals
+
+
+def clamp(intervals, lower, upper):
+    """ Clip intervals to [lower, upper], dropping the ones left empty """
+    return drop_empty(np.clip(as_array(intervals), lower, upper))
+
+
+def drop_short(intervals, min_length):
+    """ Remove intervals shorter than min_length """
+    intervals = as_array(intervals)
+    return intervals[(intervals[:, 1] - intervals[:, 0]) >= min_length]
+
+
+def complement(intervals, lower, upper):
+    """ The parts of [lower, upper] not covered by any interval """
+    covered = clamp(union(intervals), lower, upper)
+    bounds = np.concatenate(([lower], covered.ravel(), [upper]))
+    return drop_empty(bounds.reshape(-1, 2))
+
+
+def intersection(first, second):
+    """ The parts covered by an interval of first and an interval of second """
+    first, second = union(first), union(second)
+    if len(first) == 0 or len(second) == 0:
+        return np.zeros((0, 2))
+    lower, upper = min(first[0, 0], second[0, 0]), max(first[-1, 1], second[-1, 1])
+    return complement(np.concatenate((complement(first, lower, upper), complement(second, lower, upper))), lower, upper)
+
+
+def total_length(intervals):
+    """ Summed length of the intervals (overlaps counted once per interval) """
+    intervals = as_array(intervals)
+    return float(np.sum(intervals[:, 1] - intervals[:, 0]))
+
+
+def plan_cuts(cut_intervals, duration, padding=0.0, min_keep_len=0.0):
+    """ Build the final cut list and keep list from raw cut intervals.
+
+    Each cut is widened by padding on both sides (the GUI's default negative
+    padding shrinks the cuts and keeps a little more audio around them),
+    clamped to the video and merged. Kept ranges shorter than min_keep_len
+    are cut as well.
+    Returns (cuts, keeps) as arrays.
+    """
+    cuts = union(clamp(pad(cut_intervals, padding), 0.0, duration))
+    keeps = complement(cuts, 0.0, duration)
+
+    if min_keep_len > 0:
+        keeps = drop_short(keeps, min_keep_len)
+        cuts = complement(keeps, 0.0, duration)
+    return cuts, keeps
+
+
+if __name__ == "__main__":
+    # Benchmark: python intervals.py [number of intervals]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(0)
+    duration = count * 2.0
+    starts = np.sort(rng.uniform(0, duration, count))
+    raw = np.column_stack((starts, starts + rng.uniform(0.05, 3.0, count)))
+
+    start = time.perf_counter()
+    cuts, keeps = plan_cuts(raw, duration, padding=-0.2, min_keep_len=0.1)
+    elapsed = time.perf_counter() - start
+
+    print(f"{count} intervals -> {len(cuts)} cuts, {len(keeps)} kept ranges in {elapsed * 1000:.1f} ms")
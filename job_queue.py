@@ -0,0 +1,164 @@
+"""
+    Persistent job queue.
+
+    Jobs are rows of a local SQLite database holding their input, output,
+    settings, status, timings and error, so a queue survives restarts and
+    crashes. A job goes queued -> running -> done or failed. Jobs that were
+    still running when the process died are put back in the queue by
+    requeue_interrupted() the next time the queue is opened, until they
+    have been tried MAX_ATTEMPTS times.
+
+    Every change is its own transaction, so the database is never left half
+    written. Only one daemon should use a database at a time.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import contextlib
+
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+# A job that was interrupted this many times (e.g. it keeps crashing its worker) is marked failed
+MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_key TEXT NOT NULL UNIQUE,
+    input TEXT NOT NULL,
+    output TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    elapsed REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+def source_key(video_file):
+    """ Identity of an input file: its path, size and modification time, so a replaced file is queued again """
+    stat = os.stat(video_file)
+    return f"{os.path.abspath(video_file)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+class JobQueue():
+    """ Jobs stored in a SQLite database file """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        folder = os.path.dirname(os.path.abspath(db_file))
+        os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(db_file, timeout=30, isolation_level=None) # Autocommit, transactions are explicit
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL") # Readers (e.g. "cli.py jobs") never block the daemon
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, video_file, output_file, settings_dict):
+        """ Queue a job for video_file, returns its id or None when this exact file is already known """
+        key = source_key(video_file)
+        # Look first, the folder is scanned over and over and known files should not cost a write
+        if self.connection.execute("SELECT 1 FROM jobs WHERE source_key = ?", (key,)).fetchone() is not None:
+            return None
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO jobs (source_key, input, output, settings, status, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, video_file, output_file, json.dumps(settings_dict), QUEUED, time.time()),
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def claim(self):
+        """ Mark the oldest queued job as running and return it as a dictionary, or None when there is none """
+        with self._transaction():
+            row = self.connection.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, started = ?, finished = NULL, error = NULL "
+                "WHERE id = ?", (RUNNING, time.time(), row["id"]))
+        return self.get(row["id"])
+
+    def finish(self, job_id, result):
+        """ Record the engine's result dictionary of a job, done or failed depending on result["success"] """
+        status = DONE if result.get("success") else FAILED
+        self._end(job_id, status, result.get("error"), json.dumps(result, default=str))
+
+    def fail(self, job_id, error):
+        """ Mark a job failed without a result (its worker crashed) """
+        self._end(job_id, FAILED, error, None)
+
+    def retry(self, job_id, error):
+        """ Put an interrupted job back in the queue, or fail it once it ran out of attempts """
+        job = self.get(job_id)
+        if job["attempts"] >= MAX_ATTEMPTS:
+            self.fail(job_id, f"{error} (gave up after {job['attempts']} attempts)")
+        else:
+            self.connection.execute("UPDATE jobs SET status = ?, error = ? WHERE id = ?", (QUEUED, error, job_id))
+
+    def requeue_interrupted(self):
+        """ Queue again the jobs left running by a daemon that stopped or crashed, returns how many there were """
+        interrupted = [row["id"] for row in self.connection.execute(
+            "SELECT id FROM jobs WHERE status = ?", (RUNNING,))]
+        for job_id in interrupted:
+            self.retry(job_id, "Interrupted")
+        return len(interrupted)
+
+    def _end(self, job_id, status, error, result):
+        finished = time.time()
+        self.connection.execute(
+            "UPDATE jobs SET status = ?, finished = ?, elapsed = ? - started, error = ?, result = ? WHERE id = ?",
+            (status, finished, finished, error, result, job_id))
+
+    def get(self, job_id):
+        """ One job as a dictionary (settings and result decoded), or None """
+        row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_dict(row) if row is not None else None
+
+    def jobs(self, status=None):
+        """ Every job (or those with the given status), oldest first """
+        if status is None:
+            rows = self.connection.execute("SELECT * FROM jobs ORDER BY id")
+        else:
+            rows = self.connection.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,))
+        return [_job_dict(row) for row in rows]
+
+    def counts(self):
+        """ Number of jobs in every status """
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count in self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """ BEGIN IMMEDIATE ... COMMIT, so claiming a job cannot race another connection """
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+
+def _job_dict(row):
+    job = dict(row)
+    job["settings"] = json.loads(job["settings"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
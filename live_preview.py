@@ -0,0 +1,119 @@
+"""
+    Live cut preview.
+
+    Analysing a video (decoding the audio and running Whisper) is the slow
+    part, but the cut list only depends on the slider values, a per-ms
+    loudness envelope and the word timings. An Analysis keeps just those, a
+    float16 envelope is 7 MB for an hour of audio, so moving a slider only
+    recomputes the cut list in a few milliseconds and the projected output
+    length can be shown straight away. The video is rendered once the user is
+    happy with the numbers.
+"""
+
+import acoustic_fillers # Label of acoustically detected fillers
+import filler_lexicon # Filler words and phrases matched with a trie
+import intervals # Interval algebra for the cut list
+import silence # Silence detection on the loudness envelope
+import transcribe # Word normalisation
+
+
+class Analysis():
+    """ Everything the cut list is computed from, kept after analysing a video """
+
+    def __init__(self, video_file, duration, envelope, average_dbfs, transcription):
+        self.video_file = video_file
+        self.duration = duration # Length of the video (s)
+        self.envelope = envelope # Loudness of every millisecond (dBFS, float16)
+        self.average_dbfs = average_dbfs # Average loudness of the whole soundtrack (dBFS)
+        self.transcription = transcription # Whisper-style result
+        self.checkpoint_key = None # Fingerprint of the checkpointed stages it was built from (see engine.py)
+
+        # (normalized word, start, end) of every transcribed word
+        self.words = transcribe.transcript_words(transcription)
+
+        # The last silence detection, reused while only the padding or minimum keep length changes
+        self._silence_key = None
+        self._silences = None
+
+        # The lexicon of the last filler word list
+        self._lexicon_key = None
+        self._lexicon = None
+
+    def silent_intervals(self, quiet_threshold, min_silence_len):
+        """ Silent (start, end) intervals in seconds for the given slider values """
+        key = (float(quiet_threshold), int(min_silence_len))
+        if key != self._silence_key:
+            self._silences = silence.detect_silences_from_envelope(
+                self.envelope, self.average_dbfs, int(min_silence_len), quiet_threshold)
+            self._silence_key = key
+        return self._silences
+
+    def filler_hits(self, filler_words):
+        """ (filler, start, end) of every transcribed filler word or phrase (acoustic fillers match any filler word) """
+        key = tuple(filler_words)
+        if key != self._lexicon_key:
+            self._lexicon = filler_lexicon.FillerLexicon(filler_words)
+            self._lexicon_key = key
+        if not self._lexicon:
+            return []
+
+        hits = [(phrase, self.words[first][1], self.words[last][2])
+                for phrase, first, last in self._lexicon.matches([word for word, _, _ in self.words])]
+        acoustic_hits = [(word, start, end) for word, start, end in self.words if word == acoustic_fillers.FILLER_LABEL]
+        return sorted(hits + acoustic_hits, key=lambda hit: hit[1]) if acoustic_hits else hits
+
+    def filler_intervals(self, filler_words, padding):
+        """ (start, end) intervals of the filler words, widened by padding """
+        return [(max(0, start + padding), min(self.duration, end - padding))
+                for _, start, end in self.filler_hits(filler_words)]
+
+
+class CutPlan():
+    """ The cuts and kept ranges for one set of slider values """
+
+    def __init__(self, cuts, keeps, silence_count, filler_count, duration):
+        self.cuts = cuts # (n, 2) array of cut ranges (s)
+        self.keeps = keeps # (n, 2) array of kept ranges (s)
+        self.silence_count = silence_count
+        self.filler_count = filler_count
+        self.input_duration = duration
+
+    @property
+    def cut_count(self):
+        return len(self.cuts)
+
+    @property
+    def output_duration(self):
+        """ Length of the video once the cuts are made (s) """
+        return intervals.total_length(self.keeps)
+
+    def keep_ranges(self):
+        """ Kept ranges as a list of (start, end) tuples """
+        return intervals.to_list(self.keeps)
+
+    def summary(self):
+        """ One line description for the GUI, e.g. "12:03 -> 9:41 (80%), 214 cuts" """
+        percent = 100 * self.output_duration / self.input_duration if self.input_duration else 0
+        return (f"{format_duration(self.input_duration)} -> {format_duration(self.output_duration)} "
+                f"({percent:.0f}%), {self.cut_count} cuts")
+
+
+def format_duration(seconds):
+    """ h:mm:ss or m:ss """
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+def plan(analysis, settings):
+    """ Cut plan for an analysis and a set of EngineSettings """
+    silent_intervals = analysis.silent_intervals(settings.quiet_threshold, settings.min_silence_len)
+    filler_intervals = analysis.filler_intervals(settings.filler_words, settings.cut_padding)
+
+    cuts, keeps = intervals.plan_cuts(
+        silent_intervals + filler_intervals, # Combine silences and filler word intervals
+        analysis.duration,
+        padding=settings.cut_padding, # Padding applied to both ends of every cut
+        min_keep_len=settings.min_keep_len, # Kept pieces shorter than this are cut too
+    )
+    return CutPlan(cuts, keeps, len(silent_intervals), len(filler_intervals), analysis.duration)
@@ -0,0 +1,142 @@
+"""
+    Process-wide cache of loaded Whisper models.
+
+    Loading a Whisper model reads its weights from disk and initializes them,
+    which takes several seconds. The registry keeps loaded models in memory,
+    keyed by model name, device and ASR backend (see asr_backends.py), so
+    later jobs in the same process (the GUI
+    or a batch worker) reuse them. The least recently used models are evicted
+    once the cache goes over its memory budget.
+"""
+
+import threading
+from collections import OrderedDict
+
+import asr_backends # Loads the models of every speech recognition backend
+
+
+# Default amount of memory the cached models may use (MB)
+DEFAULT_MEMORY_BUDGET_MB = 4096
+
+
+def resolve_device(device=None, backend=None):
+    """ Return the device the backend would pick when none is given ("cuda" if available, else "cpu") """
+    return asr_backends.get_backend(backend).resolve_device(device)
+
+
+def model_size_bytes(model):
+    """ Memory used by the model weights and buffers (bytes), 0 for a model that is not a torch module """
+    if not hasattr(model, "parameters"):
+        return 0 # Models of other backends are not counted against the memory budget
+    size = sum(param.numel() * param.element_size() for param in model.parameters())
+    size += sum(buffer.numel() * buffer.element_size() for buffer in model.buffers())
+
+    # Dynamically quantized layers keep their int8 weights outside the parameters
+    for module in model.modules() if hasattr(model, "modules") else []:
+        if hasattr(module, "_weight_bias"):
+            for tensor in module._weight_bias():
+                if tensor is not None:
+                    size += tensor.numel() * tensor.element_size()
+    return size
+
+
+class ModelRegistry():
+    """ LRU cache of loaded Whisper models with a memory budget """
+
+    def __init__(self, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, loader=None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.loader = loader # Function that actually loads a model, by default the backend's load()
+        self._models = OrderedDict() # (name, device, backend) -> (model, size in bytes), oldest first
+        self._lock = threading.Lock() # Protects _models and _key_locks
+        self._key_locks = {} # One lock per key so a model is never loaded twice at the same time
+
+    def get(self, name, device=None, backend=None):
+        """ Return the model, loading it (and evicting old ones) if it is not cached yet """
+        backend = backend or asr_backends.DEFAULT_BACKEND
+        key = (name, resolve_device(device, backend), backend)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key) # Mark as most recently used
+                return self._models[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models can still be served meanwhile
+        with key_lock:
+            with self._lock:
+                # Another thread may have finished loading it while we waited
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            print(f"Loading {key[2]} model '{key[0]}' on {key[1]}...")
+            loader = self.loader or asr_backends.get_backend(backend).load
+            model = loader(key[0], device=key[1])
+            size = model_size_bytes(model)
+
+            with self._lock:
+                self._models[key] = (model, size)
+                self._evict(keep=key)
+
+        return model
+
+    def _evict(self, keep):
+        """ Drop the least recently used models until the cache fits its budget (lock must be held) """
+        while self.memory_used() > self.memory_budget and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            self._models.pop(oldest)
+            print(f"Evicted {oldest[2]} model '{oldest[0]}' on {oldest[1]} from the cache")
+
+    def memory_used(self):
+        """ Total size of the cached models (bytes) """
+        return sum(size for _, size in self._models.values())
+
+    def cached(self):
+        """ List of (name, device, backend) keys currently cached, oldest first """
+        with self._lock:
+            return list(self._models)
+
+    def clear(self):
+        """ Forget every cached model """
+        with self._lock:
+            self._models.clear()
+
+    def preload(self, names, device=None, background=True, backend=None):
+        """ Load the given models ahead of time so the first job does not pay the load cost.
+
+        With background=True the loading runs in a daemon thread, which is returned.
+        """
+        if isinstance(names, str):
+            names = [names]
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name, device, backend)
+                except Exception as e:
+                    # A failed warm-up is not fatal, the job will try (and report) again
+                    print(f"Could not preload Whisper model '{name}': {e}")
+
+        if not background:
+            load_all()
+            return None
+
+        thread = threading.Thread(target=load_all, name="whisper-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+
+# The registry shared by everything running in this process
+registry = ModelRegistry()
+
+
+def get_model(name, device=None, backend=None):
+    """ Return a cached model from the process-wide registry """
+    return registry.get(name, device, backend)
+
+
+def warm_up(names, device=None, background=True, backend=None):
+    """ Preload models into the process-wide registry """
+    return registry.preload(names, device, background, backend)
@@ -0,0 +1,105 @@
+"""
+    Parallel segment renderer.
+
+    One encoder over the whole output uses only part of a many-core machine.
+    This renderer splits the kept frames into groups of about the same
+    length, encodes every group to its own video-only file in a pool of
+    worker processes (each decoding from a seek to its first frame) and
+    joins the files with ffmpeg's concat demuxer without re-encoding them.
+    The audio of all kept ranges is written once, sample-aligned to the
+    frames like the sequential renderer does, and only encoded during the
+    final join, so the output has no audio gaps at the group seams.
+"""
+
+import os
+import math
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ffmpeg_tools
+import progress
+import sequential_render
+
+
+def split_groups(ranges, groups):
+    """ Split [first, end) frame ranges into at most `groups` lists holding about the same number of frames """
+    total = sum(last - first for first, last in ranges)
+    if total == 0:
+        return []
+    target = math.ceil(total / max(1, groups))
+
+    result = []
+    current = []
+    count = 0 # Frames in the current group
+    for first, last in ranges:
+        while first < last:
+            take = min(last - first, target - count)
+            current.append((first, first + take))
+            count += take
+            first += take
+            if count >= target:
+                result.append(current)
+                current, count = [], 0
+    if current:
+        result.append(current)
+    return result
+
+
+def _encode_group(video_file, output_file, ranges, fps, size, threads, profile=None):
+    """ Worker entry point: encode one group of frame ranges to a video-only file """
+    base = ranges[0][0]
+    local_ranges = [(first - base, last - base) for first, last in ranges]
+    return sequential_render.encode_frames(video_file, output_file, local_ranges, fps, size,
+                                           seek=base / fps, threads=threads, profile=profile)
+
+
+def render_parallel(video_file, output_file, keep_ranges, fps, size, has_audio=True, workers=None,
+                    progress_callback=None, profile=None):
+    """ Render the kept ranges of video_file into output_file, encoding groups of them in parallel """
+    workers = workers or os.cpu_count() or 1
+    ranges = sequential_render.frame_ranges(keep_ranges, fps)
+    groups = split_groups(ranges, workers)
+    total_kept = sum(last - first for first, last in ranges)
+
+    # Share the cores (or the encoder profile's thread count) between the encoders instead of
+    # every x264 starting a thread per core
+    budget = (profile.threads if profile is not None else 0) or os.cpu_count() or 1
+    threads = max(1, budget // max(1, len(groups)))
+
+    work_dir = tempfile.mkdtemp(prefix="parallel_render_")
+    try:
+        group_files = [os.path.join(work_dir, f"group_{index:03d}.mp4") for index in range(len(groups))]
+        stage = progress.Stage(progress_callback, "Encoding groups", 90, 99, total=total_kept,
+                               unit="frames", rate_unit="fps")
+        written = 0
+        with ProcessPoolExecutor(max_workers=max(1, len(groups))) as pool:
+            futures = [pool.submit(_encode_group, video_file, group_file, group, fps, size, threads, profile)
+                       for group_file, group in zip(group_files, groups)]
+
+            # The audio is written while the workers encode
+            audio_file = None
+            if has_audio:
+                audio_file = os.path.join(work_dir, "kept_audio.wav")
+                sequential_render._write_kept_audio(video_file, audio_file, sequential_render.sample_ranges(ranges, fps))
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                written += future.result()
+                stage.update(written, f"group {done}/{len(futures)}")
+
+        # Join the groups without re-encoding the video
+        list_file = os.path.join(work_dir, "groups.txt")
+        with open(list_file, "w", encoding="utf-8") as listing:
+            for group_file in group_files:
+                listing.write(f"file '{group_file}'\n")
+
+        concat_args = ["-f", "concat", "-safe", "0", "-i", list_file]
+        if audio_file is not None:
+            concat_args += ["-i", audio_file, "-map", "0:v", "-map", "1:a"]
+            concat_args += profile.audio_args() if profile is not None else ["-c:a", "aac"]
+        ffmpeg_tools.run_ffmpeg(concat_args + ["-c:v", "copy", "-movflags", "+faststart", output_file])
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {"kept_frames": written, "frame_ranges": len(ranges), "groups": len(groups)}
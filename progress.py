@@ -0,0 +1,150 @@
+"""
+    Progress events.
+
+    The engine runs on a worker thread, and Tk widgets must only be touched
+    from the thread running the Tk loop. Instead of changing widgets, the
+    worker publishes ProgressEvents to a ProgressBus. The GUI subscribes a
+    queue and drains it with root.after(), headless code can subscribe a
+    plain function (e.g. to print or log every event).
+
+    A Stage maps the fractional progress of one step (audio decoded,
+    Whisper windows done, frames encoded) onto its slice of the overall
+    percentage and reports the throughput alongside it.
+"""
+
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+
+import proglog # Progress bars of moviepy (installed together with it)
+
+
+# Minimum time between two stage updates published to a ProgressBus (s)
+BUS_INTERVAL = 0.1
+
+# Minimum time between two stage updates sent to a plain progress_callback (s)
+CALLBACK_INTERVAL = 1.0
+
+
+@dataclass
+class ProgressEvent:
+    """ One message from the engine to whoever is watching """
+
+    status: str # Human readable status or log text
+    percent: float = None # Overall progress 0-100, None for events that are not progress
+    kind: str = "progress" # "progress", "log", "preview" (data is a frame) or any custom kind
+    stage: str = None # Name of the stage that reported it
+    fraction: float = None # How far the stage is, 0-1 (None when unknown)
+    rate: float = None # Throughput of the stage in rate_unit
+    rate_unit: str = None
+    data: object = None # Extra payload, e.g. a preview frame
+    time: float = field(default_factory=time.time)
+
+
+class ProgressBus():
+    """ Thread-safe fan-out of ProgressEvents to any number of subscribers.
+
+    The bus can be passed anywhere a progress_callback(status, percent) is expected.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """ Call callback(event) for every event, on the thread that published it """
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def subscribe_queue(self):
+        """ A queue.Queue that receives every event, for consumers that poll (like the Tk loop) """
+        events = queue.Queue()
+        self.subscribe(events.put)
+        return events
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
+
+    def __call__(self, status, percent):
+        # Plain progress_callback interface
+        self.publish(ProgressEvent(status, percent))
+
+    def log(self, text):
+        """ Publish a line of log output """
+        self.publish(ProgressEvent(text, kind="log"))
+
+
+class Stage():
+    """ Reports the progress of one stage as a slice [start_percent, end_percent] of the whole run.
+
+    Works with a ProgressBus (rich events) as well as a plain progress_callback(status, percent).
+    Updates are throttled to one per min_interval seconds, except the final one.
+    """
+
+    def __init__(self, progress_callback, name, start_percent, end_percent, total=None,
+                 unit="items", rate_unit=None, min_interval=None):
+        self.progress_callback = progress_callback
+        self.name = name
+        self.start_percent = start_percent
+        self.end_percent = end_percent
+        self.total = total
+        self.unit = unit
+        self.rate_unit = rate_unit or f"{unit}/s"
+        if min_interval is None:
+            # Subscribers of a bus can keep up with frequent events, printed progress should stay readable
+            min_interval = BUS_INTERVAL if isinstance(progress_callback, ProgressBus) else CALLBACK_INTERVAL
+        self.min_interval = min_interval
+        self.started = time.monotonic()
+        self._last_report = 0.0
+        self._finished = False
+
+    def update(self, done, label=None):
+        """ Report that done (out of total) units are finished, label replaces the "done/total unit" text """
+        if self.progress_callback is None:
+            return
+        now = time.monotonic()
+        finished = self.total is not None and done >= self.total
+        if self._finished or (not finished and now - self._last_report < self.min_interval):
+            return
+        self._last_report = now
+        self._finished = finished
+
+        fraction = min(1.0, done / self.total) if self.total else None
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed > 0 else None
+        percent = self.start_percent + (self.end_percent - self.start_percent) * (fraction or 0.0)
+
+        if label is None:
+            label = f"{done:.0f}/{self.total:.0f} {self.unit}" if self.total else f"{done:.0f} {self.unit}"
+        status = f"{self.name}: {label}" + (f" ({rate:.1f} {self.rate_unit})" if rate else "")
+
+        if isinstance(self.progress_callback, ProgressBus):
+            self.progress_callback.publish(ProgressEvent(status, percent, stage=self.name, fraction=fraction,
+                                                         rate=rate, rate_unit=self.rate_unit))
+        else:
+            self.progress_callback(status, int(percent))
+
+
+class StageBarLogger(proglog.ProgressBarLogger):
+    """ moviepy logger that reports the frames being written as a Stage """
+
+    def __init__(self, stage):
+        super().__init__()
+        self.stage = stage
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        # moviepy counts the written frames in the "t" bar
+        if bar == "t" and attr == "index":
+            if self.stage.total is None:
+                self.stage.total = self.bars[bar].get("total")
+            self.stage.update(value + 1)
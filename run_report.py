@@ -0,0 +1,221 @@
+"""
+    Per-stage run report.
+
+    Every run of the engine measures its stages (load, extract, silence,
+    acoustic, model_load, transcription, cut_planning, render) and records
+    for each the wall time, the CPU time of this process and of the
+    ffmpeg/worker processes that finished during it, the peak resident
+    memory and the bytes this process read and wrote (pipes from ffmpeg
+    included). Stages can nest, acoustic and model_load happen inside
+    transcription, and say so in their "parent" field.
+
+    One stage can also be profiled with cProfile or tracemalloc, the
+    profile is saved next to the JSON report.
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+import tracemalloc
+
+try:
+    import psutil # Optional, gives memory and I/O counters on every platform
+except ImportError:
+    psutil = None
+try:
+    import resource # Unix only
+except ImportError:
+    resource = None
+
+
+# Stages the engine reports, in pipeline order
+STAGES = ("load", "extract", "silence", "acoustic", "model_load", "transcription", "cut_planning", "render", "export")
+
+# Ways a stage can be profiled
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+# How often the memory of a running stage is sampled (s)
+RSS_SAMPLE_INTERVAL = 0.02
+
+# Lines of the tracemalloc statistics written to the profile
+TRACEMALLOC_TOP = 50
+
+
+def current_rss():
+    """ Resident memory of this process in bytes, or None when it cannot be measured """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """ Highest resident memory of this process so far in bytes, or None """
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        if hasattr(memory, "peak_wset"): # Windows
+            return memory.peak_wset
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024 # Linux reports KB
+    return None
+
+
+def io_counters():
+    """ (bytes read, bytes written) by this process so far, or (None, None) """
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+        except (AttributeError, psutil.Error): # Not available on macOS
+            return None, None
+        return (getattr(counters, "read_chars", counters.read_bytes),
+                getattr(counters, "write_chars", counters.write_bytes))
+    try:
+        with open("/proc/self/io") as io:
+            values = dict(line.split(": ") for line in io.read().splitlines())
+        return int(values["rchar"]), int(values["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _difference(after, before):
+    return after - before if after is not None and before is not None else None
+
+
+class _PeakSampler():
+    """ Polls the resident memory in a thread and keeps the highest value """
+
+    def __init__(self):
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.peak = max(self.peak, current_rss())
+        return self.peak
+
+
+class RunReport():
+    """ Collects the measurements of every stage of one run """
+
+    def __init__(self, profile_stage=None, profile_mode="cprofile"):
+        if profile_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {profile_mode!r}, use one of {PROFILE_MODES}")
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.stages = []
+        self.info = {} # Extra fields for the report (input, output, settings...)
+        self._open = [] # Names of the stages currently running, innermost last
+        self._profile = None # cProfile.Profile or tracemalloc snapshot of the profiled stage
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ Measure the code inside "with report.stage(name):" """
+        parent = self._open[-1] if self._open else None
+        self._open.append(name)
+
+        profiler = None
+        if name == self.profile_stage:
+            if self.profile_mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                tracemalloc.start(25)
+
+        sampler = _PeakSampler().start()
+        peak_before = peak_rss()
+        read_before, written_before = io_counters()
+        children_before = os.times()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_before
+            cpu = time.process_time() - cpu_before
+            children = os.times()
+            read_after, written_after = io_counters()
+            peak = sampler.stop()
+
+            # The process high-water mark is exact, use it whenever it went up during this stage
+            peak_after = peak_rss()
+            if peak_after is not None and peak_before is not None and peak_after > peak_before:
+                peak = max(peak or 0, peak_after)
+
+            if profiler is not None:
+                profiler.disable()
+                self._profile = profiler
+            elif name == self.profile_stage:
+                self._profile = (tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            self._open.pop()
+            self.stages.append({
+                "stage": name,
+                "parent": parent,
+                "wall_time": wall,
+                "cpu_time": cpu,
+                "child_cpu_time": (children.children_user + children.children_system)
+                                  - (children_before.children_user + children_before.children_system),
+                "peak_rss": peak,
+                "bytes_read": _difference(read_after, read_before),
+                "bytes_written": _difference(written_after, written_before),
+            })
+
+    def to_dict(self):
+        """ The report as a JSON-ready dictionary """
+        return dict(self.info, stages=self.stages, total={
+            "wall_time": time.perf_counter() - self._started,
+            "cpu_time": time.process_time() - self._started_cpu,
+            "peak_rss": peak_rss(),
+        })
+
+    def save(self, report_file):
+        """ Write the report, and the profile of the profiled stage next to it. Returns the files written. """
+        folder = os.path.dirname(os.path.abspath(report_file))
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.splitext(report_file)[0]
+        written = [report_file]
+        report = self.to_dict()
+
+        if self._profile is not None:
+            if self.profile_mode == "cprofile":
+                # Open with "python -m pstats <file>" or snakeviz
+                profile_file = f"{base}_{self.profile_stage}.prof"
+                pstats.Stats(self._profile).dump_stats(profile_file)
+            else:
+                snapshot, traced_peak = self._profile
+                profile_file = f"{base}_{self.profile_stage}_tracemalloc.txt"
+                with open(profile_file, "w", encoding="utf-8") as output:
+                    output.write(f"Peak traced memory during {self.profile_stage}: {traced_peak / 1e6:.1f} MB\n\n")
+                    for statistic in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+                        output.write(f"{statistic}\n")
+            report["profile"] = {"stage": self.profile_stage, "mode": self.profile_mode, "file": profile_file}
+            written.append(profile_file)
+
+        with open(report_file, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, default=str)
+        return written
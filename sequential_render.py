@@ -0,0 +1,230 @@
+"""
+    Single-pass sequential renderer.
+
+    concatenate_videoclips over many subclips makes every output frame look up
+    its subclip and can force a reader seek at every boundary, so videos with
+    thousands of cuts render far slower than their length suggests. This
+    renderer decodes the source once from start to end through an ffmpeg pipe,
+    drops the frames and audio samples that fall inside cuts and streams the
+    kept frames straight into a single encoder. Memory use and cost do not
+    depend on the number of cuts.
+"""
+
+import os
+import wave
+import shutil
+import tempfile
+import subprocess
+
+import numpy as np
+
+import ffmpeg_tools
+import progress
+
+
+# Audio is decoded and re-encoded at this rate and channel count
+AUDIO_RATE = 44100
+AUDIO_CHANNELS = 2
+
+# Audio frames read from the decoder pipe at a time
+AUDIO_BLOCK_FRAMES = 65536
+
+
+def frame_ranges(keep_ranges, fps):
+    """ Kept ranges as [first_frame, end_frame) frame indices.
+
+    A frame is kept when its timestamp lies inside a kept range, so every range
+    maps to a whole number of frames and the audio can follow exactly.
+    """
+    ranges = []
+    for start, end in keep_ranges:
+        first, last = int(np.ceil(start * fps - 1e-6)), int(np.ceil(end * fps - 1e-6))
+        if last > first:
+            ranges.append((first, last))
+    return ranges
+
+
+def _seek_args(seek):
+    """ Input seek arguments for ffmpeg, starting a tiny bit early so the frame at seek is never skipped """
+    return ["-ss", ffmpeg_tools.format_time(seek - 0.0005)] if seek > 0 else []
+
+
+def _ffmpeg_log(decoder_log):
+    """ What an ffmpeg process wrote to its log (at loglevel error, empty when nothing went wrong) """
+    decoder_log.seek(0)
+    return decoder_log.read().decode(errors="replace").strip()
+
+
+def _write_kept_audio(video_file, audio_file, sample_ranges, seek=0.0):
+    """ Decode the audio once and write only the kept sample ranges (counted from seek) to a WAV file """
+    command = [ffmpeg_tools.ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin"] + _seek_args(seek) + [
+               "-i", video_file, "-vn", "-ac", str(AUDIO_CHANNELS), "-ar", str(AUDIO_RATE),
+               "-f", "s16le", "pipe:1"]
+    frame_bytes = 2 * AUDIO_CHANNELS
+
+    with tempfile.TemporaryFile() as decoder_log, wave.open(audio_file, "wb") as output:
+        decoder = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=decoder_log)
+        output.setnchannels(AUDIO_CHANNELS)
+        output.setsampwidth(2)
+        output.setframerate(AUDIO_RATE)
+
+        position = 0 # Index of the first audio frame in the current block
+        range_index = 0
+        written = 0
+        reached_end = False # The decoder ran out of audio before the last kept range
+        try:
+            while range_index < len(sample_ranges):
+                block = decoder.stdout.read(AUDIO_BLOCK_FRAMES * frame_bytes)
+                if not block:
+                    reached_end = True
+                    break
+                block_frames = len(block) // frame_bytes
+                block_end = position + block_frames
+
+                # Copy every part of the block that lies inside a kept range
+                while range_index < len(sample_ranges) and sample_ranges[range_index][0] < block_end:
+                    first, last = sample_ranges[range_index]
+                    copy_start, copy_end = max(first, position), min(last, block_end)
+                    if copy_end > copy_start:
+                        output.writeframes(block[(copy_start - position) * frame_bytes:(copy_end - position) * frame_bytes])
+                        written += copy_end - copy_start
+                    if last > block_end:
+                        break # The range continues in the next block
+                    range_index += 1
+                position = block_end
+        finally:
+            # The rest of the audio is not needed once the last kept range is written
+            decoder.stdout.close()
+            if not reached_end:
+                decoder.kill()
+            decoder.wait()
+
+        # A decoder that stopped on its own must have reached the end of the audio, not failed. A
+        # truncated file ends with an error in the log even when ffmpeg exits normally
+        if reached_end and (decoder.returncode != 0 or _ffmpeg_log(decoder_log)):
+            raise RuntimeError(f"ffmpeg audio decoder failed after {written} of the kept audio frames: "
+                               f"{_ffmpeg_log(decoder_log) or f'exit code {decoder.returncode}'}")
+
+        # Pad with silence if the audio track ended before the last kept video frame
+        missing = sum(last - first for first, last in sample_ranges) - written
+        if missing > 0:
+            output.writeframes(b"\x00" * (missing * frame_bytes))
+
+
+def sample_ranges(ranges, fps):
+    """ Audio sample ranges matching frame ranges """
+    return [(int(round(first * AUDIO_RATE / fps)), int(round(last * AUDIO_RATE / fps))) for first, last in ranges]
+
+
+def encode_frames(video_file, output_file, ranges, fps, size, audio_file=None, progress_callback=None,
+                  seek=0.0, threads=None, profile=None):
+    """ Decode video_file from seek onwards and encode only the frames inside ranges (frame indices
+    counted from seek) into output_file, muxed with audio_file when given. Returns the frames written.
+    The encoder settings come from profile (an encoder_profiles.EncoderProfile) when given.
+    """
+    width, height = size
+    total_kept = sum(last - first for first, last in ranges)
+
+    # yuv420p halves the bytes moved through the pipes, but needs even dimensions
+    pix_fmt = "yuv420p" if width % 2 == 0 and height % 2 == 0 else "rgb24"
+    frame_bytes = width * height * 3 // 2 if pix_fmt == "yuv420p" else width * height * 3
+
+    ffmpeg = ffmpeg_tools.ffmpeg_binary()
+    decoder_command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin"] + _seek_args(seek) + [
+                       "-i", video_file, "-an", "-f", "rawvideo", "-pix_fmt", pix_fmt, "-s", f"{width}x{height}",
+                       "-r", str(fps), "pipe:1"]
+    encoder_command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                       "-f", "rawvideo", "-pix_fmt", pix_fmt, "-s", f"{width}x{height}", "-r", str(fps), "-i", "pipe:0"]
+    if audio_file is not None:
+        encoder_command += ["-i", audio_file, "-map", "0:v", "-map", "1:a"]
+        encoder_command += profile.audio_args() if profile is not None else ["-c:a", "aac"]
+    encoder_command += profile.video_args() if profile is not None else ["-c:v", "libx264"]
+    if pix_fmt != "yuv420p":
+        # x264 cannot store 4:2:0 at odd dimensions, a black row or column makes them even
+        encoder_command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+    encoder_command += ["-pix_fmt", "yuv420p"]
+    threads = threads or (profile.threads if profile is not None else None)
+    if threads:
+        encoder_command += ["-threads", str(threads)]
+    encoder_command.append(output_file)
+
+    with tempfile.TemporaryFile() as decoder_log, tempfile.TemporaryFile() as encoder_log:
+        decoder = subprocess.Popen(decoder_command, stdout=subprocess.PIPE, stderr=decoder_log)
+        encoder = subprocess.Popen(encoder_command, stdin=subprocess.PIPE, stderr=encoder_log)
+
+        stage = progress.Stage(progress_callback, "Encoding frames", 90, 99, total=total_kept,
+                               unit="frames", rate_unit="fps")
+        frame_index = 0
+        range_index = 0
+        written = 0
+        reached_end = False # The decoder ran out of frames before the last kept range
+        try:
+            while range_index < len(ranges):
+                frame = decoder.stdout.read(frame_bytes)
+                if len(frame) < frame_bytes:
+                    reached_end = True
+                    break
+
+                # Move past the kept ranges that are already behind us
+                while range_index < len(ranges) and frame_index >= ranges[range_index][1]:
+                    range_index += 1
+                if range_index < len(ranges) and frame_index >= ranges[range_index][0]:
+                    try:
+                        encoder.stdin.write(frame)
+                    except OSError: # BrokenPipeError: the encoder quit, its log says why
+                        break
+                    written += 1
+                    stage.update(written)
+                frame_index += 1
+        finally:
+            # Stop decoding (the rest of the video may be cut) and let the encoder finish the file
+            decoder.stdout.close()
+            if not reached_end:
+                decoder.kill()
+            decoder.wait()
+            try:
+                encoder.stdin.close()
+            except OSError:
+                pass # The encoder already quit
+            encoder.wait()
+
+        # A decoder that stopped on its own must have reached the end of the video, not failed. A
+        # truncated file ends with an error in the log even when ffmpeg exits normally, while a clean
+        # end before the last kept frame is a video stream shorter than the container (longer audio)
+        error = None
+        if encoder.returncode != 0:
+            error = f"ffmpeg encoder failed: {_ffmpeg_log(encoder_log) or f'exit code {encoder.returncode}'}"
+        elif reached_end and (decoder.returncode != 0 or _ffmpeg_log(decoder_log)):
+            error = (f"ffmpeg video decoder failed after {written} of the {total_kept} kept frames: "
+                     f"{_ffmpeg_log(decoder_log) or f'exit code {decoder.returncode}'}")
+        if error is not None:
+            # Never leave a partial video behind that looks like a result
+            try:
+                os.remove(output_file)
+            except OSError:
+                pass
+            raise RuntimeError(error)
+
+    return written
+
+
+def render_sequential(video_file, output_file, keep_ranges, fps, size, has_audio=True, progress_callback=None,
+                      profile=None):
+    """ Render the kept ranges of video_file into output_file in one sequential pass """
+    ranges = frame_ranges(keep_ranges, fps)
+
+    work_dir = tempfile.mkdtemp(prefix="sequential_render_")
+    try:
+        # The audio of the kept frames, sample-aligned to the video frames
+        audio_file = None
+        if has_audio:
+            audio_file = os.path.join(work_dir, "kept_audio.wav")
+            _write_kept_audio(video_file, audio_file, sample_ranges(ranges, fps))
+
+        written = encode_frames(video_file, output_file, ranges, fps, size, audio_file, progress_callback,
+                                profile=profile)
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {"kept_frames": written, "frame_ranges": len(ranges)}
@@ -0,0 +1,334 @@
+"""
+    Vectorized silence detection.
+
+    pydub's detect_silence(seek_step=1) slides a min_silence_len window one
+    millisecond at a time and computes the RMS of every slice in Python, which
+    takes minutes on hour-long recordings. This module computes the energy of
+    every millisecond once with NumPy, turns it into window sums with a
+    cumulative sum and finds the silent runs with array operations. The
+    results are the same [start, end] ranges pydub returns.
+
+    Run "python silence.py some_audio.wav" to compare both detectors on a file.
+"""
+
+import sys
+import time
+import wave
+
+import numpy as np
+
+
+# Milliseconds of audio summed per block while building the envelope (bounds the temporary memory)
+ENVELOPE_BLOCK_MS = 60000
+
+# Quietest loudness stored in a loudness envelope, digital silence is clamped to this (dBFS)
+ENVELOPE_FLOOR_DB = -120.0
+
+# Milliseconds of envelope checked for silence at a time (10 minutes)
+TRACKER_BLOCK_MS = 600000
+
+
+def read_wav(audio_file):
+    """ Read a PCM WAV file into a (frames, channels) integer array.
+
+    Returns (samples, frame_rate, sample_width).
+    """
+    with wave.open(audio_file, "rb") as wav:
+        frame_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        data = wav.readframes(wav.getnframes())
+
+    dtypes = {2: "<i2", 4: "<i4"}
+    if sample_width not in dtypes:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width * 8} bits")
+
+    samples = np.frombuffer(data, dtype=dtypes[sample_width]).reshape(-1, channels)
+    return samples, frame_rate, sample_width
+
+
+def _as_frames(samples):
+    """ Make sure samples are shaped (frames, channels) """
+    samples = np.asarray(samples)
+    return samples.reshape(-1, 1) if samples.ndim == 1 else samples
+
+
+def duration_ms(samples, frame_rate):
+    """ Length of the audio in whole milliseconds, rounded the way pydub's len() does """
+    return int(round(1000 * len(_as_frames(samples)) / frame_rate))
+
+
+def ms_edges(length_ms, frame_rate):
+    """ First frame of every millisecond (pydub's ms -> frame conversion), length_ms + 1 entries """
+    return (np.arange(length_ms + 1, dtype=np.float64) * frame_rate / 1000.0).astype(np.int64)
+
+
+def _frame_energy(frames, accumulator):
+    """ Sum of squared samples across the channels of every frame """
+    frames = frames.astype(accumulator)
+    return np.einsum("ij,ij->i", frames, frames)
+
+
+def energy_envelope(samples, frame_rate, length_ms=None):
+    """ Sum of squared samples (over all channels) in every millisecond of audio.
+
+    Integer PCM is summed exactly in int64, float PCM in float64.
+    """
+    samples = _as_frames(samples)
+    length_ms = duration_ms(samples, frame_rate) if length_ms is None else length_ms
+    edges = np.minimum(ms_edges(length_ms, frame_rate), len(samples))
+    accumulator = np.float64 if np.issubdtype(samples.dtype, np.floating) else np.int64
+    envelope = np.zeros(length_ms, dtype=accumulator)
+
+    # Square and sum the audio a block at a time so the temporary arrays stay small
+    for block_start in range(0, length_ms, ENVELOPE_BLOCK_MS):
+        block_end = min(block_start + ENVELOPE_BLOCK_MS, length_ms)
+        first_frame, last_frame = edges[block_start], edges[block_end]
+        if last_frame <= first_frame:
+            continue
+
+        # Sum of squares across the channels, with a trailing 0 so every offset below is a valid index
+        frame_energy = np.append(_frame_energy(samples[first_frame:last_frame], accumulator), 0)
+
+        # reduceat sums between consecutive offsets, empty milliseconds are set back to 0 afterwards
+        offsets = edges[block_start:block_end] - first_frame
+        non_empty = offsets < (edges[block_start + 1:block_end + 1] - first_frame)
+        sums = np.add.reduceat(frame_energy, offsets)
+        envelope[block_start:block_end] = np.where(non_empty, sums, 0)
+
+    return envelope
+
+
+def max_possible_amplitude(sample_width):
+    """ Largest sample value for the given sample width (bytes) """
+    return 2 ** (sample_width * 8) / 2
+
+
+def _rms(energy, sample_count, integer):
+    """ RMS from summed energy, truncated to an integer like audioop.rms does for integer PCM """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rms = np.sqrt(np.where(sample_count > 0, energy / np.maximum(sample_count, 1), 0))
+    return np.floor(rms) if integer else rms
+
+
+def dbfs(samples, sample_width=2):
+    """ Average loudness of the whole recording (same value as AudioSegment.dBFS) """
+    samples = _as_frames(samples)
+    integer = not np.issubdtype(samples.dtype, np.floating)
+    accumulator = np.float64 if not integer else np.int64
+    block_frames = ENVELOPE_BLOCK_MS * 48 # A minute of 48 kHz audio per block
+    energy = sum(_frame_energy(samples[start:start + block_frames], accumulator).sum()
+                 for start in range(0, len(samples), block_frames))
+    rms = float(_rms(np.float64(energy), samples.size, integer))
+    if not rms:
+        return -float("inf")
+    return 20 * np.log10(rms / max_possible_amplitude(sample_width))
+
+
+def detect_silence(samples, frame_rate, min_silence_len=1000, silence_thresh=-16, seek_step=1, sample_width=2):
+    """ Drop-in replacement for pydub.silence.detect_silence working on a NumPy array.
+
+    Returns a list of [start, end] silent ranges in milliseconds.
+    """
+    samples = _as_frames(samples)
+    channels = samples.shape[1]
+    integer = not np.issubdtype(samples.dtype, np.floating)
+    min_silence_len = int(min_silence_len)
+    seg_len = duration_ms(samples, frame_rate)
+
+    # You can't have a silent portion of a sound that is longer than the sound
+    if seg_len < min_silence_len:
+        return []
+
+    # Convert the silence threshold to the same amplitude scale as the RMS
+    silence_thresh = 10 ** (silence_thresh / 20) * max_possible_amplitude(sample_width)
+
+    slice_starts = _window_starts(seg_len, min_silence_len, seek_step)
+
+    # Energy of every window from the cumulative per-millisecond energy
+    cumulative = np.concatenate(([0], np.cumsum(energy_envelope(samples, frame_rate, seg_len))))
+    window_energy = cumulative[slice_starts + min_silence_len] - cumulative[slice_starts]
+
+    # pydub pads windows past the end with silent frames, so the sample count uses the unclipped edges
+    edges = ms_edges(seg_len, frame_rate)
+    sample_count = (edges[slice_starts + min_silence_len] - edges[slice_starts]) * channels
+
+    silence_starts = slice_starts[_rms(window_energy, sample_count, integer) <= silence_thresh]
+
+    return _silent_ranges(silence_starts, seek_step, min_silence_len)
+
+
+def _window_starts(seg_len, min_silence_len, seek_step):
+    """ Window start positions (ms), making sure the last possible window is checked too """
+    last_slice_start = seg_len - min_silence_len
+    slice_starts = np.arange(0, last_slice_start + 1, seek_step)
+    if last_slice_start % seek_step:
+        slice_starts = np.append(slice_starts, last_slice_start)
+    return slice_starts
+
+
+def _silent_ranges(silence_starts, seek_step, min_silence_len):
+    """ Combine the starts of silent windows into [start, end] ranges (ms) the way pydub does """
+    # Short circuit when there is no silence
+    if len(silence_starts) == 0:
+        return []
+
+    # Start a new range wherever two silent windows are neither consecutive nor overlapping
+    steps = np.diff(silence_starts)
+    breaks = np.flatnonzero((steps != seek_step) & (steps > min_silence_len))
+    range_starts = silence_starts[np.concatenate(([0], breaks + 1))]
+    range_ends = silence_starts[np.concatenate((breaks, [len(silence_starts) - 1]))] + min_silence_len
+
+    return [[int(start), int(end)] for start, end in zip(range_starts, range_ends)]
+
+
+def detect_silences(samples, frame_rate, min_silence_len, quiet_threshold, sample_width=2):
+    """ Silent intervals in seconds, with the threshold relative to the recording's average loudness """
+    silence_thresh = dbfs(samples, sample_width) + quiet_threshold
+    silent_ranges = detect_silence(samples, frame_rate, min_silence_len, silence_thresh, 1, sample_width)
+    return [(start / 1000, end / 1000) for start, end in silent_ranges]
+
+
+def loudness_envelope(samples, frame_rate, sample_width=2):
+    """ Loudness of every millisecond in dBFS, as a compact float16 array.
+
+    This is all silence detection needs, so keeping it around lets the cut list
+    be recomputed for new slider values without touching the audio again.
+    """
+    samples = _as_frames(samples)
+    length_ms = duration_ms(samples, frame_rate)
+    energy = energy_envelope(samples, frame_rate, length_ms).astype(np.float64)
+    sample_count = np.diff(np.minimum(ms_edges(length_ms, frame_rate), len(samples))) * samples.shape[1]
+
+    mean_square = energy / np.maximum(sample_count, 1)
+    with np.errstate(divide="ignore"):
+        loudness = 10 * np.log10(mean_square / max_possible_amplitude(sample_width) ** 2)
+    return np.maximum(loudness, ENVELOPE_FLOOR_DB).astype(np.float16)
+
+
+def _envelope_power(envelope):
+    """ Linear power of every millisecond of a float16 envelope, looked up from a table of all float16 values """
+    global _POWER_TABLE
+    if _POWER_TABLE is None:
+        all_values = np.arange(1 << 16, dtype=np.uint16).view(np.float16).astype(np.float64)
+        with np.errstate(over="ignore", invalid="ignore"):
+            _POWER_TABLE = 10 ** (all_values / 10)
+    return _POWER_TABLE[np.asarray(envelope, dtype=np.float16).view(np.uint16)]
+
+_POWER_TABLE = None
+
+
+class SilenceTracker():
+    """ Finds silent ranges in a loudness envelope that arrives in blocks.
+
+    Every min_silence_len window (one per millisecond, like seek_step=1) is
+    checked exactly once: the last min_silence_len - 1 ms of a block are kept
+    until the next block completes their windows, and a silent range that is
+    still open at the end of a block carries over. Memory only depends on the
+    block size, not on the length of the recording.
+    """
+
+    def __init__(self, min_silence_len, silence_thresh):
+        self.min_silence_len = int(min_silence_len)
+        # Compare the windows' summed power against the threshold in the linear domain
+        self.thresh_energy = 10 ** (silence_thresh / 10) * self.min_silence_len
+        self.ranges = []
+        self._tail = np.zeros(0) # Power of the milliseconds whose windows are not complete yet
+        self._offset = 0 # Millisecond the tail starts at
+        self._range_start = None # Start of the silent range still open
+        self._last_start = None # Last silent window start seen
+
+    def feed(self, envelope_block):
+        """ Add the next block of the envelope """
+        if self.min_silence_len <= 0:
+            return
+        power = np.concatenate((self._tail, _envelope_power(envelope_block)))
+        window_count = len(power) - self.min_silence_len + 1
+        if window_count <= 0:
+            self._tail = power
+            return
+
+        cumulative = np.concatenate(([0.0], np.cumsum(power)))
+        window_energy = cumulative[self.min_silence_len:] - cumulative[:-self.min_silence_len]
+        self._add_starts(np.flatnonzero(window_energy <= self.thresh_energy) + self._offset)
+        self._tail = power[window_count:]
+        self._offset += window_count
+
+    def _add_starts(self, silence_starts):
+        """ Merge silent window starts into ranges, the same way _silent_ranges does for seek_step=1 """
+        if len(silence_starts) == 0:
+            return
+        if self._range_start is not None and silence_starts[0] - self._last_start > self.min_silence_len:
+            self._close()
+        if self._range_start is None:
+            self._range_start = int(silence_starts[0])
+
+        for index in np.flatnonzero(np.diff(silence_starts) > self.min_silence_len):
+            self._last_start = int(silence_starts[index])
+            self._close()
+            self._range_start = int(silence_starts[index + 1])
+        self._last_start = int(silence_starts[-1])
+
+    def _close(self):
+        self.ranges.append([self._range_start, self._last_start + self.min_silence_len])
+        self._range_start = None
+
+    def finish(self):
+        """ Close the last range and return every [start, end] range in ms """
+        if self._range_start is not None:
+            self._close()
+        return self.ranges
+
+
+def detect_silence_from_envelope(envelope, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+    """ detect_silence() working on a loudness_envelope() instead of the samples.
+
+    Every millisecond is weighted the same, which is exact for 16 kHz audio and
+    within a fraction of a dB otherwise. Returns [start, end] ranges in ms.
+    """
+    min_silence_len = int(min_silence_len)
+    seg_len = len(envelope)
+    if seg_len < min_silence_len or min_silence_len <= 0:
+        return []
+
+    if seek_step == 1:
+        # Go through the envelope a block at a time so the temporary arrays stay small
+        tracker = SilenceTracker(min_silence_len, silence_thresh)
+        for block_start in range(0, seg_len, TRACKER_BLOCK_MS):
+            tracker.feed(envelope[block_start:block_start + TRACKER_BLOCK_MS])
+        return tracker.finish()
+
+    slice_starts = _window_starts(seg_len, min_silence_len, seek_step)
+    cumulative = np.concatenate(([0.0], np.cumsum(_envelope_power(envelope))))
+    window_energy = cumulative[slice_starts + min_silence_len] - cumulative[slice_starts]
+    thresh_energy = 10 ** (silence_thresh / 10) * min_silence_len
+    return _silent_ranges(slice_starts[window_energy <= thresh_energy], seek_step, min_silence_len)
+
+
+def detect_silences_from_envelope(envelope, average_dbfs, min_silence_len, quiet_threshold):
+    """ Silent intervals in seconds from a loudness envelope, relative to the average loudness """
+    silent_ranges = detect_silence_from_envelope(envelope, min_silence_len, average_dbfs + quiet_threshold)
+    return [(start / 1000, end / 1000) for start, end in silent_ranges]
+
+
+if __name__ == "__main__":
+    # Compare against pydub on a real file: python silence.py audio.wav [min_silence_ms] [threshold_db]
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence as pydub_detect_silence
+
+    audio_file = sys.argv[1]
+    min_silence_len = int(sys.argv[2]) if len(sys.argv) > 2 else 650
+    quiet_threshold = float(sys.argv[3]) if len(sys.argv) > 3 else -21
+
+    samples, frame_rate, sample_width = read_wav(audio_file)
+    start = time.time()
+    fast = detect_silence(samples, frame_rate, min_silence_len, dbfs(samples, sample_width) + quiet_threshold, 1, sample_width)
+    fast_time = time.time() - start
+
+    audio = AudioSegment.from_wav(audio_file)
+    start = time.time()
+    slow = pydub_detect_silence(audio, min_silence_len, audio.dBFS + quiet_threshold, 1)
+    slow_time = time.time() - start
+
+    print(f"NumPy: {len(fast)} ranges in {fast_time:.3f} s, pydub: {len(slow)} ranges in {slow_time:.3f} s")
+    print("Identical" if fast == slow else "DIFFERENT")
@@ -0,0 +1,161 @@
+"""
+    Keyframe-aware "smart render" output mode.
+
+    Instead of decoding and re-encoding every kept frame, each kept range is
+    split at the keyframes inside it. The part between the first and the last
+    keyframe is stream copied (the compressed packets are copied as they are)
+    and only the short spans before the first keyframe and after the last one
+    are re-encoded. All the pieces are joined with the ffmpeg concat demuxer,
+    again without re-encoding.
+"""
+
+import os
+import bisect
+import shutil
+import tempfile
+
+import ffmpeg_tools
+import progress
+
+
+# Kept ranges whose copyable middle part is shorter than this are simply re-encoded (s)
+MIN_COPY_SECONDS = 1.0
+
+# Re-encoded pieces shorter than this are dropped, they would be less than a frame long (s)
+MIN_PIECE_SECONDS = 0.001
+
+# Video codecs we can re-encode to so the pieces match the stream copied parts
+ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+
+
+class SmartRenderUnsupported(Exception):
+    """ Raised when the input cannot be smart rendered (the caller should fall back to a full encode) """
+
+
+def plan_pieces(keep_ranges, keyframes, min_copy=MIN_COPY_SECONDS):
+    """ Split the kept ranges into (start, end, "copy" | "encode") pieces.
+
+    A range is copied from its first keyframe to its last keyframe; the head
+    before the first keyframe and the tail after the last one are re-encoded.
+    """
+    pieces = []
+    for start, end in keep_ranges:
+        first = bisect.bisect_left(keyframes, start) # First keyframe at or after the start
+        last = bisect.bisect_right(keyframes, end) - 1 # Last keyframe at or before the end
+        copy_start = keyframes[first] if first < len(keyframes) else None
+        copy_end = keyframes[last] if last >= 0 else None
+
+        # Not enough whole GOPs inside the range, re-encode the whole thing
+        if copy_start is None or copy_end is None or copy_end - copy_start < min_copy:
+            pieces.append((start, end, "encode"))
+            continue
+
+        if copy_start - start > MIN_PIECE_SECONDS:
+            pieces.append((start, copy_start, "encode"))
+        pieces.append((copy_start, copy_end, "copy"))
+        if end - copy_end > MIN_PIECE_SECONDS:
+            pieces.append((copy_end, end, "encode"))
+
+    return pieces
+
+
+def _encode_options(video_stream, audio_stream):
+    """ Encoder options that make re-encoded pieces match the source streams """
+    codec = video_stream.get("codec_name")
+    if codec not in ENCODERS:
+        raise SmartRenderUnsupported(f"Smart render does not support {codec} video")
+    if audio_stream is not None and audio_stream.get("codec_name") != "aac":
+        raise SmartRenderUnsupported(f"Smart render does not support {audio_stream.get('codec_name')} audio")
+
+    options = [
+        "-c:v", ENCODERS[codec],
+        "-preset", "veryfast",
+        "-crf", "18", # Visually close to the copied parts around it
+        "-pix_fmt", video_stream.get("pix_fmt", "yuv420p"),
+        "-r", video_stream.get("r_frame_rate", "30/1"),
+    ]
+    if audio_stream is not None:
+        options += [
+            "-c:a", "aac",
+            "-ar", audio_stream.get("sample_rate", "48000"),
+            "-ac", str(audio_stream.get("channels", 2)),
+        ]
+        if audio_stream.get("bit_rate"):
+            options += ["-b:a", audio_stream["bit_rate"]]
+    return options
+
+
+def frames_between(frame_times, start, end):
+    """ Number of frames whose presentation time falls in [start, end) """
+    epsilon = 1e-4 # Tolerate rounding in the probed timestamps
+    return bisect.bisect_left(frame_times, end - epsilon) - bisect.bisect_left(frame_times, start - epsilon)
+
+
+def render_smart(video_file, output_file, keep_ranges, progress_callback=None, frame_times=None, keyframes=None):
+    """ Write output_file from the kept ranges of video_file, copying whole GOPs where possible.
+
+    Returns a dictionary with the number of copied and re-encoded pieces and their durations.
+    Raises SmartRenderUnsupported when the input codecs cannot be matched.
+    """
+    try:
+        info = ffmpeg_tools.probe(video_file)
+    except FileNotFoundError:
+        raise SmartRenderUnsupported("ffprobe was not found next to ffmpeg or on the PATH")
+    video_stream = ffmpeg_tools.first_stream(info, "video")
+    audio_stream = ffmpeg_tools.first_stream(info, "audio")
+    if video_stream is None:
+        raise SmartRenderUnsupported("Input has no video stream")
+    encode_options = _encode_options(video_stream, audio_stream)
+
+    if frame_times is None or keyframes is None:
+        frame_times, keyframes = ffmpeg_tools.probe_video_packets(video_file, ffmpeg_tools.start_time(info))
+    pieces = plan_pieces(keep_ranges, keyframes)
+    stream_maps = ["-map", "0:v:0"] + (["-map", "0:a:0"] if audio_stream is not None else [])
+
+    stage = progress.Stage(progress_callback, "Smart render", 90, 99,
+                           total=sum(end - start for start, end, _ in pieces), unit="s", rate_unit="x realtime")
+    rendered = 0.0 # Seconds of output written so far
+
+    work_dir = tempfile.mkdtemp(prefix="smart_render_")
+    try:
+        piece_files = []
+        for index, (start, end, mode) in enumerate(pieces):
+            piece_file = os.path.join(work_dir, f"piece_{index:05d}.ts")
+
+            if mode == "copy":
+                # Seek slightly past the keyframe so rounding never lands on the previous one.
+                # Copied packets are in decode order, so -t alone would let a few reordered frames
+                # past the end through; counting the frames stops exactly at the next keyframe.
+                args = ["-ss", ffmpeg_tools.format_time(start + 0.0005), "-i", video_file,
+                        "-t", ffmpeg_tools.format_time(end - start),
+                        "-frames:v", frames_between(frame_times, start, end)] + stream_maps + ["-c", "copy"]
+            else:
+                args = ["-ss", ffmpeg_tools.format_time(start), "-i", video_file,
+                        "-t", ffmpeg_tools.format_time(end - start)] + stream_maps + encode_options
+
+            ffmpeg_tools.run_ffmpeg(args + ["-avoid_negative_ts", "make_zero", "-f", "mpegts", piece_file])
+            piece_files.append(piece_file)
+
+            rendered += end - start
+            stage.update(rendered, f"piece {index + 1}/{len(pieces)} ({mode})")
+
+        # Join the pieces without re-encoding
+        list_file = os.path.join(work_dir, "pieces.txt")
+        with open(list_file, "w", encoding="utf-8") as listing:
+            for piece_file in piece_files:
+                listing.write(f"file '{piece_file}'\n")
+
+        concat_args = ["-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy"]
+        if audio_stream is not None:
+            concat_args += ["-bsf:a", "aac_adtstoasc"]
+        ffmpeg_tools.run_ffmpeg(concat_args + ["-movflags", "+faststart", output_file])
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "copied_pieces": sum(1 for piece in pieces if piece[2] == "copy"),
+        "encoded_pieces": sum(1 for piece in pieces if piece[2] == "encode"),
+        "copied_seconds": sum(end - start for start, end, mode in pieces if mode == "copy"),
+        "encoded_seconds": sum(end - start for start, end, mode in pieces if mode == "encode"),
+    }
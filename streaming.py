@@ -0,0 +1,150 @@
+"""
+    Bounded-memory streaming analysis.
+
+    Decoding a whole soundtrack into memory takes about 115 MB per hour of
+    16 kHz audio (and twice that again as float32 for Whisper), which is
+    too much for multi-hour recordings. This module reads the PCM from
+    ffmpeg in fixed-size blocks instead and never holds more than a block
+    plus one transcription window.
+
+    The silence threshold is relative to the average loudness of the whole
+    recording, which is only known at the end, so the analysis takes two
+    passes over the audio:
+        1. scan_audio() builds the per-ms loudness envelope, the average
+           loudness and the content hash block by block. Silences are then
+           found on the envelope (2 bytes per ms, silence.SilenceTracker
+           carries open silent runs across its blocks).
+        2. stream_windows() decodes the audio again and hands every packed
+           transcription window to Whisper as soon as it has been read.
+    The results are the same as analysing the fully decoded audio.
+"""
+
+import hashlib
+
+import numpy as np
+
+import audio
+import progress
+import silence
+import transcribe
+
+
+# Seconds of audio read from ffmpeg at a time
+BLOCK_SECONDS = 10.0
+
+
+class AudioScan():
+    """ What the first pass over the audio measures """
+
+    def __init__(self, envelope, average_dbfs, content_hash, sample_count, sample_rate):
+        self.envelope = envelope # Loudness of every millisecond (dBFS, float16)
+        self.average_dbfs = average_dbfs # Average loudness of the whole recording (dBFS)
+        self.content_hash = content_hash # Same value transcript_cache.audio_hash() gives the decoded audio
+        self.sample_count = sample_count
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self):
+        """ Length of the audio in seconds """
+        return self.sample_count / self.sample_rate
+
+
+def _loudness(energy, sample_count):
+    """ dBFS of summed 16-bit energy, the way silence.loudness_envelope() computes it """
+    mean_square = energy.astype(np.float64) / np.maximum(sample_count, 1)
+    with np.errstate(divide="ignore"):
+        loudness = 10 * np.log10(mean_square / silence.max_possible_amplitude(audio.SAMPLE_WIDTH) ** 2)
+    return np.maximum(loudness, silence.ENVELOPE_FLOOR_DB).astype(np.float16)
+
+
+def scan_audio(media_file, sample_rate=audio.SAMPLE_RATE, progress_callback=None, duration=None,
+               block_seconds=BLOCK_SECONDS):
+    """ First pass: loudness envelope, average loudness and content hash of the soundtrack """
+    if sample_rate % 1000:
+        raise ValueError(f"Streaming analysis needs a whole number of samples per ms, not {sample_rate} Hz")
+    samples_per_ms = sample_rate // 1000
+
+    stage = progress.Stage(progress_callback, "Scanning audio", 20, 40, total=duration,
+                           unit="s", rate_unit="x realtime")
+    digest = hashlib.blake2b(digest_size=20)
+    envelope_blocks = []
+    energy = 0 # Sum of squared samples of the whole recording (exact, like silence.dbfs())
+    sample_count = 0
+    leftover = np.zeros(0, dtype=np.int64) # Samples of a millisecond split between two blocks
+
+    for block in audio.iter_pcm_blocks(media_file, sample_rate, block_seconds):
+        digest.update(memoryview(block).cast("B"))
+        sample_count += len(block)
+
+        block = np.concatenate((leftover, block.astype(np.int64)))
+        whole_ms = len(block) // samples_per_ms
+        squares = block[:whole_ms * samples_per_ms] ** 2
+        ms_energy = squares.reshape(whole_ms, samples_per_ms).sum(axis=1)
+        energy += int(ms_energy.sum())
+        envelope_blocks.append(_loudness(ms_energy, samples_per_ms))
+        leftover = block[whole_ms * samples_per_ms:]
+        if progress_callback is not None:
+            stage.update(sample_count / sample_rate)
+
+    # The last partial millisecond counts when the length rounds up to it (silence.duration_ms())
+    partial_energy = int((leftover ** 2).sum())
+    energy += partial_energy
+    if len(leftover) and int(round(1000 * sample_count / sample_rate)) > sample_count // samples_per_ms:
+        envelope_blocks.append(_loudness(np.array([partial_energy]), len(leftover)))
+
+    envelope = np.concatenate(envelope_blocks) if envelope_blocks else np.zeros(0, dtype=np.float16)
+    rms = float(silence._rms(np.float64(energy), sample_count, True))
+    average_dbfs = 20 * np.log10(rms / silence.max_possible_amplitude(audio.SAMPLE_WIDTH)) if rms else -float("inf")
+    return AudioScan(envelope, average_dbfs, digest.hexdigest(), sample_count, sample_rate)
+
+
+def _copy_pieces(packed, pieces, block, block_start, sample_rate):
+    """ Copy the samples of an int16 block that fall inside the window's pieces into its float32 audio,
+    the way transcribe.window_audio() places them. block_start is the index of block[0] in the whole recording """
+    block_end = block_start + len(block)
+    for source_start, source_end, packed_start in pieces:
+        first = int(source_start * sample_rate)
+        low, high = max(first, block_start), min(int(source_end * sample_rate), block_end)
+        offset = int(round(packed_start * sample_rate)) + low - first
+        high = min(high, low + len(packed) - offset) # Clipped to the window like window_audio()
+        if high > low:
+            packed[offset:offset + high - low] = block[low - block_start:high - block_start].astype(np.float32) / 32768.0
+
+
+def stream_windows(media_file, windows, sample_rate=audio.SAMPLE_RATE, block_seconds=BLOCK_SECONDS):
+    """ Second pass: yield the float32 audio of every packed window (see transcribe.pack_windows()) in order.
+
+    The audio of a window (at most a window long) is allocated once the decoder
+    reaches its first piece and the pieces are copied into it as the blocks
+    stream past. The samples between the pieces are never kept, so memory does
+    not grow with the silences a window spans.
+    """
+    spans = [(min(int(start * sample_rate) for start, _, _ in pieces), max(int(end * sample_rate) for _, end, _ in pieces))
+             for pieces in windows]
+    blocks = audio.iter_pcm_blocks(media_file, sample_rate, block_seconds)
+    filling = {} # Float32 audio of the windows the decoder has reached, by index
+    next_window = 0 # First window that has no audio yet
+    position = 0 # Index of the next block's first sample in the whole recording
+
+    try:
+        for index, pieces in enumerate(windows):
+            while position < spans[index][1]:
+                block = next(blocks, None)
+                if block is None:
+                    break
+                block_end = position + len(block)
+                # Windows that start in this block (more than one when their pieces overlap)
+                while next_window < len(windows) and spans[next_window][0] < block_end:
+                    filling[next_window] = np.zeros(transcribe.window_length(windows[next_window], sample_rate),
+                                                    dtype=np.float32)
+                    next_window += 1
+                for window_index, packed in filling.items():
+                    _copy_pieces(packed, windows[window_index], block, position, sample_rate)
+                position = block_end
+
+            packed = filling.pop(index, None)
+            if packed is None: # The audio ended before the window
+                packed = np.zeros(transcribe.window_length(pieces, sample_rate), dtype=np.float32)
+            yield packed
+    finally:
+        blocks.close() # Stops ffmpeg when the transcription ends early
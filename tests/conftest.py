@@ -0,0 +1,32 @@
+""" The modules live in the repository root, next to VideoFillerRemover.py """
+
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def speech_file(tmp_path):
+    """ 12 s of tone bursts of different loudness with pauses of different length between them """
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+    pieces = []
+    for seconds, level in [(1.0, 0.5), (0.8, 0.0), (1.5, 0.3), (1.2, 0.002), (1.0, 0.6), (0.7, 0.0),
+                           (2.0, 0.4), (1.6, 0.0), (1.2, 0.5), (1.0, 0.001)]:
+        count = int(seconds * sample_rate)
+        tone = np.sin(2 * np.pi * 220 * np.arange(count) / sample_rate) * level
+        pieces.append(tone + rng.normal(0, 0.0005, count))
+    samples = (np.clip(np.concatenate(pieces), -1, 1) * 32767).astype(np.int16)
+
+    path = tmp_path / "speech.wav"
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(sample_rate)
+        output.writeframes(samples.tobytes())
+    return str(path)
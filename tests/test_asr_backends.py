@@ -0,0 +1,56 @@
+""" Every transcription goes through the chosen backend, whatever its model looks like """
+
+import pytest
+
+import asr_backends
+import model_cache
+from engine import EngineSettings, FillerRemovalEngine
+
+
+class ScriptedBackend(asr_backends.ASRBackend):
+    """ Backend whose "model" is a plain dict, so only the backend knows how to transcribe with it """
+
+    name = "scripted"
+
+    def __init__(self):
+        self.calls = 0
+
+    def resolve_device(self, device=None):
+        return "cpu"
+
+    def load(self, model_name, device):
+        return {"model": model_name}
+
+    def transcribe(self, model, audio, **options):
+        self.calls += 1
+        words = [{"word": " Um,", "start": 0.1, "end": 0.4}, {"word": " okay", "start": 0.4, "end": 0.9}]
+        segment = {"start": 0.0, "end": 1.0, "text": " Um, okay"}
+        if options.get("word_timestamps"):
+            segment["words"] = words
+        return {"text": segment["text"], "segments": [segment], "language": "en"}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = ScriptedBackend()
+    monkeypatch.setitem(asr_backends.BACKENDS, backend.name, backend)
+    yield backend
+    model_cache.registry.clear()
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        asr_backends.ASRBackend()
+
+
+@pytest.mark.parametrize("options", [
+    {"voiced_only": True},
+    {"voiced_only": False},
+    {"two_pass": True},
+    {"streaming": True},
+])
+def test_engine_transcribes_with_backend(backend, speech_file, options):
+    settings = EngineSettings(asr_backend=backend.name, transcript_cache_mb=0, **dict({"streaming": False}, **options))
+    analysis = FillerRemovalEngine(settings).analyze(speech_file, progress_callback=lambda status, percent: None)
+    assert backend.calls > 0
+    assert analysis.filler_hits(["um"])
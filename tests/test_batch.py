@@ -0,0 +1,39 @@
+""" Batch inputs that share a name still get an output file each """
+
+import os
+
+import batch
+
+
+def test_output_paths_are_unique():
+    inputs = [os.path.join("x", "a.mp4"), os.path.join("x", "a.mov"), os.path.join("y", "a.mp4"),
+              os.path.join("x", "b.mp4"), os.path.join("x", "c.wav"), os.path.join("x", "c.mp3")]
+    paths = batch.output_paths_for(inputs, "out")
+    assert len({os.path.normcase(path) for path in paths}) == len(inputs)
+    assert [os.path.basename(path) for path in paths] == [
+        "a_mp4_trimmed.mp4", "a_mov_trimmed.mp4", "a_mp4_2_trimmed.mp4", "b_trimmed.mp4", "c_trimmed.wav", "c_trimmed.mp3"]
+
+
+def test_names_without_collisions_are_unchanged():
+    inputs = [os.path.join("x", "a.mp4"), os.path.join("y", "b.mov")]
+    assert batch.output_paths_for(inputs, "out") == [batch.output_path_for(video_file, "out") for video_file in inputs]
+
+
+def test_numbered_names_do_not_collide_with_real_ones():
+    inputs = [os.path.join("x", "a.mp4"), os.path.join("y", "a.mp4"), os.path.join("z", "a_mp4.mp4"),
+              os.path.join("z", "a_mp4_2.mp4")]
+    paths = batch.output_paths_for(inputs, "out")
+    assert len({os.path.normcase(path) for path in paths}) == len(inputs)
+
+
+def test_workers_skip_warm_up_when_nothing_is_transcribed(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(batch.model_cache, "warm_up", lambda *args, **kwargs: loaded.append(args))
+    monkeypatch.setattr(batch.model_cache.registry, "memory_budget", batch.model_cache.registry.memory_budget)
+
+    batch._init_worker("tiny", "cpu", 512, None, "acoustic", ("um",))
+    batch._init_worker("tiny", "cpu", 512, None, "whisper", ())
+    assert loaded == []
+
+    batch._init_worker("tiny", "cpu", 512, None, "whisper", ("um",))
+    assert len(loaded) == 1
@@ -0,0 +1,43 @@
+""" Checkpointed stages are only reused while the settings they depend on stay the same """
+
+import engine
+from engine import EngineSettings, FillerRemovalEngine
+
+
+class SegmentModel():
+    """ Stands in for a Whisper model: every window starts with "um okay", counting how often it transcribes """
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        segment = {"start": 0.0, "end": 1.0, "text": " Um, okay."}
+        if options.get("word_timestamps"):
+            segment["words"] = [{"word": " Um,", "start": 0.0, "end": 0.4}, {"word": " okay.", "start": 0.4, "end": 1.0}]
+        return {"text": segment["text"], "segments": [segment], "language": "en"}
+
+
+def transcribe_calls(speech_file, tmp_path, monkeypatch, two_pass):
+    """ Model calls of a run with ("um",) and of a second one with ("like",) on the same checkpoints """
+    model = SegmentModel()
+    monkeypatch.setattr(engine, "get_model", lambda *args, **kwargs: model)
+    calls = []
+    for filler_words in [("um",), ("like",)]:
+        settings = EngineSettings(filler_words=filler_words, two_pass=two_pass, checkpoint_dir=str(tmp_path / "work"),
+                                  transcript_cache_mb=0, streaming=False)
+        before = model.calls
+        FillerRemovalEngine(settings).analyze(speech_file, progress_callback=lambda status, percent: None)
+        calls.append(model.calls - before)
+    return calls
+
+
+def test_transcript_checkpoint_reused_for_new_filler_words(speech_file, tmp_path, monkeypatch):
+    first, second = transcribe_calls(speech_file, tmp_path, monkeypatch, two_pass=False)
+    assert first > 0 and second == 0
+
+
+def test_two_pass_transcript_checkpoint_follows_filler_words(speech_file, tmp_path, monkeypatch):
+    # Two-pass only gives the segments holding the filler words word timings
+    first, second = transcribe_calls(speech_file, tmp_path, monkeypatch, two_pass=True)
+    assert first > 0 and second > 0
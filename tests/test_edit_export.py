@@ -0,0 +1,27 @@
+""" EDL events are whole frames and the record timeline adds up exactly """
+
+import edit_export
+
+
+def events(text):
+    return [line.split()[-4:] for line in text.splitlines() if line[:3].isdigit()]
+
+
+def test_record_timeline_adds_source_frames():
+    # 1.02 s is 30.6 frames: each event is 31 frames long on both sides
+    text = edit_export.edl_text([(0.0, 1.02), (2.0, 3.02), (4.0, 5.02)], 30, "talk", "talk.mp4")
+    assert events(text) == [
+        ["00:00:00:00", "00:00:01:01", "00:00:00:00", "00:00:01:01"],
+        ["00:00:02:00", "00:00:03:01", "00:00:01:01", "00:00:02:02"],
+        ["00:00:04:00", "00:00:05:01", "00:00:02:02", "00:00:03:03"],
+    ]
+
+
+def test_ranges_shorter_than_a_frame_are_left_out():
+    text = edit_export.edl_text([(0.0, 1.0), (1.5, 1.51), (2.0, 3.0)], 25, "talk", "talk.mp4")
+    assert [line[:3] for line in text.splitlines() if line[:3].isdigit()] == ["001", "002"]
+    assert events(text)[1] == ["00:00:02:00", "00:00:03:00", "00:00:01:00", "00:00:02:00"]
+
+
+def test_hours_and_fractional_rates():
+    assert edit_export.frame_timecode(3600 * 30 + 61 * 30 + 7, 29.97) == "01:01:01:07"
@@ -0,0 +1,44 @@
+""" Filler matching with the trie, including words Whisper returns as punctuation only """
+
+import numpy as np
+
+import filler_lexicon
+import live_preview
+
+
+def transcription(*words):
+    """ Whisper-style result with one 0.5 s word after the other """
+    return {"segments": [{"words": [{"word": word, "start": index * 0.5, "end": index * 0.5 + 0.5}
+                                    for index, word in enumerate(words)]}]}
+
+
+def test_single_words_and_phrases():
+    lexicon = filler_lexicon.FillerLexicon(["um", "you know", "you"])
+    tokens = ["so", "um", "you", "know", "it", "you", "see"]
+    assert list(lexicon.matches(tokens)) == [("um", 1, 1), ("you know", 2, 3), ("you", 5, 5)]
+
+
+def test_empty_word_after_filler():
+    lexicon = filler_lexicon.FillerLexicon(["um", "you know"])
+    assert list(lexicon.matches(["um", "", "so"])) == [("um", 0, 0)]
+    assert list(lexicon.matches(["you", "know", ""])) == [("you know", 0, 1)]
+    assert list(lexicon.matches(["", "um"])) == [("um", 1, 1)]
+
+
+def test_phrase_across_punctuation_word():
+    lexicon = filler_lexicon.FillerLexicon(["you know"])
+    assert list(lexicon.matches(["you", "", "know"])) == [("you know", 0, 2)]
+
+
+def test_contains():
+    lexicon = filler_lexicon.FillerLexicon(["um", "you know"])
+    assert lexicon.contains("Well, um - right.")
+    assert lexicon.contains("You know, it works")
+    assert not lexicon.contains("Nothing here -")
+    assert not filler_lexicon.FillerLexicon([])
+
+
+def test_preview_filler_hits_with_punctuation_word():
+    analysis = live_preview.Analysis(None, 3.0, np.zeros(3000, dtype=np.float16), -20.0,
+                                     transcription(" Um", " -", " so", " you", " know", "."))
+    assert analysis.filler_hits(["um", "you know"]) == [("um", 0.0, 0.5), ("you know", 1.5, 2.5)]
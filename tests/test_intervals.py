@@ -0,0 +1,99 @@
+""" Interval algebra checked against a brute-force reference on a grid of whole seconds """
+
+import numpy as np
+import pytest
+
+import intervals
+
+
+DURATION = 60
+
+
+def random_intervals(rng, count, low=-10, high=DURATION + 10):
+    """ Random intervals with whole second bounds, some empty, some out of [0, DURATION] """
+    starts = rng.integers(low, high, count)
+    return np.column_stack((starts, starts + rng.integers(-2, 15, count))).astype(float)
+
+
+def coverage(array, low=-30, high=DURATION + 30):
+    """ Which one-second cells [t, t + 1) in [low, high) are covered by any interval """
+    cells = np.zeros(high - low, dtype=bool)
+    for start, end in intervals.as_array(array):
+        if end > start:
+            cells[max(int(start) - low, 0):max(int(end) - low, 0)] = True
+    return cells
+
+
+def runs(cells, low=-30):
+    """ The covered cells as merged (start, end) intervals """
+    result = []
+    for index, covered in enumerate(cells):
+        if covered and result and result[-1][1] == index + low:
+            result[-1] = (result[-1][0], index + low + 1)
+        elif covered:
+            result.append((index + low, index + low + 1))
+    return result
+
+
+def assert_sorted_and_disjoint(array):
+    array = intervals.as_array(array)
+    assert np.all(array[:, 1] > array[:, 0])
+    assert np.all(array[1:, 0] > array[:-1, 1]) # Not even touching
+
+
+@pytest.fixture(params=range(30))
+def rng(request):
+    return np.random.default_rng(request.param)
+
+
+def test_union_covers_exactly_its_inputs(rng):
+    raw = random_intervals(rng, rng.integers(0, 25))
+    merged = intervals.union(raw)
+    assert_sorted_and_disjoint(merged)
+    np.testing.assert_array_equal(coverage(merged), coverage(raw))
+    assert intervals.to_list(merged) == [(float(start), float(end)) for start, end in runs(coverage(raw))]
+
+
+def test_cuts_and_keeps_partition_the_video(rng):
+    raw = random_intervals(rng, rng.integers(0, 25))
+    cuts, keeps = intervals.plan_cuts(raw, DURATION)
+    assert_sorted_and_disjoint(cuts)
+    assert_sorted_and_disjoint(keeps)
+    cut_cells, keep_cells = coverage(cuts), coverage(keeps)
+    assert not np.any(cut_cells & keep_cells)
+    video = coverage([(0, DURATION)])
+    np.testing.assert_array_equal(cut_cells | keep_cells, video)
+    np.testing.assert_array_equal(cut_cells, coverage(raw) & video)
+
+
+@pytest.mark.parametrize("padding", [-2.0, -1.0, 0.0, 1.0, 3.0])
+def test_padding_is_clamped_to_the_video(rng, padding):
+    raw = random_intervals(rng, rng.integers(1, 25))
+    cuts, keeps = intervals.plan_cuts(raw, DURATION, padding=padding)
+    assert cuts.size == 0 or (cuts.min() >= 0.0 and cuts.max() <= DURATION)
+    assert keeps.size == 0 or (keeps.min() >= 0.0 and keeps.max() <= DURATION)
+
+    padded = [(start - padding, end + padding) for start, end in raw]
+    video = coverage([(0, DURATION)])
+    np.testing.assert_array_equal(coverage(cuts), coverage(padded) & video)
+    np.testing.assert_array_equal(coverage(cuts) | coverage(keeps), video)
+
+
+@pytest.mark.parametrize("min_keep_len", [1.0, 2.0, 5.0])
+def test_short_keeps_are_merged_into_cuts(rng, min_keep_len):
+    raw = random_intervals(rng, rng.integers(1, 25))
+    cuts, keeps = intervals.plan_cuts(raw, DURATION, min_keep_len=min_keep_len)
+    assert_sorted_and_disjoint(cuts)
+    assert np.all(keeps[:, 1] - keeps[:, 0] >= min_keep_len)
+
+    # Reference: keep what is not cut and at least min_keep_len long, cut everything else
+    video = coverage([(0, DURATION)])
+    expected_keeps = [(start, end) for start, end in runs(video & ~coverage(raw)) if end - start >= min_keep_len]
+    assert intervals.to_list(keeps) == [(float(start), float(end)) for start, end in expected_keeps]
+    np.testing.assert_array_equal(coverage(cuts), video & ~coverage(expected_keeps))
+
+
+def test_empty_input():
+    cuts, keeps = intervals.plan_cuts([], DURATION, padding=-0.2, min_keep_len=1.0)
+    assert cuts.shape == (0, 2)
+    assert intervals.to_list(keeps) == [(0.0, float(DURATION))]
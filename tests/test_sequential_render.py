@@ -0,0 +1,77 @@
+""" The sequential renderer reports a decode that ends too early instead of writing a short video """
+
+import os
+
+import pytest
+
+import encoder_profiles
+import ffmpeg_tools
+import sequential_render
+
+
+FPS = 25
+SIZE = (160, 120)
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    """ 4 s test pattern with a tone, as Matroska so a truncated copy still decodes up to the cut """
+    path = str(tmp_path / "pattern.mkv")
+    ffmpeg_tools.run_ffmpeg(["-f", "lavfi", "-i", f"testsrc=size={SIZE[0]}x{SIZE[1]}:rate={FPS}:duration=4",
+                             "-f", "lavfi", "-i", "sine=frequency=300:duration=4", "-shortest",
+                             "-c:v", "libx264", "-preset", "ultrafast", "-g", "10", "-c:a", "aac", path])
+    return path
+
+
+def test_renders_every_kept_frame(video_file, tmp_path):
+    result = sequential_render.render_sequential(video_file, str(tmp_path / "out.mp4"), [(0.0, 1.0), (2.0, 4.0)],
+                                                 FPS, SIZE)
+    assert result["kept_frames"] == 75
+
+
+def test_truncated_video_fails(video_file, tmp_path):
+    truncated = str(tmp_path / "truncated.mkv")
+    with open(video_file, "rb") as source, open(truncated, "wb") as output:
+        output.write(source.read(os.path.getsize(video_file) // 2))
+
+    with pytest.raises(RuntimeError):
+        sequential_render.render_sequential(truncated, str(tmp_path / "out.mp4"), [(0.0, 4.0)], FPS, SIZE)
+
+
+def test_unreadable_video_fails(tmp_path):
+    broken = str(tmp_path / "broken.mp4")
+    with open(broken, "wb") as output:
+        output.write(b"not a video" * 100)
+
+    with pytest.raises(RuntimeError, match="decoder failed"):
+        sequential_render.render_sequential(broken, str(tmp_path / "out.mp4"), [(0.0, 4.0)], FPS, SIZE)
+
+
+def test_video_shorter_than_audio_renders(tmp_path):
+    # The container (and so the kept range) lasts as long as the audio, the last second has no frames
+    path = str(tmp_path / "long_audio.mp4")
+    ffmpeg_tools.run_ffmpeg(["-f", "lavfi", "-i", f"testsrc=size={SIZE[0]}x{SIZE[1]}:rate={FPS}:duration=3",
+                             "-f", "lavfi", "-i", "sine=frequency=300:duration=4",
+                             "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", path])
+    result = sequential_render.render_sequential(path, str(tmp_path / "out.mp4"), [(0.0, 4.0)], FPS, SIZE)
+    assert result["kept_frames"] == 75
+
+
+def test_odd_frame_size_renders(tmp_path):
+    # x264 needs even dimensions for 4:2:0, so the encoder pads the frames by a row and a column
+    path = str(tmp_path / "odd.mp4")
+    ffmpeg_tools.run_ffmpeg(["-f", "lavfi", "-i", f"testsrc=size=161x121:rate={FPS}:duration=2",
+                             "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv444p", path])
+    output_file = str(tmp_path / "out.mp4")
+    result = sequential_render.render_sequential(path, output_file, [(0.0, 0.5), (1.0, 2.0)], FPS, (161, 121),
+                                                 has_audio=False)
+    assert result["kept_frames"] == 38
+    assert os.path.getsize(output_file) > 0
+
+
+def test_encoder_failure_raises_and_removes_output(video_file, tmp_path):
+    output_file = str(tmp_path / "out.mp4")
+    profile = encoder_profiles.EncoderProfile("broken", preset="no-such-preset", crf=23)
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        sequential_render.render_sequential(video_file, output_file, [(0.0, 4.0)], FPS, SIZE, profile=profile)
+    assert not os.path.exists(output_file)
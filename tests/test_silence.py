@@ -0,0 +1,64 @@
+""" The vectorized silence detector returns the same ranges as pydub """
+
+import numpy as np
+import pytest
+
+pydub = pytest.importorskip("pydub")
+from pydub.silence import detect_silence as pydub_detect_silence
+
+import silence
+
+
+def synthetic_audio(seconds, frame_rate, channels, seed=0):
+    """ int16 (frames, channels) audio alternating loud noise, quiet noise and digital silence """
+    rng = np.random.default_rng(seed)
+    pieces = []
+    total = int(seconds * frame_rate)
+    while sum(len(piece) for piece in pieces) < total:
+        length = int(rng.uniform(0.05, 0.6) * frame_rate)
+        level = rng.choice([8000.0, 1500.0, 40.0, 0.0])
+        pieces.append(rng.normal(0, level, (length, channels)) if level else np.zeros((length, channels)))
+    return np.clip(np.concatenate(pieces)[:total], -32768, 32767).astype(np.int16)
+
+
+def segment(samples, frame_rate):
+    return pydub.AudioSegment(samples.tobytes(), frame_rate=frame_rate, sample_width=2, channels=samples.shape[1])
+
+
+def assert_same_as_pydub(samples, frame_rate, min_silence_len, threshold, seek_step):
+    audio = segment(samples, frame_rate)
+    silence_thresh = audio.dBFS + threshold
+    expected = pydub_detect_silence(audio, min_silence_len, silence_thresh, seek_step)
+    got = silence.detect_silence(samples, frame_rate, min_silence_len, silence_thresh, seek_step)
+    assert [list(map(int, pair)) for pair in got] == expected
+    assert silence.dbfs(samples) == pytest.approx(audio.dBFS)
+    return expected
+
+
+@pytest.mark.parametrize("frame_rate", [8000, 16000, 22050, 44100])
+@pytest.mark.parametrize("channels", [1, 2])
+def test_matches_pydub(frame_rate, channels):
+    samples = synthetic_audio(3.0, frame_rate, channels, seed=frame_rate + channels)
+    found = [assert_same_as_pydub(samples, frame_rate, min_silence_len, -21, seek_step)
+             for min_silence_len, seek_step in [(100, 1), (250, 1), (250, 10), (650, 7)]]
+    assert found[0] # The audio does have silences
+
+
+def test_all_silent():
+    samples = np.zeros((16000, 1), dtype=np.int16)
+    audio = segment(samples, 16000)
+    expected = pydub_detect_silence(audio, 200, -40, 1)
+    assert silence.detect_silence(samples, 16000, 200, -40, 1) == expected
+
+
+def test_no_silence():
+    samples = (np.sin(np.arange(16000) * 0.05) * 10000).astype(np.int16).reshape(-1, 1)
+    assert_same_as_pydub(samples, 16000, 200, -16, 1)
+    assert silence.detect_silence(samples, 16000, 200, segment(samples, 16000).dBFS - 16, 1) == []
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_shorter_than_window(channels):
+    samples = synthetic_audio(0.15, 16000, channels)
+    assert_same_as_pydub(samples, 16000, 500, -21, 1)
+    assert_same_as_pydub(samples, 16000, 150, -21, 1)
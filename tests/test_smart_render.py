@@ -0,0 +1,59 @@
+""" Smart render cuts at the same place whatever timestamp the input file starts at """
+
+import shutil
+
+import pytest
+
+import ffmpeg_tools
+import smart_render
+
+
+FPS = 25
+OFFSET = 10.0 # Start of the shifted file (s), like a capture or a trimmed copy
+
+has_ffprobe = pytest.mark.skipif(shutil.which(ffmpeg_tools.ffprobe_binary()) is None, reason="ffprobe is not installed")
+
+
+@pytest.fixture
+def shifted_file(tmp_path):
+    """ 4 s test pattern with a tone whose timestamps start at OFFSET """
+    path = str(tmp_path / "shifted.mkv")
+    ffmpeg_tools.run_ffmpeg(["-f", "lavfi", "-i", f"testsrc=size=160x120:rate={FPS}:duration=4",
+                             "-f", "lavfi", "-i", "sine=frequency=300:duration=4", "-shortest",
+                             "-c:v", "libx264", "-preset", "ultrafast", "-g", "25", "-c:a", "aac",
+                             "-output_ts_offset", str(OFFSET), path])
+    return path
+
+
+def test_start_time_prefers_the_container():
+    info = {"format": {"start_time": "11.400000"}, "streams": [{"codec_type": "video", "start_time": "11.480000"}]}
+    assert ffmpeg_tools.start_time(info) == pytest.approx(11.4)
+    assert ffmpeg_tools.start_time({"format": {}, "streams": [{"codec_type": "video", "start_time": "2.5"}]}) == 2.5
+    assert ffmpeg_tools.start_time({"format": {"start_time": "N/A"}, "streams": []}) == 0.0
+
+
+def test_packet_times_count_from_the_start(monkeypatch):
+    monkeypatch.setattr(ffmpeg_tools, "run_ffprobe", lambda args: "11.48,K__\n11.52,___\nN/A,___\n12.48,K__\n")
+    frame_times, keyframes = ffmpeg_tools.probe_video_packets("capture.ts", offset=11.4)
+    assert frame_times == pytest.approx([0.08, 0.12, 1.08])
+    assert keyframes == pytest.approx([0.08, 1.08])
+
+
+@has_ffprobe
+def test_probed_times_of_a_shifted_file(shifted_file):
+    assert ffmpeg_tools.start_time(ffmpeg_tools.probe(shifted_file)) == pytest.approx(OFFSET, abs=0.1)
+
+    frame_times, keyframes = ffmpeg_tools.probe_video_packets(shifted_file)
+    assert len(frame_times) == 4 * FPS
+    assert frame_times[0] == pytest.approx(0.0, abs=0.1)
+    assert frame_times[-1] < 4.0
+    assert keyframes[1] == pytest.approx(1.0, abs=0.1)
+
+
+@has_ffprobe
+def test_shifted_file_renders_the_kept_ranges(shifted_file, tmp_path):
+    output_file = str(tmp_path / "out.mp4")
+    smart_render.render_smart(shifted_file, output_file, [(0.0, 1.5), (2.5, 4.0)])
+
+    info = ffmpeg_tools.probe(output_file)
+    assert float(info["format"]["duration"]) == pytest.approx(3.0, abs=0.15)
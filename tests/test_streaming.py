@@ -0,0 +1,62 @@
+""" The streamed transcription windows match the ones cut from the fully decoded audio """
+
+import wave
+import tracemalloc
+
+import numpy as np
+
+import audio
+import streaming
+import transcribe
+
+
+def write_wav(path, samples, sample_rate=audio.SAMPLE_RATE):
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(sample_rate)
+        output.writeframes(samples.astype(np.int16).tobytes())
+    return str(path)
+
+
+def test_windows_match_decoded_audio(speech_file):
+    decoded = audio.decode_audio(speech_file)
+    samples = decoded.as_float32()
+    regions = [(0.0, 0.9), (1.7, 3.5), (4.6, 5.9), (6.4, 6.5), (8.0, 11.5)]
+    for window_seconds in [30.0, 2.0]:
+        windows = transcribe.pack_windows(regions, window_seconds=window_seconds)
+        expected = [transcribe.window_audio(samples, decoded.sample_rate, pieces) for pieces in windows]
+        # Blocks far shorter than the pieces, so pieces and windows span several of them
+        streamed = list(streaming.stream_windows(speech_file, windows, decoded.sample_rate, block_seconds=0.37))
+        assert len(streamed) == len(expected)
+        for got, want in zip(streamed, expected):
+            np.testing.assert_array_equal(got, want)
+
+
+def test_overlapping_windows(speech_file):
+    # Two-pass aligns segments one per window, and neighbouring segments can overlap
+    decoded = audio.decode_audio(speech_file)
+    windows = [[(1.0, 3.0, 0.0)], [(2.5, 4.0, 0.0)], [(2.9, 3.1, 0.0)], [(11.5, 13.0, 0.0)]]
+    streamed = list(streaming.stream_windows(speech_file, windows, decoded.sample_rate, block_seconds=0.5))
+    for got, pieces in zip(streamed, windows):
+        np.testing.assert_array_equal(got, transcribe.window_audio(decoded.as_float32(), decoded.sample_rate, pieces))
+
+
+def test_memory_does_not_grow_with_gap(tmp_path):
+    # Speech, ten minutes of silence and speech again, packed into one window
+    sample_rate = audio.SAMPLE_RATE
+    gap = 600 * sample_rate
+    tone = (np.sin(np.arange(2 * sample_rate) * 0.1) * 8000).astype(np.int16)
+    media_file = write_wav(tmp_path / "gap.wav", np.concatenate((tone, np.zeros(gap, dtype=np.int16), tone)))
+    windows = transcribe.pack_windows([(0.0, 2.0), (602.0, 604.0)])
+    assert len(windows) == 1
+
+    tracemalloc.start()
+    try:
+        streamed = list(streaming.stream_windows(media_file, windows, sample_rate))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert np.abs(streamed[0]).max() > 0.2
+    # A 10 s block and the window, not the 19 MB of the gap
+    assert peak < 4 * 1024 * 1024
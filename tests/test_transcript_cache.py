@@ -0,0 +1,32 @@
+""" Moving the silence sliders reuses the cached transcript instead of running Whisper again """
+
+import engine
+from engine import EngineSettings, FillerRemovalEngine
+
+
+class CountingModel():
+    """ Stands in for a Whisper model, counting how often it transcribes """
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return {"text": "", "segments": [], "language": "en"}
+
+
+def test_slider_changes_reuse_transcript(speech_file, tmp_path, monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(engine, "get_model", lambda *args, **kwargs: model)
+
+    def analyze(threshold, min_silence):
+        settings = EngineSettings(quiet_threshold=threshold, min_silence_len=min_silence,
+                                  cache_dir=str(tmp_path / "cache"), streaming=False)
+        FillerRemovalEngine(settings).analyze(speech_file, progress_callback=lambda status, percent: None)
+
+    analyze(-21.0, 650)
+    calls = model.calls
+    assert calls > 0
+    for threshold, min_silence in [(-25.0, 650), (-21.0, 900), (-18.0, 300), (-21.0, 650)]:
+        analyze(threshold, min_silence)
+        assert model.calls == calls, f"Whisper ran again at {threshold} dB, {min_silence} ms"
@@ -0,0 +1,122 @@
+"""
+    Preview thumbnails of the cuts.
+
+    Seeking to every cut with get_frame() decodes the video from the nearest
+    keyframe each time and pushes a full size frame through PIL and Tk, which
+    on videos with many cuts costs minutes and floods the GUI. Here all the
+    preview times are gathered first, one ffmpeg process decodes the video
+    forward once at thumbnail size, and a background thread hands the frames
+    to the preview callback at most a few times per second while the video is
+    being rendered.
+"""
+
+import time
+import threading
+import subprocess
+
+import numpy as np
+
+import ffmpeg_tools
+
+
+# Size of the preview frames (the GUI shows them at this size)
+THUMBNAIL_SIZE = (240, 135)
+
+# The preview is updated at most this many times per second
+MAX_UPDATES_PER_SECOND = 4
+
+# Upper limit on the preview times taken from a cut list, spread evenly over the cuts
+MAX_THUMBNAILS = 500
+
+
+def preview_times(cuts, max_count=MAX_THUMBNAILS):
+    """ Sorted times to preview, the middle of every cut (thinned out to at most max_count) """
+    times = sorted((start + end) / 2 for start, end in cuts)
+    if len(times) > max_count:
+        picks = np.linspace(0, len(times) - 1, max_count).round().astype(int)
+        times = [times[index] for index in picks]
+    return times
+
+
+def iter_thumbnails(video_file, times, fps, size=THUMBNAIL_SIZE):
+    """ Yield (time, frame) for every sorted time in a single forward decode at thumbnail size """
+    if not times:
+        return
+    width, height = size
+    frame_bytes = width * height * 3
+
+    # Seek straight to the first preview time, everything before it is not needed
+    offset = max(0.0, times[0] - 1.0)
+    decoder = subprocess.Popen(
+        [ffmpeg_tools.ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin",
+         "-ss", ffmpeg_tools.format_time(offset), "-i", video_file, "-an",
+         "-vf", f"scale={width}:{height}", "-r", str(fps),
+         "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        frame_index = 0
+        time_index = 0
+        while time_index < len(times):
+            frame = decoder.stdout.read(frame_bytes)
+            if len(frame) < frame_bytes:
+                break # End of the video
+            frame_end = offset + (frame_index + 1) / fps
+
+            # This frame is shown at every preview time up to the start of the next frame
+            if times[time_index] < frame_end:
+                yield times[time_index], np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+                while time_index < len(times) and times[time_index] < frame_end:
+                    time_index += 1
+            frame_index += 1
+    finally:
+        # The rest of the video is not needed
+        decoder.stdout.close()
+        decoder.kill()
+        decoder.wait()
+
+
+class ThumbnailPreview():
+    """ Feeds preview thumbnails to a callback from a background thread, throttled to a few per second """
+
+    def __init__(self, video_file, times, fps, callback, max_rate=MAX_UPDATES_PER_SECOND, size=THUMBNAIL_SIZE):
+        self.video_file = video_file
+        self.times = times
+        self.fps = fps
+        self.callback = callback
+        self.min_interval = 1.0 / max_rate
+        self.size = size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """ Start decoding in a daemon thread and return immediately """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """ Stop showing thumbnails (the decoder stops at its next frame) """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        last_update = 0.0
+        pending = None # Newest frame that was skipped by the throttle
+        try:
+            for _, frame in iter_thumbnails(self.video_file, self.times, self.fps, self.size):
+                if self._stop.is_set():
+                    return
+                now = time.monotonic()
+                if now - last_update >= self.min_interval:
+                    self.callback(frame)
+                    last_update, pending = now, None
+                else:
+                    pending = frame
+            # Make sure the last thumbnail is shown
+            if pending is not None and not self._stop.is_set():
+                self.callback(pending)
+        except Exception as e:
+            # Previews are only a nicety, never let them break a run
+            print(f"Preview thumbnails stopped: {e}")
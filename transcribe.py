@@ -0,0 +1,334 @@
+"""
+    Transcription helpers.
+
+    Whisper does not need to listen to the silences the engine is going to cut
+    anyway. transcribe_voiced() packs only the voiced regions (everything
+    outside the silent intervals) into windows of at most 30 seconds, the
+    length Whisper decodes in one pass, transcribes each window and maps the
+    segment and word timestamps back onto the original timeline.
+
+    For long recordings transcribe_parallel() splits the audio at silences
+    into overlapping chunks and transcribes them in a pool of worker
+    processes, each holding its own model.
+"""
+
+import bisect
+import string
+
+import numpy as np
+
+import asr_backends # Runs the model of the chosen speech recognition backend
+import progress
+
+
+# Whisper decodes audio in 30 second windows
+WINDOW_SECONDS = 30.0
+
+# Silence inserted between packed regions so words from different regions do not run together (s)
+GAP_SECONDS = 0.2
+
+# Extra audio kept on each side of a voiced region so soft word onsets are not clipped (s)
+REGION_MARGIN = 0.25
+
+# Silence detection that decides which audio is transcribed, independent of the sliders. Only the
+# silences found with both these settings and the slider values are left out, so for any threshold
+# down to TRANSCRIBE_QUIET_THRESHOLD and minimum silence up to TRANSCRIBE_MIN_SILENCE the transcribed
+# regions (and the transcript cache key) stay the same
+TRANSCRIBE_QUIET_THRESHOLD = -30.0 # Relative to the average loudness (dBFS)
+TRANSCRIBE_MIN_SILENCE = 1000 # ms
+
+# Characters stripped from Whisper words before comparing them ("Um," -> "um")
+_PUNCTUATION = string.punctuation + " "
+
+
+def normalize_text(text):
+    """ Lower case text without surrounding spaces or punctuation """
+    return text.strip(_PUNCTUATION).lower()
+
+
+def normalize_word(word_data):
+    """ Lower case text of a Whisper word without surrounding spaces or punctuation """
+    return normalize_text(word_data.get("word", word_data.get("text", "")))
+
+
+def transcript_words(transcription):
+    """ (normalized word, start, end) of every word in a Whisper-style result """
+    return [
+        (normalize_word(word_data), word_data["start"], word_data["end"])
+        for segment in transcription.get("segments", [])
+        for word_data in segment.get("words", [])
+    ]
+
+
+def voiced_regions(silent_intervals, duration, margin=REGION_MARGIN):
+    """ (start, end) regions outside the silent intervals, widened by margin and merged """
+    regions = []
+    last_end = 0.0
+    for start, end in sorted(silent_intervals):
+        if start > last_end:
+            regions.append((last_end, start))
+        last_end = max(last_end, end)
+    if last_end < duration:
+        regions.append((last_end, duration))
+
+    # Widen each region a little and merge the ones that now touch
+    merged = []
+    for start, end in regions:
+        start, end = max(0.0, start - margin), min(duration, end + margin)
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def pack_windows(regions, window_seconds=WINDOW_SECONDS, gap=GAP_SECONDS):
+    """ Pack regions into windows of at most window_seconds of audio.
+
+    Each window is a list of (source_start, source_end, packed_start) pieces,
+    packed_start being where the piece begins inside the window. Regions longer
+    than a window are split over several windows.
+    """
+    windows = []
+    pieces = []
+    position = 0.0 # Where the next piece would start inside the current window
+
+    for start, end in regions:
+        while end - start > 1e-6:
+            # Start a new window when not even a little of this region fits anymore
+            if pieces and position + gap >= window_seconds - 0.5:
+                windows.append(pieces)
+                pieces, position = [], 0.0
+
+            packed_start = position + gap if pieces else 0.0
+            length = min(end - start, window_seconds - packed_start)
+            pieces.append((start, start + length, packed_start))
+            position = packed_start + length
+            start += length
+
+    if pieces:
+        windows.append(pieces)
+    return windows
+
+
+def window_length(pieces, sample_rate):
+    """ Samples in the audio of one packed window """
+    return int(round((pieces[-1][2] + pieces[-1][1] - pieces[-1][0]) * sample_rate))
+
+
+def window_audio(samples, sample_rate, pieces, first_sample=0):
+    """ Float32 audio of one packed window (pieces separated by silence).
+
+    first_sample is the index of samples[0] in the whole recording, for when only part of it is in memory.
+    """
+    length = window_length(pieces, sample_rate)
+    packed = np.zeros(length, dtype=np.float32)
+    for source_start, source_end, packed_start in pieces:
+        source = samples[max(0, int(source_start * sample_rate) - first_sample):
+                         max(0, int(source_end * sample_rate) - first_sample)]
+        offset = int(round(packed_start * sample_rate))
+        source = source[:max(0, length - offset)]
+        packed[offset:offset + len(source)] = source
+    return packed
+
+
+def map_time(pieces, packed_time):
+    """ Original timeline position of a time inside a packed window """
+    starts = [piece[2] for piece in pieces]
+    index = max(0, bisect.bisect_right(starts, packed_time) - 1)
+    source_start, source_end, packed_start = pieces[index]
+    # Times that fall in a gap between pieces are clamped to the end of the piece before it
+    return min(source_end, source_start + max(0.0, packed_time - packed_start))
+
+
+def _remap_segment(segment, pieces, segment_id):
+    """ Copy of a Whisper segment with its times moved back to the original timeline """
+    remapped = dict(segment)
+    remapped["id"] = segment_id
+    remapped["start"] = map_time(pieces, segment["start"])
+    remapped["end"] = map_time(pieces, segment["end"])
+    if "words" in segment:
+        remapped["words"] = [
+            dict(word, start=map_time(pieces, word["start"]), end=map_time(pieces, word["end"]))
+            for word in segment["words"]
+        ]
+    return remapped
+
+
+def transcribe_voiced(model, samples, sample_rate, regions, options=None, progress_callback=None, backend=None):
+    """ Transcribe only the given regions of the float32 audio and return a Whisper-style result """
+    windows = pack_windows(regions)
+    window_audios = (window_audio(samples, sample_rate, pieces) for pieces in windows)
+    return transcribe_windows(model, windows, window_audios, options, progress_callback, backend)
+
+
+def transcribe_windows(model, windows, window_audios, options=None, progress_callback=None, backend=None):
+    """ Transcribe packed windows with the backend's model and return a Whisper-style result on the original timeline.
+
+    window_audios yields the float32 audio of each window in turn, so it can be
+    produced while the audio is still being decoded.
+    """
+    options = dict(options or {})
+    asr = asr_backends.get_backend(backend)
+    segments = []
+    texts = []
+    language = None
+
+    stage = progress.Stage(progress_callback, "Transcribing voiced audio", 60, 79,
+                           total=sum(end - start for pieces in windows for start, end, _ in pieces),
+                           unit="s", rate_unit="x realtime")
+    transcribed = 0.0 # Seconds of voiced audio done so far
+    for index, (pieces, audio) in enumerate(zip(windows, window_audios)):
+        window_options = dict(options)
+        # Give Whisper the end of the previous window's text as context
+        if texts:
+            window_options.setdefault("initial_prompt", " ".join(texts)[-200:])
+        if language:
+            window_options.setdefault("language", language)
+
+        result = asr.transcribe(model, audio, **window_options)
+        language = language or result.get("language")
+        texts.append(result.get("text", "").strip())
+        for segment in result.get("segments", []):
+            segments.append(_remap_segment(segment, pieces, len(segments)))
+
+        transcribed += sum(end - start for start, end, _ in pieces)
+        stage.update(transcribed, f"window {index + 1}/{len(windows)}")
+
+    return {"text": " ".join(text for text in texts if text), "segments": segments, "language": language}
+
+
+# Target length of the chunks handed to each transcription worker (s)
+CHUNK_SECONDS = 300.0
+
+# Audio shared by neighbouring chunks so words at a cut are heard in full by at least one worker (s)
+CHUNK_OVERLAP = 1.0
+
+
+def split_chunks(duration, silent_intervals, chunk_seconds=CHUNK_SECONDS, overlap=CHUNK_OVERLAP):
+    """ Split the timeline into chunks of roughly chunk_seconds, cutting in the middle of silences.
+
+    Returns a list of (start, end, cut_start, cut_end): start/end include the overlap
+    with the neighbouring chunks, cut_start/cut_end are the seams without it.
+    """
+    silence_middles = sorted((start + end) / 2 for start, end in silent_intervals)
+    cuts = [0.0]
+    target = chunk_seconds
+    while target < duration - chunk_seconds / 2:
+        # Use the silence closest to the target, if one is reasonably near, so no word is cut in half
+        index = bisect.bisect_left(silence_middles, target)
+        candidates = silence_middles[max(0, index - 1):index + 1]
+        best = min(candidates, key=lambda middle: abs(middle - target), default=None)
+        cut = best if best is not None and abs(best - target) < chunk_seconds / 2 and best > cuts[-1] else target
+        cuts.append(cut)
+        target = cut + chunk_seconds
+    cuts.append(duration)
+
+    return [
+        (max(0.0, cut_start - overlap), min(duration, cut_end + overlap), cut_start, cut_end)
+        for cut_start, cut_end in zip(cuts, cuts[1:])
+    ]
+
+
+def _shift_segment(segment, offset):
+    """ Copy of a segment with all its times moved by offset """
+    shifted = dict(segment, start=segment["start"] + offset, end=segment["end"] + offset)
+    if "words" in segment:
+        shifted["words"] = [dict(word, start=word["start"] + offset, end=word["end"] + offset) for word in segment["words"]]
+    return shifted
+
+
+def _init_chunk_worker(model_name, device, torch_threads, backend=None):
+    """ Pool initializer, limits torch's threads and loads this worker's own copy of the model """
+    if torch_threads:
+        import torch # Installed together with whisper
+        torch.set_num_threads(torch_threads)
+    from model_cache import warm_up
+    warm_up(model_name, device, background=False, backend=backend)
+
+
+def _transcribe_chunk(model_name, device, backend, samples, sample_rate, chunk_start, regions, options):
+    """ Worker entry point: transcribe one chunk and return its segments on the original timeline """
+    from model_cache import get_model
+    model = get_model(model_name, device, backend)
+    if regions is not None:
+        result = transcribe_voiced(model, samples, sample_rate, regions, options, backend=backend)
+    else:
+        result = asr_backends.get_backend(backend).transcribe(model, samples, **options)
+    result["segments"] = [_shift_segment(segment, chunk_start) for segment in result.get("segments", [])]
+    return result
+
+
+def _clip_regions(regions, start, end):
+    """ The parts of the regions inside [start, end), relative to start """
+    clipped = []
+    for region_start, region_end in regions:
+        region_start, region_end = max(region_start, start), min(region_end, end)
+        if region_end > region_start:
+            clipped.append((region_start - start, region_end - start))
+    return clipped
+
+
+def _keep_between(segment, cut_start, cut_end):
+    """ The segment with only the words whose middle lies in [cut_start, cut_end), or None if nothing is left """
+    middle = (segment["start"] + segment["end"]) / 2
+    if "words" not in segment or not segment["words"]:
+        return segment if cut_start <= middle < cut_end else None
+
+    words = [word for word in segment["words"] if cut_start <= (word["start"] + word["end"]) / 2 < cut_end]
+    if not words:
+        return None
+    if len(words) == len(segment["words"]):
+        return segment
+    return dict(segment, words=words, start=words[0]["start"], end=words[-1]["end"],
+                text="".join(word["word"] for word in words))
+
+
+def transcribe_parallel(samples, sample_rate, silent_intervals, model_name, device=None, options=None,
+                        regions=None, workers=2, torch_threads=None, chunk_seconds=CHUNK_SECONDS,
+                        progress_callback=None, backend=None):
+    """ Transcribe long audio in chunks across a pool of worker processes.
+
+    The chunks overlap a little at each seam; every word is kept from the chunk
+    whose seam range contains the word's middle, so words heard by both
+    neighbours are only kept once. Returns a Whisper-style result.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    options = dict(options or {})
+    duration = len(samples) / sample_rate
+    chunks = split_chunks(duration, silent_intervals, chunk_seconds)
+
+    results = [None] * len(chunks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_chunk_worker,
+                             initargs=(model_name, device, torch_threads, backend)) as pool:
+        futures = {}
+        for index, (start, end, _, _) in enumerate(chunks):
+            chunk_regions = _clip_regions(regions, start, end) if regions is not None else None
+            if chunk_regions == []:
+                results[index] = {"text": "", "segments": [], "language": None} # Nothing voiced in this chunk
+                continue
+            chunk_samples = samples[int(start * sample_rate):int(end * sample_rate)]
+            futures[pool.submit(_transcribe_chunk, model_name, device, backend, chunk_samples, sample_rate,
+                                start, chunk_regions, options)] = index
+
+        stage = progress.Stage(progress_callback, "Transcribing in parallel", 60, 79,
+                               total=sum(chunks[index][1] - chunks[index][0] for index in futures.values()),
+                               unit="s", rate_unit="x realtime")
+        transcribed = 0.0 # Seconds of audio in the finished chunks
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index] = future.result()
+            transcribed += chunks[index][1] - chunks[index][0]
+            stage.update(transcribed, f"chunk {done}/{len(futures)}")
+
+    # Stitch the chunks back together, dropping the duplicated words in the overlaps
+    segments = []
+    for (_, _, cut_start, cut_end), result in zip(chunks, results):
+        for segment in result["segments"]:
+            kept = _keep_between(segment, cut_start, cut_end)
+            if kept is not None:
+                segments.append(dict(kept, id=len(segments)))
+
+    language = next((result.get("language") for result in results if result.get("language")), None)
+    return {"text": "".join(segment.get("text", "") for segment in segments).strip(), "segments": segments, "language": language}
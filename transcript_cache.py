@@ -0,0 +1,103 @@
+"""
+    On-disk cache of Whisper transcripts.
+
+    The transcript of a recording only depends on its audio, the Whisper model
+    and the decode options, not on the cut settings. Re-running a video after
+    moving the threshold, padding or minimum silence sliders can therefore
+    reuse the transcript from the previous run instead of running Whisper
+    again. Entries are keyed by a hash of the decoded audio, the model name
+    and the options, and the least recently used ones are removed once the
+    cache grows past its size cap.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+
+# Default size cap of the cache folder (MB)
+DEFAULT_CACHE_MB = 500
+
+
+def default_cache_dir():
+    """ Per-user folder the caches live in """
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "VideoFillerRemover")
+
+
+def audio_hash(samples):
+    """ Content hash of a decoded audio buffer """
+    return hashlib.blake2b(memoryview(samples).cast("B"), digest_size=20).hexdigest()
+
+
+class TranscriptCache():
+    """ Transcripts stored as JSON files, evicted least recently used first """
+
+    def __init__(self, cache_dir=None, max_mb=DEFAULT_CACHE_MB):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "transcripts")
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def key(self, content_hash, model_name, options=None):
+        """ Cache key for an audio hash, a model and the decode options """
+        description = json.dumps([content_hash, model_name, options or {}], sort_keys=True)
+        return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """ The cached transcript for key, or None """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as entry:
+                transcript = json.load(entry)
+        except (OSError, ValueError):
+            return None
+
+        # Touch the file so it counts as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return transcript
+
+    def put(self, key, transcript):
+        """ Store a transcript, then evict old entries if the cache is over its cap """
+        if self.max_bytes <= 0:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file first so a crash never leaves a half written entry
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as entry:
+            json.dump(transcript, entry, default=float) # NumPy scalars are written as plain floats
+        os.replace(temp_path, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache fits its size cap """
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+        except OSError:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
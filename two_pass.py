@@ -0,0 +1,122 @@
+"""
+    Two-pass transcription.
+
+    Only the timings of the filler words matter for the cuts, but asking
+    Whisper for word timestamps makes it align every word of the recording.
+    Here the audio is first transcribed at segment level only, then the
+    segments whose text holds a word or phrase of the filler lexicon get
+    their words aligned. The alignment runs Whisper's decoder once over
+    the known text of the segment (whisper.timing.find_alignment, the same
+    cross-attention alignment word_timestamps uses), without decoding
+    anything new. Segments without fillers keep their text but no words.
+
+    When the installed Whisper has no usable alignment API, the segments
+    with fillers are transcribed again with word timestamps instead.
+"""
+
+import progress
+import transcribe
+
+
+# Segments longer than this cannot be aligned in one Whisper window (s)
+MAX_ALIGN_SECONDS = 30.0
+
+
+class AlignmentUnavailable(Exception):
+    """ The installed Whisper cannot align words to a known transcript """
+
+
+def flagged_segments(transcription, lexicon):
+    """ Indexes of the segments whose text holds a filler word or phrase """
+    return [index for index, segment in enumerate(transcription.get("segments", []))
+            if lexicon.contains(segment.get("text", ""))]
+
+
+def align_words(model, audio, text, language, offset=0.0):
+    """ Whisper-style words of text spoken in the float32 16 kHz audio (at most 30 s), times shifted by offset """
+    try:
+        import torch
+        import whisper
+        from whisper.timing import find_alignment
+        from whisper.tokenizer import get_tokenizer
+        from whisper.audio import N_FRAMES, HOP_LENGTH
+    except ImportError as e:
+        raise AlignmentUnavailable(str(e))
+
+    try:
+        try:
+            tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                      language=language, task="transcribe")
+        except (TypeError, AttributeError): # Whisper releases before num_languages
+            tokenizer = get_tokenizer(model.is_multilingual, language=language, task="transcribe")
+        mel = whisper.log_mel_spectrogram(torch.from_numpy(audio), model.dims.n_mels)
+        mel = whisper.pad_or_trim(mel, N_FRAMES).to(model.device)
+        text_tokens = tokenizer.encode(" " + text.strip())
+        timings = find_alignment(model, tokenizer, text_tokens, mel, len(audio) // HOP_LENGTH)
+    except (AttributeError, TypeError) as e: # Internal API of a different Whisper version
+        raise AlignmentUnavailable(str(e))
+
+    return [{
+        "word": timing.word,
+        "start": round(offset + float(timing.start), 2),
+        "end": round(offset + float(timing.end), 2),
+        "probability": float(timing.probability),
+    } for timing in timings if timing.word.strip()]
+
+
+def transcribe_two_pass(model, regions, window_audios, lexicon, options=None, progress_callback=None, backend=None):
+    """ Segment-level transcript of the regions with words only in the segments that hold a filler.
+
+    window_audios(windows) must yield the float32 audio of every packed window
+    (see transcribe.pack_windows()) in order. Returns a Whisper-style result.
+    """
+    options = dict(options or {})
+
+    # Pass 1: text only
+    windows = transcribe.pack_windows(regions)
+    transcription = transcribe.transcribe_windows(model, windows, window_audios(windows),
+                                                  dict(options, word_timestamps=False), progress_callback, backend)
+    segments = transcription["segments"]
+    flagged = flagged_segments(transcription, lexicon)
+    print(f"{len(flagged)} of {len(segments)} segment(s) hold a filler word, aligning their words.")
+
+    # Pass 2: word timings of the flagged segments, one segment per window so each is heard on its own
+    alignable = sorted((index for index in flagged if segments[index]["end"] - segments[index]["start"] <= MAX_ALIGN_SECONDS),
+                       key=lambda index: segments[index]["start"])
+    unaligned = sorted(set(flagged) - set(alignable))
+    stage = progress.Stage(progress_callback, "Aligning filler segments", 79, 80, total=len(alignable), unit="segments")
+    segment_audios = window_audios([[(segments[index]["start"], segments[index]["end"], 0.0)] for index in alignable])
+    try:
+        for done, (index, audio) in enumerate(zip(alignable, segment_audios), start=1):
+            segment = segments[index]
+            segment["words"] = align_words(model, audio, segment["text"], transcription.get("language"), segment["start"])
+            stage.update(done)
+    except AlignmentUnavailable as e:
+        print(f"Word alignment not available ({e}), transcribing the filler segments again with word timings.")
+        unaligned = flagged
+    finally:
+        segment_audios.close() # Stops a streaming decode that is not finished
+
+    if unaligned:
+        # Transcribe what could not be aligned again with word timestamps and put it in place of those segments
+        spans = sorted((segments[index]["start"], segments[index]["end"]) for index in unaligned)
+        spans = [(max(0.0, start - transcribe.REGION_MARGIN), end + transcribe.REGION_MARGIN) for start, end in spans]
+        merged = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        span_windows = transcribe.pack_windows(merged)
+        retranscribed = transcribe.transcribe_windows(model, span_windows, window_audios(span_windows),
+                                                      dict(options, word_timestamps=True), backend=backend)
+        dropped = set(unaligned)
+        segments = [segment for index, segment in enumerate(segments) if index not in dropped]
+        segments = sorted(segments + retranscribed["segments"], key=lambda segment: segment["start"])
+        for index, segment in enumerate(segments):
+            segment["id"] = index
+
+    transcription["segments"] = segments
+    transcription["two_pass"] = {"segments": len(segments), "flagged": len(flagged),
+                                 "aligned": len(flagged) - len(unaligned)}
+    return transcription
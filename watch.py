@@ -0,0 +1,167 @@
+"""
+    Watch-folder daemon.
+
+    Keeps running, picks up every new video that appears in a folder and
+    processes it in a bounded pool of worker processes. Jobs are recorded in
+    a persistent job queue (job_queue.py, a SQLite database), so after a
+    restart or a crash the daemon carries on with the jobs that were queued
+    or still running, and every finished job keeps its settings, timings,
+    result and error.
+
+    A file is only queued once it has not been modified for SETTLE_SECONDS,
+    so videos that are still being copied into the folder are left alone.
+"""
+
+import os
+import time
+import shutil
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from engine import EngineSettings
+import batch
+import checkpoints
+import job_queue
+import model_cache
+
+
+# Name of the job database written to the output folder
+DB_FILE_NAME = "jobs.sqlite3"
+
+# Seconds between two scans of the watched folder
+POLL_SECONDS = 5.0
+
+# A file must be left unchanged this long before it is queued (s)
+SETTLE_SECONDS = 10.0
+
+# Folder inside the output folder holding the stage checkpoints of unfinished jobs
+CHECKPOINT_FOLDER_NAME = "checkpoints"
+
+
+def settled_inputs(watch_folder, settle_seconds=SETTLE_SECONDS, now=None):
+    """ Videos in watch_folder that have not been modified for settle_seconds """
+    now = time.time() if now is None else now
+    videos = []
+    for video_file in batch.collect_inputs(watch_folder):
+        try:
+            if now - os.path.getmtime(video_file) >= settle_seconds:
+                videos.append(video_file)
+        except OSError: # Removed while scanning
+            continue
+    return videos
+
+
+def queue_new_inputs(queue, watch_folder, output_folder, settings, settle_seconds=SETTLE_SECONDS):
+    """ Add a job for every settled video the queue does not know yet, returns the ids of the new jobs """
+    added = []
+    video_files = settled_inputs(watch_folder, settle_seconds)
+    for video_file, output_file in zip(video_files, batch.output_paths_for(video_files, output_folder)):
+        try:
+            job_id = queue.add(video_file, output_file, settings.to_dict())
+        except OSError:
+            continue
+        if job_id is not None:
+            print(f"Queued job {job_id}: {os.path.basename(video_file)}")
+            added.append(job_id)
+    return added
+
+
+def _new_pool(workers, settings, model_cache_mb):
+    return ProcessPoolExecutor(max_workers=workers, initializer=batch._init_worker,
+                               initargs=batch.worker_init_args(settings, model_cache_mb))
+
+
+def _remove_checkpoints(job):
+    """ Delete the work directory of a finished job """
+    checkpoint_dir = job["settings"].get("checkpoint_dir")
+    if checkpoint_dir:
+        shutil.rmtree(checkpoints.work_dir_for(checkpoint_dir, job["input"]), ignore_errors=True)
+
+
+def run_daemon(watch_folder, output_folder, settings=None, workers=None, db_file=None,
+               poll_seconds=POLL_SECONDS, settle_seconds=SETTLE_SECONDS,
+               model_cache_mb=model_cache.DEFAULT_MEMORY_BUDGET_MB, once=False):
+    """ Process the videos that appear in watch_folder until interrupted (Ctrl+C).
+
+    With once set, every video already in the folder is queued straight away
+    and the daemon stops once the queue is empty. Returns the job counts of
+    the queue when it stops.
+
+    Unless the settings say otherwise, stages are checkpointed in the output
+    folder, so a job that is tried again does not redo its analysis. The
+    checkpoints of a job are removed once it succeeded.
+    """
+    settings = settings if settings is not None else EngineSettings()
+    if settings.checkpoint_dir is None:
+        settings = dataclasses.replace(settings, checkpoint_dir=os.path.join(output_folder, CHECKPOINT_FOLDER_NAME))
+    workers = workers or os.cpu_count() or 1
+    db_file = db_file or os.path.join(output_folder, DB_FILE_NAME)
+    os.makedirs(output_folder, exist_ok=True)
+
+    queue = job_queue.JobQueue(db_file)
+    resumed = queue.requeue_interrupted()
+    if resumed:
+        print(f"Resuming {resumed} interrupted job(s).")
+    print(f"Watching {watch_folder} with {workers} worker(s), jobs recorded in {db_file}")
+
+    pool = _new_pool(workers, settings, model_cache_mb)
+    running = {} # future -> job id
+    try:
+        while True:
+            queue_new_inputs(queue, watch_folder, output_folder, settings, 0 if once else settle_seconds)
+
+            # Keep every worker busy, each job runs with the settings it was queued with
+            while len(running) < workers:
+                job = queue.claim()
+                if job is None:
+                    break
+                print(f"Starting job {job['id']}: {os.path.basename(job['input'])}")
+                running[pool.submit(batch._process_one, job["input"], job["output"], job["settings"])] = job["id"]
+
+            if not running:
+                if once:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            done, _ = wait(running, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job_id = running.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # A worker died (killed, out of memory...), try the job again in a new pool
+                    print(f"Job {job_id}: worker crashed, trying again.")
+                    queue.retry(job_id, f"Worker crashed: {e}")
+                    broken = True
+                    continue
+                except Exception as e:
+                    queue.fail(job_id, str(e))
+                    continue
+                queue.finish(job_id, result)
+                if result["success"]:
+                    _remove_checkpoints(queue.get(job_id))
+                status = "OK" if result["success"] else f"FAILED ({result.get('error', 'unknown error')})"
+                print(f"Job {job_id} ({os.path.basename(result['input'])}): {status}")
+
+            if broken:
+                # Every job of a broken pool is lost, they all go back to the queue
+                for future, job_id in running.items():
+                    queue.retry(job_id, "Worker pool crashed")
+                running.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = _new_pool(workers, settings, model_cache_mb)
+
+    except KeyboardInterrupt:
+        # Running jobs stay "running" in the database and are resumed on the next start
+        print(f"Stopping, {len(running)} running job(s) will be resumed next time.")
+
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        counts = queue.counts()
+        queue.close()
+
+    print("Jobs: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    return counts